@@ -0,0 +1,6 @@
+import os
+
+if os.environ.get("CHESSBERRY_PROFILE"):
+    from chessberry import profiling
+
+    profiling.profile_from_environment()
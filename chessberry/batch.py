@@ -0,0 +1,522 @@
+"""Work on many positions at once, as numpy arrays.
+
+numpy is an optional dependency: this module imports without it, but its
+functions raise ImportError until it is installed.
+
+Positions are stacked as (N, 12) uint64 bitboards, (N, 12, 64) planes or an
+(N, 64) mailbox. Bitboards and planes are ordered as PositionRecord.pieces:
+white pawns, knights, bishops, rooks, queens and king, then black's. The
+mailbox holds 0 for an empty square and 1 to 6 in the same order for a white
+piece, negated for a black one.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import Iterable, List, Union
+
+from chessberry.chess import (
+    BB_RANK_1,
+    Board,
+    Color,
+    MOVE_CAPTURE,
+    MOVE_DOUBLE_PAWN_PUSH,
+    MOVE_ENPASSANT,
+    MOVE_KING_CASTLE,
+    MOVE_PROMOTION,
+    MOVE_QUEEN_CASTLE,
+    Piece,
+    PIECES,
+    PositionRecord,
+    parse_fen,
+    _BISHOP_RAYS,
+    _DIRECTIONS,
+    _KING_ATTACKS,
+    _KNIGHT_ATTACKS,
+    _PAWN_ATTACKS,
+    _RAYS,
+    _ROOK_RAYS,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_ORDER = (
+    Piece.PAWN,
+    Piece.KNIGHT,
+    Piece.BISHOP,
+    Piece.ROOK,
+    Piece.QUEEN,
+    Piece.KING,
+)
+
+#  Piece-square tables in centipawns, for white and drawn as the board is seen
+#  from white's side: rank 8 first. Black uses them mirrored.
+_PST_DRAWN = {
+    Piece.PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ),
+    Piece.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    Piece.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    Piece.ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ),
+    Piece.QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ),
+    Piece.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ),
+}
+#  Centipawns per square a piece reaches on the empty board, less its own
+#  pieces' squares; a cheap stand-in for mobility.
+_MOBILITY = 2
+_DOUBLED_PAWN = -15
+_ISOLATED_PAWN = -10
+#  By how many ranks the passed pawn has advanced
+_PASSED_PAWN = (0, 5, 10, 20, 35, 60, 100, 0)
+_CHUNK = 4096
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("chessberry.batch needs numpy: pip install numpy")
+
+
+@lru_cache(maxsize=None)
+def _tables():
+    """Build the weight arrays the first time they are needed."""
+    material = np.array(
+        [100 * (PIECES[(piece, Color.LIGHT)].value or 0) for piece in _ORDER],
+        dtype=np.float32,
+    )
+    pst = np.zeros((12, 64), dtype=np.float32)
+    for index, piece in enumerate(_ORDER):
+        #  Drawn rank 8 first; flipping the ranks puts a1 first
+        white = np.array(_PST_DRAWN[piece], dtype=np.float32).reshape(8, 8)[::-1]
+        pst[index] = white.reshape(64) + material[index]
+        pst[6 + index] = -white[::-1].reshape(64) - material[index]
+
+    def __matrix(table: List[int]):
+        #  reach[from, to]: a piece on from attacks to on the empty board
+        return np.array(
+            [[table[square] >> to & 1 for to in range(64)] for square in range(64)],
+            dtype=np.float32,
+        )
+
+    queen = [rook | bishop for rook, bishop in zip(_ROOK_RAYS, _BISHOP_RAYS)]
+    reach = np.stack(
+        [
+            __matrix(_KNIGHT_ATTACKS),
+            __matrix(_BISHOP_RAYS),
+            __matrix(_ROOK_RAYS),
+            __matrix(queen),
+        ]
+    )
+    return pst, reach, np.array(_PASSED_PAWN, dtype=np.int64)
+
+
+def to_bitboards(positions: Iterable[Union[Board, PositionRecord]]) -> "np.ndarray":
+    """Stack boards or parse_fen records as an (N, 12) uint64 array."""
+    _require_numpy()
+    rows = []
+    for position in positions:
+        if isinstance(position, Board):
+            rows.append(
+                position.piece_bitboards(Color.LIGHT)
+                + position.piece_bitboards(Color.DARK)
+            )
+        else:
+            rows.append(position.pieces)
+    return np.array(rows, dtype=np.uint64).reshape(-1, 12)
+
+
+def to_planes(positions: Iterable[Union[Board, PositionRecord]]) -> "np.ndarray":
+    """Stack boards or parse_fen records as an (N, 12, 64) uint8 array."""
+    return bitboards_to_planes(to_bitboards(positions))
+
+
+def bitboards_to_planes(bitboards: "np.ndarray") -> "np.ndarray":
+    """Unpack (N, 12) uint64 bitboards into (N, 12, 64) uint8 planes."""
+    _require_numpy()
+    little = np.ascontiguousarray(bitboards, dtype="<u8")
+    bits = np.unpackbits(little.view(np.uint8), bitorder="little")
+    return bits.reshape(-1, 12, 64)
+
+
+def planes_to_mailbox(planes: "np.ndarray") -> "np.ndarray":
+    """Fold (N, 12, 64) planes into an (N, 64) int8 mailbox."""
+    _require_numpy()
+    codes = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8)
+    return np.einsum("npk,p->nk", planes.astype(np.int8), codes).astype(np.int8)
+
+
+def mailbox_to_planes(mailbox: "np.ndarray") -> "np.ndarray":
+    """Spread an (N, 64) mailbox into (N, 12, 64) uint8 planes."""
+    _require_numpy()
+    codes = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8)
+    return (mailbox[:, None, :] == codes[None, :, None]).astype(np.uint8)
+
+
+def _pawn_structure(own: "np.ndarray", enemy: "np.ndarray", passed: "np.ndarray"):
+    """Score own pawns, given as (N, 8, 8) [rank, file] from own side's view,
+    against the enemy pawns seen the same way.
+    """
+    files = own.sum(axis=1, dtype=np.int64)
+    doubled = np.maximum(files - 1, 0).sum(axis=1)
+    occupied = files > 0
+    neighbours = np.zeros_like(occupied)
+    neighbours[:, 1:] |= occupied[:, :-1]
+    neighbours[:, :-1] |= occupied[:, 1:]
+    isolated = (files * ~neighbours).sum(axis=1)
+
+    #  A pawn is passed when no enemy pawn stands ahead of it on its own or an
+    #  adjacent file.
+    guard = enemy.astype(bool)
+    guard[:, :, 1:] |= enemy[:, :, :-1].astype(bool)
+    guard[:, :, :-1] |= enemy[:, :, 1:].astype(bool)
+    at_or_ahead = np.flip(np.logical_or.accumulate(np.flip(guard, 1), 1), 1)
+    ahead = np.zeros_like(guard)
+    ahead[:, :-1] = at_or_ahead[:, 1:]
+    free = own.astype(bool) & ~ahead
+    advanced = np.einsum("nrf,r->n", free.astype(np.int64), passed)
+
+    return _DOUBLED_PAWN * doubled + _ISOLATED_PAWN * isolated + advanced
+
+
+def evaluate_batch(positions: "np.ndarray") -> "np.ndarray":
+    """Score every position of an (N, 12, 64) planes or (N, 64) mailbox array
+    in centipawns for white, as an (N,) int64 array: material from
+    ChessPiece.value, piece-square tables, a mobility proxy and pawn structure.
+    """
+    _require_numpy()
+    positions = np.asarray(positions)
+    scores = np.empty(positions.shape[0], dtype=np.int64)
+    #  A slice at a time keeps the float copies small and in cache
+    for first in range(0, positions.shape[0], _CHUNK):
+        chunk = positions[first:first + _CHUNK]
+        if chunk.ndim == 2:
+            chunk = mailbox_to_planes(chunk)
+        scores[first:first + _CHUNK] = _evaluate_planes(chunk)
+    return scores
+
+
+def _evaluate_planes(planes: "np.ndarray") -> "np.ndarray":
+    pst, reach, passed = _tables()
+    #  Every sum stays far below 2 ** 24, so float32 products are exact and run
+    #  on the fast matrix routines.
+    weights = planes.astype(np.float32)
+    n = planes.shape[0]
+
+    score = weights.reshape(n, 12 * 64) @ pst.reshape(12 * 64)
+
+    white = planes[:, :6].any(axis=1)
+    black = planes[:, 6:].any(axis=1)
+    for side, own, sign in ((0, white, 1), (6, black, -1)):
+        #  Squares reached by each knight, bishop, rook and queen
+        pieces = weights[:, side + 1:side + 5].reshape(n, 4 * 64)
+        reached = pieces @ reach.reshape(4 * 64, 64)
+        score += sign * _MOBILITY * (reached * ~own).sum(axis=1)
+
+    #  Black's pawns are seen from black's side by flipping the ranks
+    white_pawns = planes[:, 0].reshape(n, 8, 8)
+    black_pawns = planes[:, 6].reshape(n, 8, 8)
+    score += _pawn_structure(white_pawns, black_pawns, passed)
+    score -= _pawn_structure(black_pawns[:, ::-1], white_pawns[:, ::-1], passed)
+    return np.rint(score).astype(np.int64)
+
+
+#  Stacked positions for move generation: (N, 12) uint64 bitboards, whether
+#  white is to move, the castling rights bits and the en passant square
+#  bitboard, one entry per position.
+PositionArrays = namedtuple(
+    "PositionArrays", ["bitboards", "white", "castling_rights", "enpassant"]
+)
+#  The moves of every position in one flat uint16 array of encode_move codes,
+#  those of position i in moves[offsets[i]:offsets[i + 1]].
+MoveBatch = namedtuple("MoveBatch", ["moves", "offsets"])
+
+
+def stack_positions(
+    positions: Iterable[Union[Board, PositionRecord]]
+) -> PositionArrays:
+    """Stack boards or parse_fen records for generate_moves."""
+    _require_numpy()
+    records = [
+        parse_fen(position.fen()) if isinstance(position, Board) else position
+        for position in positions
+    ]
+    return PositionArrays(
+        np.array([record.pieces for record in records], dtype=np.uint64).reshape(
+            -1, 12
+        ),
+        np.array([record.turn == Color.LIGHT for record in records], dtype=bool),
+        np.array([record.castling_rights for record in records], dtype=np.uint8),
+        np.array([record.enpassant for record in records], dtype=np.uint64),
+    )
+
+
+@lru_cache(maxsize=None)
+def _move_tables():
+    """The attack tables as uint64 arrays, with a 65th, empty entry so that
+    square 64 can stand for no square.
+    """
+
+    def __table(table: List[int]):
+        return np.array(list(table) + [0], dtype=np.uint64)
+
+    rays = np.stack([__table(ray) for ray in _RAYS])
+    pawns = np.stack([__table(attacks) for attacks in _PAWN_ATTACKS])
+    return __table(_KNIGHT_ATTACKS), __table(_KING_ATTACKS), pawns, rays
+
+
+_RANK_4 = BB_RANK_1 << 24
+_RANK_5 = BB_RANK_1 << 32
+_PROMOTION_RANKS = BB_RANK_1 | BB_RANK_1 << 56
+
+
+def _u64(value: int) -> "np.uint64":
+    return np.uint64(value)
+
+
+def _square_of(bit: "np.ndarray") -> "np.ndarray":
+    """The square of each single-bit bitboard, or 64 for an empty one."""
+    #  Powers of two convert to float64 exactly
+    squares = np.log2(np.maximum(bit, _u64(1)).astype(np.float64))
+    return np.where(bit == 0, 64, squares.astype(np.int64))
+
+
+def _lowest_bit(bb: "np.ndarray") -> "np.ndarray":
+    return bb & (~bb + _u64(1))
+
+
+def _highest_bit(bb: "np.ndarray") -> "np.ndarray":
+    for shift in (1, 2, 4, 8, 16, 32):
+        bb = bb | bb >> _u64(shift)
+    return bb ^ bb >> _u64(1)
+
+
+def _slider_attacks(
+    squares: "np.ndarray", occupied: "np.ndarray", directions: Iterable[int]
+) -> "np.ndarray":
+    """As chess._ray_attacks over arrays: along each direction, the ray from
+    the square up to and including its first blocker.
+    """
+    rays = _move_tables()[3]
+    attacks = np.zeros(squares.shape, dtype=np.uint64)
+    for direction in directions:
+        ray = rays[direction][squares]
+        blockers = ray & occupied
+        if _DIRECTIONS[direction][0] > 0:
+            first = _lowest_bit(blockers)
+        else:
+            first = _highest_bit(blockers)
+        attacks |= ray ^ rays[direction][_square_of(first)]
+    return attacks
+
+
+def _rook_attacks(squares: "np.ndarray", occupied: "np.ndarray") -> "np.ndarray":
+    return _slider_attacks(squares, occupied, (0, 1, 2, 3))
+
+
+def _bishop_attacks(squares: "np.ndarray", occupied: "np.ndarray") -> "np.ndarray":
+    return _slider_attacks(squares, occupied, (4, 5, 6, 7))
+
+
+def _attacked(
+    squares: "np.ndarray",
+    occupied: "np.ndarray",
+    enemy: "np.ndarray",
+    white: "np.ndarray",
+) -> "np.ndarray":
+    """Whether the enemy pieces, (K, 6) bitboards, attack each square, given
+    occupancy occupied; white says whether the defending side is white.
+    """
+    knights, kings, pawns, _ = _move_tables()
+    hit = pawns[np.where(white, 0, 1), squares] & enemy[:, 0]
+    hit |= knights[squares] & enemy[:, 1]
+    hit |= kings[squares] & enemy[:, 5]
+    hit |= _rook_attacks(squares, occupied) & (enemy[:, 3] | enemy[:, 4])
+    hit |= _bishop_attacks(squares, occupied) & (enemy[:, 2] | enemy[:, 4])
+    return hit != 0
+
+
+def _unpack(bitboards: "np.ndarray") -> "np.ndarray":
+    """Bits of (..., ) uint64 bitboards as (..., 64) uint8, square a1 first."""
+    little = np.ascontiguousarray(bitboards, dtype="<u8")
+    bits = np.unpackbits(little.view(np.uint8), bitorder="little")
+    return bits.reshape(bitboards.shape + (64,))
+
+
+def generate_moves(positions: PositionArrays) -> MoveBatch:
+    """Generate the legal moves of every stacked position at once.
+
+    As move_set and legal_moves do, a pawn reaching the last rank counts once;
+    its code carries a queen promotion. Moves are ordered by start square, then
+    end square.
+    """
+    _require_numpy()
+    knights, kings, pawn_attacks, _ = _move_tables()
+    bitboards, white, castling_rights, enpassant = positions
+    n = bitboards.shape[0]
+    own = np.where(white[:, None], bitboards[:, :6], bitboards[:, 6:])
+    enemy = np.where(white[:, None], bitboards[:, 6:], bitboards[:, :6])
+    own_occupied = np.bitwise_or.reduce(own, axis=1)
+    enemy_occupied = np.bitwise_or.reduce(enemy, axis=1)
+    occupied = own_occupied | enemy_occupied
+    empty = ~occupied
+
+    #  One entry per piece of the side to move
+    index, kind, start = np.nonzero(_unpack(own))
+    bit = _u64(1) << start.astype(np.uint64)
+    occ = occupied[index]
+    targets = np.zeros(index.shape, dtype=np.uint64)
+    for piece, mask in enumerate(kind == piece for piece in range(6)):
+        if not mask.any():
+            continue
+        squares = start[mask]
+        if piece == 0:
+            forward = np.where(
+                white[index[mask]],
+                bit[mask] << _u64(8),
+                bit[mask] >> _u64(8),
+            ) & empty[index[mask]]
+            double = np.where(
+                white[index[mask]],
+                (forward << _u64(8)) & _u64(_RANK_4),
+                (forward >> _u64(8)) & _u64(_RANK_5),
+            ) & empty[index[mask]]
+            captures = pawn_attacks[np.where(white[index[mask]], 0, 1), squares] & (
+                enemy_occupied[index[mask]] | enpassant[index[mask]]
+            )
+            targets[mask] = forward | double | captures
+        elif piece == 1:
+            targets[mask] = knights[squares]
+        elif piece == 2:
+            targets[mask] = _bishop_attacks(squares, occ[mask])
+        elif piece == 3:
+            targets[mask] = _rook_attacks(squares, occ[mask])
+        elif piece == 4:
+            targets[mask] = _bishop_attacks(squares, occ[mask]) | _rook_attacks(
+                squares, occ[mask]
+            )
+        else:
+            targets[mask] = kings[squares]
+    targets &= ~own_occupied[index]
+
+    #  Expand every piece's targets into one (piece, end) pair per move
+    piece_of, end = np.nonzero(_unpack(targets))
+    move_index = index[piece_of]
+    move_kind = kind[piece_of]
+    move_start = start[piece_of]
+    end_bit = _u64(1) << end.astype(np.uint64)
+    flags = np.where(end_bit & enemy_occupied[move_index], MOVE_CAPTURE, 0)
+    pawn = move_kind == 0
+    flags = np.where(
+        pawn & (np.abs(end - move_start) == 16), MOVE_DOUBLE_PAWN_PUSH, flags
+    )
+    enpassant_move = (
+        pawn & (end_bit == enpassant[move_index]) & (enpassant[move_index] != 0)
+    )
+    flags = np.where(enpassant_move, MOVE_ENPASSANT, flags)
+    promotes = pawn & ((end_bit & _u64(_PROMOTION_RANKS)) != 0)
+    flags = np.where(promotes, flags | MOVE_PROMOTION | 3, flags)
+
+    #  Castles: rights, king and rook at home, nothing between, and no attack on
+    #  the squares the king stands on and crosses.
+    king_bb = own[:, 5]
+    castle_index, castle_start, castle_end, castle_flags = [], [], [], []
+    for right, home, rook, between, crossed, target, flag in (
+        (1, 4, 7, 0x60, (4, 5, 6), 6, MOVE_KING_CASTLE),
+        (2, 4, 0, 0x0E, (4, 3, 2), 2, MOVE_QUEEN_CASTLE),
+    ):
+        base = np.where(white, 0, 56)
+        rights = np.where(white, right, right << 2)
+        ok = (castling_rights & rights) != 0
+        ok &= (king_bb >> (home + base).astype(np.uint64) & _u64(1)) != 0
+        ok &= (own[:, 3] >> (rook + base).astype(np.uint64) & _u64(1)) != 0
+        ok &= (occupied & (_u64(between) << base.astype(np.uint64))) == 0
+        for square in crossed:
+            ok &= ~_attacked(base + square, occupied, enemy, white)
+        where = np.nonzero(ok)[0]
+        castle_index.append(where)
+        castle_start.append((base + home)[where])
+        castle_end.append((base + target)[where])
+        castle_flags.append(np.full(where.shape, flag))
+
+    move_index = np.concatenate([move_index] + castle_index)
+    move_start = np.concatenate([move_start] + castle_start)
+    end = np.concatenate([end] + castle_end)
+    flags = np.concatenate([flags] + castle_flags)
+    move_kind = np.concatenate(
+        [move_kind] + [np.full(where.shape, 5) for where in castle_index]
+    )
+
+    #  Keep the moves that do not leave the own king attacked
+    start_bit = _u64(1) << move_start.astype(np.uint64)
+    end_bit = _u64(1) << end.astype(np.uint64)
+    move_white = white[move_index]
+    captured = np.where(
+        flags == MOVE_ENPASSANT,
+        np.where(move_white, end_bit >> _u64(8), end_bit << _u64(8)),
+        end_bit,
+    )
+    after = (occupied[move_index] & ~start_bit & ~captured) | end_bit
+    enemy_after = enemy[move_index] & ~captured[:, None]
+    king_square = np.where(move_kind == 5, end, _square_of(king_bb)[move_index])
+    legal = ~_attacked(king_square, after, enemy_after, move_white)
+
+    move_index = move_index[legal]
+    codes = move_start[legal] | end[legal] << 6 | flags[legal] << 12
+    codes = codes.astype(np.uint16)
+    order = np.lexsort((codes >> 6 & 63, codes & 63, move_index))
+    counts = np.bincount(move_index, minlength=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return MoveBatch(codes[order], offsets)
@@ -1,9 +1,10 @@
-from collections import namedtuple
+from array import array
+from collections import OrderedDict, namedtuple
 from enum import Enum
-from typing import List, Set, Tuple, Optional
+from typing import Dict, Iterator, List, Set, Tuple, Optional
 
+import random
 import re
-import copy
 
 RANKS: List[int] = [_ for _ in range(0, 8)]
 FILES: List[int] = RANKS
@@ -27,6 +28,14 @@ class Color(Enum):
     DARK = "d"
 
 
+class Termination(Enum):
+    CHECKMATE = "checkmate"
+    STALEMATE = "stalemate"
+    INSUFFICIENT_MATERIAL = "insufficient material"
+    FIFTY_MOVES = "fifty moves"
+    THREEFOLD_REPETITION = "threefold repetition"
+
+
 ChessPiece = namedtuple("_ChessPiece", ["piece", "color", "value", "image"])
 WHITE_PAWN = ChessPiece(Piece.PAWN, Color.LIGHT, 1, "assets/Chess_plt45.png")
 BLACK_PAWN = ChessPiece(Piece.PAWN, Color.DARK, 1, "assets/Chess_pdt45.png")
@@ -40,6 +49,215 @@ WHITE_QUEEN = ChessPiece(Piece.QUEEN, Color.LIGHT, 10, "assets/Chess_qlt45.png")
 BLACK_QUEEN = ChessPiece(Piece.QUEEN, Color.DARK, 10, "assets/Chess_qdt45.png")
 WHITE_KING = ChessPiece(Piece.KING, Color.LIGHT, None, "assets/Chess_klt45.png")
 BLACK_KING = ChessPiece(Piece.KING, Color.DARK, None, "assets/Chess_kdt45.png")
+PIECES = {
+    (p.piece, p.color): p
+    for p in (
+        WHITE_PAWN,
+        BLACK_PAWN,
+        WHITE_ROOK,
+        BLACK_ROOK,
+        WHITE_KNIGHT,
+        BLACK_KNIGHT,
+        WHITE_BISHOP,
+        BLACK_BISHOP,
+        WHITE_QUEEN,
+        BLACK_QUEEN,
+        WHITE_KING,
+        BLACK_KING,
+    )
+}
+PROMOTION_PIECES: Tuple[Piece, ...] = (
+    Piece.QUEEN,
+    Piece.ROOK,
+    Piece.BISHOP,
+    Piece.KNIGHT,
+)
+#  Fen letters: upper case for white, lower case for black
+_FEN_LETTERS = {
+    p: (p.piece.value or "P").lower() if p.color == Color.DARK else p.piece.value or "P"
+    for p in PIECES.values()
+}
+
+#  Bitboards hold one bit per square, bit rank * 8 + file: a1 is bit 0, h8 bit 63.
+BB_ALL = 0xFFFF_FFFF_FFFF_FFFF
+BB_FILE_A = 0x0101_0101_0101_0101
+BB_FILE_H = BB_FILE_A << 7
+BB_RANK_1 = 0xFF
+BB_RANK_3 = BB_RANK_1 << 16
+BB_RANK_6 = BB_RANK_1 << 40
+BB_RANK_8 = BB_RANK_1 << 56
+BB_DARK_SQUARES = 0xAA55_AA55_AA55_AA55
+BB_LIGHT_SQUARES = BB_ALL ^ BB_DARK_SQUARES
+_BB_NOT_A = BB_ALL ^ BB_FILE_A
+_BB_NOT_H = BB_ALL ^ BB_FILE_H
+
+#  (shift, mask) per ray direction, orthogonal first; the mask drops the squares a
+#  shift wraps around to.
+_DIRECTIONS = (
+    (8, BB_ALL),
+    (-8, BB_ALL),
+    (1, _BB_NOT_A),
+    (-1, _BB_NOT_H),
+    (9, _BB_NOT_A),
+    (7, _BB_NOT_H),
+    (-7, _BB_NOT_A),
+    (-9, _BB_NOT_H),
+)
+
+#  Order of the piece bitboards kept by Board
+_PIECE_INDEX = {
+    Piece.PAWN: 0,
+    Piece.KNIGHT: 1,
+    Piece.BISHOP: 2,
+    Piece.ROOK: 3,
+    Piece.QUEEN: 4,
+    Piece.KING: 5,
+}
+
+#  Fen letters to PositionRecord.pieces slots, and back to pieces
+_FEN_SLOTS = {
+    letter: (piece.color == Color.DARK) * 6 + _PIECE_INDEX[piece.piece]
+    for piece, letter in _FEN_LETTERS.items()
+}
+_SLOT_PIECES: Tuple[ChessPiece, ...] = tuple(
+    sorted(_FEN_LETTERS, key=lambda piece: _FEN_SLOTS[_FEN_LETTERS[piece]])
+)
+#  Fen castling letters to Ledger.castling_rights bits
+_FEN_CASTLING = {"K": 1, "Q": 2, "k": 4, "q": 8, "-": 0}
+
+#  A position as fen gives it: twelve piece bitboards (white, then black pawns,
+#  knights, bishops, rooks, queens and king), the side to move, castling rights
+#  bits, the en passant square bitboard and the move counters.
+PositionRecord = namedtuple(
+    "PositionRecord",
+    ["pieces", "turn", "castling_rights", "enpassant", "halfmoves", "fullmove"],
+)
+
+#  How a game ended, and who won it (None for a draw)
+Outcome = namedtuple("Outcome", ["termination", "winner"])
+
+
+def parse_fen(fen: str) -> PositionRecord:
+    """Read a position in Forsyth-Edwards Notation. The move counters may be
+    left out, as in epd; raises ValueError on a malformed position.
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError("not a fen position: " + fen)
+    pieces = [0] * 12
+    ranks = fields[0].split("/")
+    if len(ranks) != 8:
+        raise ValueError("not a fen position: " + fen)
+    try:
+        for rank, row in zip(RANKS[::-1], ranks):
+            file = 0
+            for letter in row:
+                if letter in "12345678":
+                    file += int(letter)
+                else:
+                    pieces[_FEN_SLOTS[letter]] |= 1 << rank * 8 + min(file, 7)
+                    file += 1
+            #  Every rank holds exactly eight squares
+            if file != 8:
+                raise ValueError("not a fen position: " + fen)
+        castling_rights = 0
+        for letter in fields[2]:
+            castling_rights |= _FEN_CASTLING[letter]
+    except KeyError:
+        raise ValueError("not a fen position: " + fen)
+    if fields[1] not in ("w", "b"):
+        raise ValueError("not a fen position: " + fen)
+    #  The en passant square lies behind a pawn the other side just pushed
+    if fields[3] != "-" and (
+        len(fields[3]) != 2
+        or fields[3][0] not in "abcdefgh"
+        or fields[3][1] != ("6" if fields[1] == "w" else "3")
+    ):
+        raise ValueError("not a fen position: " + fen)
+    enpassant = 0 if fields[3] == "-" else 1 << _square(to_indices(fields[3]))
+    numeric = len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit()
+    return PositionRecord(
+        tuple(pieces),
+        Color.LIGHT if fields[1] == "w" else Color.DARK,
+        castling_rights,
+        enpassant,
+        int(fields[4]) if numeric else 0,
+        int(fields[5]) if numeric else 1,
+    )
+
+
+def _shift(bb: int, direction: int) -> int:
+    """Move every bit of bb one step along a direction of _DIRECTIONS."""
+    shift, mask = _DIRECTIONS[direction]
+    return (bb << shift if shift > 0 else bb >> -shift) & mask & BB_ALL
+
+
+def _ray(direction: int, square: int) -> int:
+    """Squares reached from square along a direction on an empty board."""
+    ray = 0
+    bb = _shift(1 << square, direction)
+    while bb:
+        ray |= bb
+        bb = _shift(bb, direction)
+    return ray
+
+
+#  Attack tables, indexed by square and computed once at import. _RAYS holds the
+#  empty-board ray from every square in each of the eight directions; a slider's
+#  attacks are each ray cut off behind its first blocker.
+_RAYS: List[List[int]] = [
+    [_ray(direction, square) for square in range(64)] for direction in range(8)
+]
+_ROOK_RAYS: List[int] = [
+    _RAYS[0][sq] | _RAYS[1][sq] | _RAYS[2][sq] | _RAYS[3][sq] for sq in range(64)
+]
+_BISHOP_RAYS: List[int] = [
+    _RAYS[4][sq] | _RAYS[5][sq] | _RAYS[6][sq] | _RAYS[7][sq] for sq in range(64)
+]
+_KING_ATTACKS: List[int] = [
+    _shift(1 << sq, 0)
+    | _shift(1 << sq, 1)
+    | _shift(1 << sq, 2)
+    | _shift(1 << sq, 3)
+    | _shift(1 << sq, 4)
+    | _shift(1 << sq, 5)
+    | _shift(1 << sq, 6)
+    | _shift(1 << sq, 7)
+    for sq in range(64)
+]
+_KNIGHT_ATTACKS: List[int] = [
+    _shift(_shift(1 << sq, 0), 4)
+    | _shift(_shift(1 << sq, 0), 5)
+    | _shift(_shift(1 << sq, 1), 6)
+    | _shift(_shift(1 << sq, 1), 7)
+    | _shift(_shift(1 << sq, 2), 4)
+    | _shift(_shift(1 << sq, 2), 6)
+    | _shift(_shift(1 << sq, 3), 5)
+    | _shift(_shift(1 << sq, 3), 7)
+    for sq in range(64)
+]
+#  Indexed by color == Color.DARK, then square
+_PAWN_ATTACKS: List[List[int]] = [
+    [_shift(1 << sq, 4) | _shift(1 << sq, 5) for sq in range(64)],
+    [_shift(1 << sq, 6) | _shift(1 << sq, 7) for sq in range(64)],
+]
+
+#  Zobrist keys, fixed by the seed so a position hashes the same in every run.
+#  Pieces are indexed by color == Color.DARK, then _PIECE_INDEX, then square;
+#  castling by the four-bit Ledger.castling_rights; en passant by file.
+_zobrist = random.Random(0xC4E55)
+_ZOBRIST_PIECES: List[List[List[int]]] = [
+    [[_zobrist.getrandbits(64) for _ in range(64)] for _ in range(6)]
+    for _ in range(2)
+]
+_ZOBRIST_CASTLING: List[int] = [0] * 16
+_ZOBRIST_RIGHTS: List[int] = [_zobrist.getrandbits(64) for _ in range(4)]
+for _ in range(16):
+    for __ in range(4):
+        if _ & 1 << __:
+            _ZOBRIST_CASTLING[_] ^= _ZOBRIST_RIGHTS[__]
+_ZOBRIST_ENPASSANT: List[int] = [_zobrist.getrandbits(64) for _ in range(8)]
+_ZOBRIST_TURN: int = _zobrist.getrandbits(64)
 
 
 def to_indices(algebraic_notation: str) -> Tuple[int, int]:
@@ -56,48 +274,123 @@ def from_indices(indices: Tuple[int, int]) -> str:
     return chr(indices[1] + ord("a")) + str(indices[0] + 1)
 
 
+def _square(indices: Tuple[int, int]) -> int:
+    """Convert indices to a bitboard square.
+    (0, 3) -> 3.
+    """
+    return indices[0] * 8 + indices[1]
+
+
+def _indices(square: int) -> Tuple[int, int]:
+    """Convert a bitboard square to indices.
+    3 -> (0, 3).
+    """
+    return square >> 3, square & 7
+
+
+def _bits(bb: int) -> Iterator[int]:
+    """Yield the square of every set bit in bb."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _enemy(color: Color) -> Color:
+    return Color.DARK if color is Color.LIGHT else Color.LIGHT
+
+
+#  Hit and miss counts of the move cache, its bound and its number of entries
+MoveCacheInfo = namedtuple("MoveCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _MoveCache:
+    """Legal target bitboards by (position key, color, start square), the least
+    recently used dropped first once maxsize are held. The key changes with
+    every change to the position, so entries never need invalidating.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Tuple[int, Color, int], int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def targets(self, board: "Board", color: Color, pieces: int) -> Dict[int, int]:
+        """The legal targets of color's pieces among pieces, by start square."""
+        if self.maxsize <= 0:
+            return dict(_legal_targets(board, color, pieces))
+        key = board.hash
+        found = {}
+        missing = 0
+        for start in _bits(pieces):
+            targets = self.entries.get((key, color, start))
+            if targets is None:
+                missing |= 1 << start
+                continue
+            self.entries.move_to_end((key, color, start))
+            found[start] = targets
+            self.hits += 1
+        if missing:
+            for start, targets in _legal_targets(board, color, missing):
+                self.misses += 1
+                self.entries[key, color, start] = found[start] = targets
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return found
+
+
+_move_cache = _MoveCache(4096)
+
+
+def move_cache_info() -> MoveCacheInfo:
+    """How often move_set and Board.parse_san found their moves cached."""
+    return MoveCacheInfo(
+        _move_cache.hits,
+        _move_cache.misses,
+        _move_cache.maxsize,
+        len(_move_cache.entries),
+    )
+
+
+def move_cache_clear() -> None:
+    """Empty the move cache and zero its counts."""
+    _move_cache.entries.clear()
+    _move_cache.hits = _move_cache.misses = 0
+
+
+def set_move_cache_size(maxsize: int) -> None:
+    """Bound the move cache to maxsize entries; 0 turns it off."""
+    _move_cache.maxsize = maxsize
+    while len(_move_cache.entries) > max(maxsize, 0):
+        _move_cache.entries.popitem(last=False)
+
+
 def move_set(square: str, board: "Board") -> Set[Tuple[int, int]]:
     """Get all available moves for square on board."""
     moves = set()
-    square = to_indices(square)
-    piece = board[square[0]][square[1]]
+    start = _square(to_indices(square))
+    piece = board.piece_at(start)
     if piece is None:
         return moves
 
-    color = piece.color
-    enemy_color = Color.DARK if color == Color.LIGHT else Color.LIGHT
-
-    moves.update(_piece_dispatch_table[piece.piece](square, board, color))
-
-    def __not_threatens_king(start: Tuple[int, int], end: Tuple[int, int]) -> bool:
-        if piece == WHITE_KING:
-            board.white_king_square = end
-        elif piece == BLACK_KING:
-            board.black_king_square = end
-
-        board[start[0]][start[1]] = None
-        captured = board[end[0]][end[1]]
-        board[end[0]][end[1]] = piece
-
-        is_threat = _is_attacking(
-            board.white_king_square
-            if color == Color.LIGHT
-            else board.black_king_square,
-            board,
-            enemy_color,
-        )
-
-        board[start[0]][start[1]] = piece
-        board[end[0]][end[1]] = captured
-
-        if piece == WHITE_KING:
-            board.white_king_square = square
-        elif piece == BLACK_KING:
-            board.black_king_square = square
+    targets = _move_cache.targets(board, piece.color, 1 << start).get(start, 0)
+    for end in _bits(targets):
+        moves.add(_indices(end))
+    return moves
 
-        return not is_threat
 
-    return set(filter(lambda m: (__not_threatens_king(square, m)), moves))
+def legal_moves(
+    board: "Board", targets: int = BB_ALL
+) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Get every available (start, end) move for the side to move on board,
+    keeping only those ending on a square of the targets bitboard.
+    """
+    return [
+        (_indices(start), _indices(end))
+        for start, legal in _legal_targets(board, board.turn)
+        for end in _bits(legal & targets)
+    ]
 
 
 def read_pgn_to_board(file_path: str) -> "Board":
@@ -105,382 +398,117 @@ def read_pgn_to_board(file_path: str) -> "Board":
     with open(file_path) as f:
         while f.readline() != "\n":
             pass
-        moves = re.findall(r"([A-Za-z]\w+|O-O-O|O-O)", f.read())
-
-        def __process_move(s: str, color: Color, board: "Board") -> None:
-            #  Handle castling cases
-            if s == "O-O":
-                if color == Color.LIGHT:
-                    board.move("e1", "g1")
-                else:
-                    board.move("e8", "g8")
-                return
-            elif s == "O-O-O":
-                if color == Color.LIGHT:
-                    board.move("e1", "c1")
-                else:
-                    board.move("e8", "c8")
-                return
-
-            #  Remove capture, check, checkmate data
-            trimmed = s.replace("x", "").replace("+", "").replace("#", "")
-
-            if "R" in trimmed:
-                piece = WHITE_ROOK if color == color.LIGHT else BLACK_ROOK
-            elif "N" in trimmed:
-                piece = WHITE_KNIGHT if color == color.LIGHT else BLACK_KNIGHT
-            elif "B" in trimmed:
-                piece = WHITE_BISHOP if color == color.LIGHT else BLACK_BISHOP
-            elif "Q" in trimmed:
-                piece = WHITE_QUEEN if color == color.LIGHT else BLACK_QUEEN
-            elif "K" in trimmed:
-                piece = WHITE_KING if color == color.LIGHT else BLACK_KING
-            else:
-                piece = WHITE_PAWN if color == color.LIGHT else BLACK_PAWN
-                if "=" in s:
-                    trimmed = trimmed[0:len(trimmed) - 2]
-
-            #  Can directly read end square, it is not ambiguous
-            end = trimmed[len(trimmed) - 2:len(trimmed)]
-
-            #  Start square needs more processing due to possible ambiguity; e.g.,
-            #  multiple of the same piece can move to the end square.
-            valid_squares = set()
-            for i, row in enumerate(board):
-                for j, other in enumerate(row):
-                    if other == piece:
-                        square = from_indices((i, j))
-                        if to_indices(end) in move_set(square, board):
-                            valid_squares.add(square)
-
-            #  If only one of this piece can move to end, it must be that piece.
-            if len(valid_squares) == 1:
-                start = valid_squares.pop()
-                board.move(start, end)
-                return
-
-            #  Otherwise, there should be (at least) a file in the passed string.
-            file = ord(trimmed[1]) - ord("a")
-            valid_squares = set()
-            for i, row in enumerate(board):
-                other = row[file]
-                if other == piece:
-                    square = from_indices((i, file))
-                    if to_indices(end) in move_set(square, board):
-                        valid_squares.add(square)
-            if len(valid_squares) == 1:
-                start = valid_squares.pop()
-
-            # Still ambiguous; there must be a rank in the passed string.
-            else:
-                start = trimmed[1:3]
-
-            game.move(start, end)
+        moves = re.findall(r"([A-Za-z]\w+(?:=[NBRQ])?|O-O-O|O-O)", f.read())
 
         game = Board()
-        for idx, move in enumerate(moves):
-            __process_move(move, Color.LIGHT if idx % 2 == 0 else Color.DARK, game)
+        for move in moves:
+            game.push(*game.parse_san(move))
         return game
 
 
-def _pawn_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    moves = set()
-    if color == Color.LIGHT and square[0] + 1 in RANKS:
-        if board[square[0] + 1][square[1]] is None:
-            #  White one push
-            moves.add((square[0] + 1, square[1]))
-            if (
-                square[0] + 2 in RANKS
-                and square[0] == 1
-                and board[square[0] + 2][square[1]] is None
-            ):
-                #  White two push
-                moves.add((square[0] + 2, square[1]))
-        if square[1] + 1 in FILES:
-            other = board[square[0] + 1][square[1] + 1]
-            if (
-                other is not None
-                and other.color == Color.DARK
-                or (_is_enpassant(square, (square[0] + 1, square[1] + 1), board))
-            ):
-                #  White capture forward right (standard or enpassant)
-                moves.add((square[0] + 1, square[1] + 1))
-        if square[1] - 1 in FILES:
-            other = board[square[0] + 1][square[1] - 1]
-            if (
-                other is not None
-                and other.color == Color.DARK
-                or (_is_enpassant(square, (square[0] + 1, square[1] - 1), board))
-            ):
-                #  White capture forward left (standard or enpassant)
-                moves.add((square[0] + 1, square[1] - 1))
-    elif color == Color.DARK and square[0] - 1 in RANKS:
-        if board[square[0] - 1][square[1]] is None:
-            #  Black one push
-            moves.add((square[0] - 1, square[1]))
-            if (
-                square[0] - 2 in RANKS
-                and square[0] == 6
-                and board[square[0] - 2][square[1]] is None
-            ):
-                #  Black two push
-                moves.add((square[0] - 2, square[1]))
-        if square[1] + 1 in FILES:
-            other = board[square[0] - 1][square[1] + 1]
-            if (
-                other is not None
-                and other.color == Color.LIGHT
-                or (_is_enpassant(square, (square[0] - 1, square[1] + 1), board))
-            ):
-                #  Black capture backward right (standard or enpassant)
-                moves.add((square[0] - 1, square[1] + 1))
-        if square[1] - 1 in FILES:
-            other = board[square[0] - 1][square[1] - 1]
-            if (
-                other is not None
-                and other.color == Color.LIGHT
-                or (_is_enpassant(square, (square[0] - 1, square[1] - 1), board))
-            ):
-                #  White backward left (standard or enpassant)
-                moves.add((square[0] - 1, square[1] - 1))
-    return moves
+def _ray_attacks(direction: int, square: int, occupied: int) -> int:
+    """Squares attacked from square along one direction of _DIRECTIONS, up to and
+    including the first occupied square.
+    """
+    ray = _RAYS[direction][square]
+    blockers = ray & occupied
+    if blockers:
+        if _DIRECTIONS[direction][0] < 0:
+            ray ^= _RAYS[direction][blockers.bit_length() - 1]
+        else:
+            ray ^= _RAYS[direction][(blockers & -blockers).bit_length() - 1]
+    return ray
 
 
-def _rook_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    moves = set()
+def _rook_attacks(square: int, occupied: int) -> int:
+    return (
+        _ray_attacks(0, square, occupied)
+        | _ray_attacks(1, square, occupied)
+        | _ray_attacks(2, square, occupied)
+        | _ray_attacks(3, square, occupied)
+    )
 
-    #  Check above along current file
-    curr_rank = square[0] + 1
-    while curr_rank <= 7:
-        if board[curr_rank][square[1]] is None:
-            moves.add((curr_rank, square[1]))
-        else:
-            if board[curr_rank][square[1]].color != color:
-                moves.add((curr_rank, square[1]))
-                break
-            else:
-                break
-        curr_rank += 1
-
-    #  Check below along current file
-    curr_rank = square[0] - 1
-    while curr_rank >= 0:
-        if board[curr_rank][square[1]] is None:
-            moves.add((curr_rank, square[1]))
-        else:
-            if board[curr_rank][square[1]].color != color:
-                moves.add((curr_rank, square[1]))
-                break
-            else:
-                break
-        curr_rank -= 1
-
-    #  Check right along current rank
-    curr_file = square[1] + 1
-    while curr_file <= 7:
-        if board[square[0]][curr_file] is None:
-            moves.add((square[0], curr_file))
-        else:
-            if board[square[0]][curr_file].color != color:
-                moves.add((square[0], curr_file))
-                break
-            else:
-                break
-        curr_file += 1
-
-    #  Check left along current rank
-    curr_file = square[1] - 1
-    while curr_file >= 0:
-        if board[square[0]][curr_file] is None:
-            moves.add((square[0], curr_file))
-        else:
-            if board[square[0]][curr_file].color != color:
-                moves.add((square[0], curr_file))
-                break
-            else:
-                break
-        curr_file -= 1
 
-    return moves
+def _bishop_attacks(square: int, occupied: int) -> int:
+    return (
+        _ray_attacks(4, square, occupied)
+        | _ray_attacks(5, square, occupied)
+        | _ray_attacks(6, square, occupied)
+        | _ray_attacks(7, square, occupied)
+    )
 
 
-def _knight_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    moves = set()
-    moves.add((square[0] + 2, square[1] + 1))
-    moves.add((square[0] + 2, square[1] - 1))
-    moves.add((square[0] + 1, square[1] + 2))
-    moves.add((square[0] + 1, square[1] - 2))
-    moves.add((square[0] - 2, square[1] + 1))
-    moves.add((square[0] - 2, square[1] - 1))
-    moves.add((square[0] - 1, square[1] + 2))
-    moves.add((square[0] - 1, square[1] - 2))
-    moves = filter(lambda i: i in INDICES, moves)
-
-    return set(filter(lambda m: _is_not_occupied_by_same_color(m, board, color), moves))
-
-
-def _bishop_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    moves = set()
+def _pawn_move_set(square: int, board: "Board", color: Color) -> int:
+    bb = 1 << square
+    empty = ~board.occupancy() & BB_ALL
+    if color == Color.LIGHT:
+        #  One push, and a two push from the second rank over an empty square
+        push = (bb << 8) & empty
+        push |= ((push & BB_RANK_3) << 8) & empty
+    else:
+        push = (bb >> 8) & empty
+        push |= ((push & BB_RANK_6) >> 8) & empty
+    captures = board.occupancy(_enemy(color)) | _enpassant_square(board, color)
+    return push | (_PAWN_ATTACKS[color == Color.DARK][square] & captures)
 
-    #  Check up-left
-    curr_rank = square[0] + 1
-    curr_file = square[1] - 1
-    while curr_rank <= 7 and curr_file >= 0:
-        if board[curr_rank][curr_file] is None:
-            moves.add((curr_rank, curr_file))
-        else:
-            if board[curr_rank][curr_file].color != color:
-                moves.add((curr_rank, curr_file))
-                break
-            else:
-                break
-        curr_rank += 1
-        curr_file -= 1
-
-    #  Check down-left
-    curr_rank = square[0] - 1
-    curr_file = square[1] - 1
-    while curr_rank >= 0 and curr_file >= 0:
-        if board[curr_rank][curr_file] is None:
-            moves.add((curr_rank, curr_file))
-        else:
-            if board[curr_rank][curr_file].color != color:
-                moves.add((curr_rank, curr_file))
-                break
-            else:
-                break
-        curr_rank -= 1
-        curr_file -= 1
-
-    #  Check up-right
-    curr_rank = square[0] + 1
-    curr_file = square[1] + 1
-    while curr_rank <= 7 and curr_file <= 7:
-        if board[curr_rank][curr_file] is None:
-            moves.add((curr_rank, curr_file))
-        else:
-            if board[curr_rank][curr_file].color != color:
-                moves.add((curr_rank, curr_file))
-                break
-            else:
-                break
-        curr_rank += 1
-        curr_file += 1
-
-    #  Check down-right
-    curr_rank = square[0] - 1
-    curr_file = square[1] + 1
-    while curr_rank >= 0 and curr_file <= 7:
-        if board[curr_rank][curr_file] is None:
-            moves.add((curr_rank, curr_file))
-        else:
-            if board[curr_rank][curr_file].color != color:
-                moves.add((curr_rank, curr_file))
-                break
-            else:
-                break
-        curr_rank -= 1
-        curr_file += 1
 
-    return moves
+def _rook_move_set(square: int, board: "Board", color: Color) -> int:
+    return _rook_attacks(square, board.occupancy()) & ~board.occupancy(color)
 
 
-def _queen_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    moves = set()
-    moves.update(_rook_move_set(square, board, color))
-    moves.update(_bishop_move_set(square, board, color))
-    return moves
+def _knight_move_set(square: int, board: "Board", color: Color) -> int:
+    return _KNIGHT_ATTACKS[square] & ~board.occupancy(color)
+
+
+def _bishop_move_set(square: int, board: "Board", color: Color) -> int:
+    return _bishop_attacks(square, board.occupancy()) & ~board.occupancy(color)
+
 
+def _queen_move_set(square: int, board: "Board", color: Color) -> int:
+    occupied = board.occupancy()
+    return (
+        _rook_attacks(square, occupied) | _bishop_attacks(square, occupied)
+    ) & ~board.occupancy(color)
 
-def _king_move_set(
-    square: Tuple[int, int], board: "Board", color: Color
-) -> Set[Tuple[int, int]]:
-    def __can_castle(a_file: bool, m: Set[Tuple[int, int]]) -> bool:
-        if color == color.LIGHT:
+
+def _king_move_set(square: int, board: "Board", color: Color) -> int:
+    def __can_castle(a_file: bool) -> int:
+        if color == Color.LIGHT:
+            rank, rook = 0, WHITE_ROOK
             if board.ledger.has_white_king_moved:
-                return False
-            if a_file:
-                if board.ledger.has_white_a_rook_moved:
-                    return False
-                if (
-                    board[0][1] is not None
-                    or board[0][2] is not None
-                    or board[0][3] is not None
-                ):
-                    return False
-                for sq in {(0, 2), (0, 3), (0, 4)}:
-                    if _is_attacking(sq, board, color.DARK):
-                        return False
-                m.add((0, 2))
-                return True
-            else:
-                if board.ledger.has_white_h_rook_moved:
-                    return False
-                if board[0][5] is not None or board[0][6] is not None:
-                    return False
-                for sq in {(0, 4), (0, 5), (0, 6)}:
-                    if _is_attacking(sq, board, color.DARK):
-                        return False
-                m.add((0, 6))
-                return True
+                return 0
+            if a_file and board.ledger.has_white_a_rook_moved:
+                return 0
+            if not a_file and board.ledger.has_white_h_rook_moved:
+                return 0
         else:
+            rank, rook = 7, BLACK_ROOK
             if board.ledger.has_black_king_moved:
-                return False
-            if a_file:
-                if board.ledger.has_black_a_rook_moved:
-                    return False
-                if (
-                    board[7][1] is not None
-                    or board[7][2] is not None
-                    or board[7][3] is not None
-                ):
-                    return False
-                for sq in {(7, 0), (7, 1), (7, 2), (7, 3), (7, 4)}:
-                    if _is_attacking(sq, board, color.LIGHT):
-                        return False
-                m.add((7, 2))
-                return True
-            else:
-                if board.ledger.has_black_h_rook_moved:
-                    return False
-                if board[7][5] is not None or board[7][6] is not None:
-                    return False
-                for sq in {(7, 4), (7, 5), (7, 6), (7, 7)}:
-                    if _is_attacking(sq, board, color.LIGHT):
-                        return False
-                    m.add((7, 6))
-                    return True
-
-    moves = set()
-    moves.add((square[0] - 1, square[1] - 1))
-    moves.add((square[0] - 1, square[1]))
-    moves.add((square[0] - 1, square[1] + 1))
-    moves.add((square[0], square[1] + 1))
-    moves.add((square[0] + 1, square[1] + 1))
-    moves.add((square[0] + 1, square[1]))
-    moves.add((square[0] + 1, square[1] - 1))
-    moves.add((square[0], square[1] - 1))
-
-    moves = set(filter(lambda i: i in INDICES, moves))
-
-    moves = set(
-        filter(lambda m: _is_not_occupied_by_same_color(m, board, color), moves)
-    )
-
+                return 0
+            if a_file and board.ledger.has_black_a_rook_moved:
+                return 0
+            if not a_file and board.ledger.has_black_h_rook_moved:
+                return 0
+
+        #  King and rook must still stand on their original squares
+        if square != rank * 8 + 4:
+            return 0
+        if board.piece_at(rank * 8 + (0 if a_file else 7)) != rook:
+            return 0
+
+        #  Every square between king and rook must be empty, and the king may not
+        #  castle out of, through or into check.
+        between = (0b00001110 if a_file else 0b01100000) << rank * 8
+        if board.occupancy() & between:
+            return 0
+        for file in (4, 3, 2) if a_file else (4, 5, 6):
+            if _is_attacking(rank * 8 + file, board, _enemy(color)):
+                return 0
+        return 1 << rank * 8 + (2 if a_file else 6)
+
+    moves = _KING_ATTACKS[square] & ~board.occupancy(color)
     if board.turn == color:
-        __can_castle(True, moves)
-        __can_castle(False, moves)
-
+        moves |= __can_castle(True) | __can_castle(False)
     return moves
 
 
@@ -494,55 +522,140 @@ _piece_dispatch_table = {
 }
 
 
-def _is_not_occupied_by_same_color(
-    square: Tuple[int, int], board: "Board", color: Color
+def _legal_targets(
+    board: "Board", color: Color, pieces: int = BB_ALL
+) -> Iterator[Tuple[int, int]]:
+    """Yield (start, targets) for each of color's pieces on a square of pieces,
+    where targets holds only legal moves. Checkers, pins and the squares that
+    answer a check are worked out once, instead of testing every move.
+    """
+    enemy = _enemy(color)
+    own = board.occupancy(color)
+    occupied = board.occupancy()
+    king = board.pieces(Piece.KING, color)
+    pawns, knights, bishops, rooks, queens, _ = board.piece_bitboards(enemy)
+    orthogonal, diagonal = rooks | queens, bishops | queens
+
+    #  Walk the eight rays out of the king: the first piece met is a checker if it
+    #  is an enemy slider moving along that ray, and pinned if it is our own piece
+    #  with such a slider right behind it.
+    checkers = 0
+    pins = {}
+    king_square = king.bit_length() - 1
+    if king:
+        checkers = (_KNIGHT_ATTACKS[king_square] & knights) | (
+            _PAWN_ATTACKS[color == Color.DARK][king_square] & pawns
+        )
+        evasions = checkers
+        for direction in range(8):
+            sliders = orthogonal if direction < 4 else diagonal
+            if not sliders & _RAYS[direction][king_square]:
+                continue
+            ray = _ray_attacks(direction, king_square, occupied)
+            blocker = ray & occupied
+            if blocker & sliders:
+                checkers |= blocker
+                evasions |= ray
+            elif blocker & own:
+                pinned = blocker.bit_length() - 1
+                beyond = _ray_attacks(direction, pinned, occupied)
+                if beyond & occupied & sliders:
+                    pins[pinned] = ray | beyond
+    if not checkers:
+        evasions = BB_ALL
+    elif checkers & (checkers - 1):
+        #  Double check: only the king may move
+        evasions = 0
+
+    if king & pieces:
+        targets = _king_move_set(king_square, board, color)
+        targets &= ~board.attacks(enemy)
+        #  A checking slider also covers the squares behind the king
+        for checker in _bits(checkers & (orthogonal | diagonal)):
+            targets &= ~_piece_attacks(
+                board.piece_at(checker), checker, occupied & ~king
+            )
+        yield king_square, targets
+
+    enpassant = _enpassant_square(board, color)
+    for start in _bits(own & ~king & pieces):
+        piece = board.piece_at(start)
+        pseudo = _piece_dispatch_table[piece.piece](start, board, color)
+        targets = pseudo & evasions & pins.get(start, BB_ALL)
+        if piece.piece == Piece.PAWN and pseudo & enpassant:
+            #  En passant empties two squares at once, which may expose the king
+            #  along the rank, and may capture the checker without landing on it;
+            #  play it on the occupancy bitboards instead.
+            captured = enpassant >> 8 if color == Color.LIGHT else enpassant << 8
+            after = (occupied & ~(1 << start) & ~captured) | enpassant
+            if king and _attacked(king_square, board, enemy, after, ~captured):
+                targets &= ~enpassant
+            else:
+                targets |= enpassant
+        yield start, targets
+
+
+def _attacked(
+    square: int, board: "Board", color: Color, occupied: int, keep: int = BB_ALL
 ) -> bool:
-    if board[square[0]][square[1]] is None:
+    """Whether color attacks square, given occupancy occupied and considering
+    only color's pieces within keep.
+    """
+    pawns, knights, bishops, rooks, queens, king = board.piece_bitboards(color)
+    if _KNIGHT_ATTACKS[square] & knights & keep:
         return True
-    if board[square[0]][square[1]].color == color:
-        return False
-    return True
+    if _PAWN_ATTACKS[color == Color.LIGHT][square] & pawns & keep:
+        return True
+    if _KING_ATTACKS[square] & king & keep:
+        return True
+    rooks = (rooks | queens) & keep
+    if rooks & _ROOK_RAYS[square] and _rook_attacks(square, occupied) & rooks:
+        return True
+    bishops = (bishops | queens) & keep
+    return bool(
+        bishops & _BISHOP_RAYS[square] and _bishop_attacks(square, occupied) & bishops
+    )
 
 
-def _is_attacking(square: Optional[Tuple[int, int]], board: "Board", color: Color):
-    for rank in RANKS:
-        for file in FILES:
-            piece = board[rank][file]
-            if (
-                piece is not None
-                and piece.color == color
-                and (
-                    square
-                    in _piece_dispatch_table[piece.piece](
-                        (rank, file), board, piece.color
-                    )
-                )
-            ):
-                return True
-    return False
+def _piece_attacks(piece: ChessPiece, square: int, occupied: int) -> int:
+    """Squares attacked by piece standing on square, whatever occupies them."""
+    if piece.piece == Piece.PAWN:
+        return _PAWN_ATTACKS[piece.color == Color.DARK][square]
+    if piece.piece == Piece.KNIGHT:
+        return _KNIGHT_ATTACKS[square]
+    if piece.piece == Piece.BISHOP:
+        return _bishop_attacks(square, occupied)
+    if piece.piece == Piece.ROOK:
+        return _rook_attacks(square, occupied)
+    if piece.piece == Piece.QUEEN:
+        return _rook_attacks(square, occupied) | _bishop_attacks(square, occupied)
+    return _KING_ATTACKS[square]
+
+
+def _is_attacking(square: int, board: "Board", color: Color) -> bool:
+    return bool(board.attacks(color) & 1 << square)
+
+
+def _enpassant_square(board: "Board", color: Color) -> int:
+    """Bitboard of the square color's pawns may capture en passant, if any."""
+    ledger = board.ledger
+    if len(ledger) == 0:
+        return ledger.start_enpassant if board.turn == color else 0
+    move = ledger.move_code(-1)
+    if move >> 12 != MOVE_DOUBLE_PAWN_PUSH or ledger.moved_piece(-1).color == color:
+        return 0
+    return 1 << ((move & 63) + (move >> 6 & 63)) // 2
 
 
 def _is_enpassant(start: Tuple[int, int], end: Tuple[int, int], board: "Board"):
-    piece = board[start[0]][start[1]]
-    if (
-        piece is None
-        or (piece != WHITE_PAWN and piece != BLACK_PAWN)
-        or len(board.ledger) == 0
-    ):
-        return False
-    last_move = board.ledger[len(board.ledger) - 1]
-    if last_move.piece.piece != Piece.PAWN:
+    piece = board.piece_at(_square(start))
+    if piece is None or piece.piece != Piece.PAWN:
         return False
-    if start[0] == last_move.end[0] and end[1] == last_move.end[1]:
-        if piece.color == Color.LIGHT and end[0] - last_move.end[0] == 1:
-            return True
-        elif piece.color == Color.DARK and end[0] - last_move.end[0] == -1:
-            return True
-    return False
+    return bool(_enpassant_square(board, piece.color) & 1 << _square(end))
 
 
 def _is_promotion(start: Tuple[int, int], end: Tuple[int, int], board: "Board") -> bool:
-    piece = board[start[0]][start[1]]
+    piece = board.piece_at(_square(start))
     if piece is None or piece.piece != Piece.PAWN:
         return False
     if piece.color == Color.LIGHT:
@@ -555,14 +668,66 @@ def _is_promotion(start: Tuple[int, int], end: Tuple[int, int], board: "Board")
 
 
 def _is_castle(start: Tuple[int, int], end: Tuple[int, int], board: "Board") -> bool:
-    if (
-        board[start[0]][start[1]] != WHITE_KING
-        and board[start[0]][start[1]] != BLACK_KING
-    ):
+    piece = board.piece_at(_square(start))
+    if piece is None or piece.piece != Piece.KING:
         return False
     return abs(start[1] - end[1]) == 2
 
 
+_SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?$")
+_SAN_PIECES = {
+    "": Piece.PAWN,
+    "N": Piece.KNIGHT,
+    "B": Piece.BISHOP,
+    "R": Piece.ROOK,
+    "Q": Piece.QUEEN,
+    "K": Piece.KING,
+}
+
+#  Moves packed into 16 bits, as the ledger keeps them: the start square in bits
+#  0-5, the end square in bits 6-11 and the kind of move in bits 12-15. Captures
+#  carry MOVE_CAPTURE, promotions MOVE_PROMOTION plus the piece in the low bits.
+#  A promotion whose piece is still to be chosen takes one of the two kinds left
+#  over, MOVE_PENDING_PROMOTION or MOVE_PENDING_PROMOTION_CAPTURE, until
+#  Board.promote records the piece; both carry the MOVE_CAPTURE bit, so only the
+#  second is a capture.
+MOVE_QUIET = 0
+MOVE_DOUBLE_PAWN_PUSH = 1
+MOVE_KING_CASTLE = 2
+MOVE_QUEEN_CASTLE = 3
+MOVE_CAPTURE = 4
+MOVE_ENPASSANT = 5
+MOVE_PROMOTION = 8
+MOVE_PENDING_PROMOTION = 6
+MOVE_PENDING_PROMOTION_CAPTURE = 7
+_PROMOTION_CODES: Tuple[Piece, ...] = (
+    Piece.KNIGHT,
+    Piece.BISHOP,
+    Piece.ROOK,
+    Piece.QUEEN,
+)
+
+
+def encode_move(
+    start: int, end: int, flags: int = MOVE_QUIET, promotion: Optional[Piece] = None
+) -> int:
+    """Pack a move between bitboard squares into 16 bits; a promotion piece
+    sets MOVE_PROMOTION in flags.
+    """
+    if promotion is not None:
+        flags = flags & MOVE_CAPTURE | MOVE_PROMOTION | _PROMOTION_CODES.index(promotion)
+    return start | end << 6 | flags << 12
+
+
+def decode_move(move: int) -> Tuple[int, int, int, Optional[Piece]]:
+    """Unpack a move into its start and end squares, flags and promotion piece;
+    the piece is None for a promotion still waiting for it.
+    """
+    flags = move >> 12
+    promotion = _PROMOTION_CODES[flags & 3] if flags & MOVE_PROMOTION else None
+    return move & 63, move >> 6 & 63, flags, promotion
+
+
 class _Move:
     def __init__(
         self,
@@ -570,7 +735,7 @@ class _Move:
         start: Tuple[int, int],
         end: Tuple[int, int],
         castle: bool = False,
-        promotion: bool = False,
+        promotion: Optional[Piece] = None,
         capture: bool = False,
         enpassant: bool = False,
         check: bool = False,
@@ -586,18 +751,14 @@ class _Move:
         self.__check = check
         self.__checkmate = checkmate
 
-    #  TODO: conform to pgn standard
+    #  A short form for the ledger; Board.san gives the full standard notation
     def __repr__(self):
         if self.__castle:
-            if self.__end[1] == 0:
-                return "O-O-O"
-            else:
-                return "O-O"
-        return (
-            self.__piece.piece.value
-            + ("x" if self.__capture else "")
-            + from_indices(self.__end)
-        )
+            return "O-O-O" if self.__end[1] == 2 else "O-O"
+        prefix = self.__piece.piece.value
+        if not prefix and self.__capture:
+            prefix = from_indices(self.__start)[0]
+        return prefix + ("x" if self.__capture else "") + from_indices(self.__end)
 
     @property
     def piece(self):
@@ -636,119 +797,244 @@ class _Move:
         return self.__checkmate
 
 
+#  Ledger castling flags, one bit per piece that has left its original square
+_WHITE_KING_MOVED = 1
+_BLACK_KING_MOVED = 2
+_WHITE_A_ROOK_MOVED = 4
+_BLACK_A_ROOK_MOVED = 8
+_WHITE_H_ROOK_MOVED = 16
+_BLACK_H_ROOK_MOVED = 32
+#  Ledger.castling_rights bits
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+_CORNER_FLAGS = {
+    0: _WHITE_A_ROOK_MOVED,
+    7: _WHITE_H_ROOK_MOVED,
+    56: _BLACK_A_ROOK_MOVED,
+    63: _BLACK_H_ROOK_MOVED,
+}
+#  Ledger piece codes
+_CODE_PIECES: Tuple[ChessPiece, ...] = tuple(PIECES.values())
+_PIECE_CODES = {piece: code for code, piece in enumerate(_CODE_PIECES)}
+
+
 class Ledger:
-    def __init__(self):
-        self.__ledger: List[_Move] = list()
-        self.__str_format: str = ""
-        self.__has_white_king_moved: bool = False
-        self.__has_black_king_moved: bool = False
-        self.__has_white_a_rook_moved: bool = False
-        self.__has_black_a_rook_moved: bool = False
-        self.__has_white_h_rook_moved: bool = False
-        self.__has_black_h_rook_moved: bool = False
+    def __init__(
+        self,
+        castling_rights: int = 15,
+        enpassant: int = 0,
+        halfmoves: int = 0,
+        fullmove: int = 1,
+    ):
+        #  Per move, its encode_move code and the code of the piece that moved;
+        #  _Move views are only built when a move is looked at.
+        self.__moves = array("H")
+        self.__pieces = array("B")
+        #  What the position the moves start from does not show: its castles,
+        #  en passant square bitboard and move counters.
+        self.__start = (enpassant, halfmoves, fullmove)
+        self.__moved: int = 0
+        for right, flag in (
+            (WHITE_KINGSIDE, _WHITE_H_ROOK_MOVED),
+            (WHITE_QUEENSIDE, _WHITE_A_ROOK_MOVED),
+            (BLACK_KINGSIDE, _BLACK_H_ROOK_MOVED),
+            (BLACK_QUEENSIDE, _BLACK_A_ROOK_MOVED),
+        ):
+            if not castling_rights & right:
+                self.__moved |= flag
+        #  The castling flags before each move, so pop can restore them
+        self.__moved_history = array("B")
 
     def __len__(self):
-        return len(self.__ledger)
-
-    def __getitem__(self, item: int):
-        return self.__ledger[item]
+        return len(self.__moves)
+
+    def __getitem__(self, item: int) -> _Move:
+        start, end, flags, promotion = decode_move(self.__moves[item])
+        return _Move(
+            piece=_CODE_PIECES[self.__pieces[item]],
+            start=_indices(start),
+            end=_indices(end),
+            castle=flags in (MOVE_KING_CASTLE, MOVE_QUEEN_CASTLE),
+            promotion=promotion,
+            capture=bool(flags & MOVE_CAPTURE) and flags != MOVE_PENDING_PROMOTION,
+            enpassant=flags == MOVE_ENPASSANT,
+        )
 
     def __repr__(self):
-        return self.__str_format
+        return " ".join(
+            (str(i // 2 + 1) + "." if i % 2 == 0 else "") + self[i].__repr__()
+            for i in range(len(self))
+        )
+
+    @property
+    def start_enpassant(self) -> int:
+        """Bitboard of the en passant square before the first move, if any."""
+        return self.__start[0]
+
+    @property
+    def start_halfmoves(self) -> int:
+        """Plies since the last capture or pawn move before the first move."""
+        return self.__start[1]
+
+    @property
+    def start_fullmove(self) -> int:
+        """The move number of the first move."""
+        return self.__start[2]
+
+    def move_code(self, item: int) -> int:
+        """The encode_move code of a move."""
+        return self.__moves[item]
+
+    def moved_piece(self, item: int) -> ChessPiece:
+        """The piece that made a move, as it was before any promotion."""
+        return _CODE_PIECES[self.__pieces[item]]
+
+    @property
+    def castling_rights(self) -> int:
+        """The castles still allowed by the king and rook moves so far, as
+        WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE bits.
+        """
+        rights = 0
+        if not self.__moved & _WHITE_KING_MOVED:
+            if not self.__moved & _WHITE_H_ROOK_MOVED:
+                rights |= WHITE_KINGSIDE
+            if not self.__moved & _WHITE_A_ROOK_MOVED:
+                rights |= WHITE_QUEENSIDE
+        if not self.__moved & _BLACK_KING_MOVED:
+            if not self.__moved & _BLACK_H_ROOK_MOVED:
+                rights |= BLACK_KINGSIDE
+            if not self.__moved & _BLACK_A_ROOK_MOVED:
+                rights |= BLACK_QUEENSIDE
+        return rights
 
     @property
     def has_white_king_moved(self):
-        return self.__has_white_king_moved
+        return bool(self.__moved & _WHITE_KING_MOVED)
 
     @property
     def has_black_king_moved(self):
-        return self.__has_black_king_moved
+        return bool(self.__moved & _BLACK_KING_MOVED)
 
     @property
     def has_white_a_rook_moved(self):
-        return self.__has_white_a_rook_moved
+        return bool(self.__moved & _WHITE_A_ROOK_MOVED)
 
     @property
     def has_black_a_rook_moved(self):
-        return self.__has_black_a_rook_moved
+        return bool(self.__moved & _BLACK_A_ROOK_MOVED)
 
     @property
     def has_white_h_rook_moved(self):
-        return self.__has_white_h_rook_moved
+        return bool(self.__moved & _WHITE_H_ROOK_MOVED)
 
     @property
     def has_black_h_rook_moved(self):
-        return self.__has_black_h_rook_moved
+        return bool(self.__moved & _BLACK_H_ROOK_MOVED)
 
     def add_move(self, move: _Move) -> "Ledger":
-        if move.piece == WHITE_KING:
-            self.__has_white_king_moved = True
-        elif move.piece == BLACK_KING:
-            self.__has_black_king_moved = True
-        elif move.piece == WHITE_ROOK:
-            if move.start == (0, 0):
-                self.__has_white_a_rook_moved = True
-            elif move.start == (0, 7):
-                self.__has_white_h_rook_moved = True
-        elif move.piece == BLACK_ROOK:
-            if move.start == (7, 0):
-                self.__has_black_a_rook_moved = True
-            elif move.start == (7, 7):
-                self.__has_black_h_rook_moved = True
-        self.__ledger.append(move)
-        self.__str_format += (
-            str(len(self.__ledger) // 2 + 1) + "." + move.__repr__()
-            if len(self.__ledger) % 2 != 0
-            else " " + move.__repr__() + " "
+        start, end = _square(move.start), _square(move.end)
+        flags = MOVE_CAPTURE if move.capture else MOVE_QUIET
+        if move.castle:
+            flags = MOVE_QUEEN_CASTLE if move.end[1] == 2 else MOVE_KING_CASTLE
+        elif move.enpassant:
+            flags = MOVE_ENPASSANT
+        elif move.piece.piece == Piece.PAWN and abs(end - start) == 16:
+            flags = MOVE_DOUBLE_PAWN_PUSH
+        return self.push(encode_move(start, end, flags, move.promotion), move.piece)
+
+    def push(self, move: int, piece: ChessPiece) -> "Ledger":
+        """Record a move, given as its encode_move code, made by piece."""
+        self.__moved_history.append(self.__moved)
+        if piece == WHITE_KING:
+            self.__moved |= _WHITE_KING_MOVED
+        elif piece == BLACK_KING:
+            self.__moved |= _BLACK_KING_MOVED
+        #  A rook leaving its corner, or being captured there, loses that castle
+        self.__moved |= _CORNER_FLAGS.get(move & 63, 0) | _CORNER_FLAGS.get(
+            move >> 6 & 63, 0
         )
+        self.__moves.append(move)
+        self.__pieces.append(_PIECE_CODES[piece])
         return self
 
+    def promote(self, piece: Piece) -> None:
+        """Record the piece the pawn of the last move was promoted to."""
+        move = self.__moves[-1]
+        flags = MOVE_CAPTURE if move >> 12 == MOVE_PENDING_PROMOTION_CAPTURE else 0
+        self.__moves[-1] = move & 0xFFF | (
+            flags | MOVE_PROMOTION | _PROMOTION_CODES.index(piece)
+        ) << 12
+
+    def pop(self) -> _Move:
+        """Remove the last move, restoring the castling flags from before it."""
+        move = self[-1]
+        self.__moved = self.__moved_history.pop()
+        self.__moves.pop()
+        self.__pieces.pop()
+        return move
+
 
 class Board:
     def __init__(self, empty: bool = False, turn: Color = Color.LIGHT):
         self.__turn = turn
         self.__hold_for_promotion: bool = False
-        self.__board: List[List[Optional[ChessPiece]]] = [
-            [None] * 8 for _ in range(0, 8)
-        ]
-        self.__history: List[List[List[Optional[ChessPiece]]]] = []
+        #  The same position twice: a square-indexed mailbox for lookups by square,
+        #  and per-color, per-piece bitboards (ordered as _PIECE_INDEX) for move
+        #  generation.
+        self.__squares: List[Optional[ChessPiece]] = [None] * 64
+        self.__bitboards: List[List[int]] = [[0] * 6, [0] * 6]
+        self.__occupancy: List[int] = [0, 0]
+        #  Attack maps: the squares attacked from each square, and their union per
+        #  color, kept current by __refresh_attacks as pieces come and go.
+        self.__attacks_from: List[int] = [0] * 64
+        self.__attacks: List[int] = [0, 0]
+        #  Bitboard of the squares whose piece changed since take_changes, for a
+        #  display to redraw only those.
+        self.__changes: int = 0
+        #  Undo record: the piece each move captured; the ledger keeps the moves
+        #  and castling flags, and the rest of the position follows from them.
+        self.__captured: List[Optional[ChessPiece]] = []
         self.__ledger: Ledger = Ledger()
-        self.__white_king_square: Optional[Tuple[int, int]] = None
-        self.__black_king_square: Optional[Tuple[int, int]] = None
+        #  Zobrist key: the pieces' keys are kept by __put and __remove, the rest
+        #  by __state_key around every change to the position.
+        self.__hash: int = _ZOBRIST_CASTLING[self.__ledger.castling_rights]
+        if turn == Color.DARK:
+            self.__hash ^= _ZOBRIST_TURN
         if not empty:
-            for i, col in enumerate(self.__board):
-                self.__board[1][i] = WHITE_PAWN
-                self.__board[6][i] = BLACK_PAWN
-            self.__board[0][0] = WHITE_ROOK
-            self.__board[7][0] = BLACK_ROOK
-            self.__board[0][1] = WHITE_KNIGHT
-            self.__board[7][1] = BLACK_KNIGHT
-            self.__board[0][2] = WHITE_BISHOP
-            self.__board[7][2] = BLACK_BISHOP
-            self.__board[0][3] = WHITE_QUEEN
-            self.__board[7][3] = BLACK_QUEEN
-            self.__board[0][4] = WHITE_KING
-            self.__board[7][4] = BLACK_KING
-            self.__board[0][5] = WHITE_BISHOP
-            self.__board[7][5] = BLACK_BISHOP
-            self.__board[0][6] = WHITE_KNIGHT
-            self.__board[7][6] = BLACK_KNIGHT
-            self.__board[0][7] = WHITE_ROOK
-            self.__board[7][7] = BLACK_ROOK
-            self.__white_king_square = (0, 4)
-            self.__black_king_square = (7, 4)
+            back_rank = (
+                Piece.ROOK,
+                Piece.KNIGHT,
+                Piece.BISHOP,
+                Piece.QUEEN,
+                Piece.KING,
+                Piece.BISHOP,
+                Piece.KNIGHT,
+                Piece.ROOK,
+            )
+            for file, piece in enumerate(back_rank):
+                self.__put(file, PIECES[(piece, Color.LIGHT)])
+                self.__put(8 + file, WHITE_PAWN)
+                self.__put(48 + file, BLACK_PAWN)
+                self.__put(56 + file, PIECES[(piece, Color.DARK)])
+            self.__refresh_attacks(self.occupancy())
+        #  Plies since the last capture or pawn move, and its value before each
+        #  move; and how often each position key has stood on the board, kept
+        #  by push and pop so repetitions are counted without a replay.
+        self.__halfmoves: int = 0
+        self.__halfmove_history = array("I")
+        self.__seen: Dict[int, int] = {self.__hash: 1}
 
     def __repr__(self):
         out = ""
         for rank in RANKS[::-1]:
             out += str(rank + 1) + " | "
-            for file in FILES:
+            for piece in self[rank]:
                 out += (
                     " - "
-                    if self.__board[rank][file] is None
-                    else self.__board[rank][file].color.value
-                    + self.__board[rank][file].piece.value
-                    + " "
+                    if piece is None
+                    else piece.color.value + piece.piece.value + " "
                 )
             out += "|\n"
         out += "   "
@@ -767,97 +1053,538 @@ class Board:
 
     @property
     def white_king_square(self) -> Optional[Tuple[int, int]]:
-        return self.__white_king_square
-
-    @white_king_square.setter
-    def white_king_square(self, value: Tuple[int, int]):
-        self.__white_king_square = value
+        return self.__king_square(Color.LIGHT)
 
     @property
     def black_king_square(self) -> Optional[Tuple[int, int]]:
-        return self.__black_king_square
+        return self.__king_square(Color.DARK)
 
-    @black_king_square.setter
-    def black_king_square(self, value: Tuple[int, int]):
-        self.__black_king_square = value
+    @property
+    def hold_for_promotion(self) -> bool:
+        return self.__hold_for_promotion
 
-    def attach(self, square: str, piece: ChessPiece) -> "Board":
-        square = to_indices(square)
-        self.__board[square[0]][square[1]] = piece
-        if piece == WHITE_KING:
-            self.__white_king_square = square
-        elif piece == BLACK_KING:
-            self.__black_king_square = square
+    @property
+    def hash(self) -> int:
+        """64-bit Zobrist key of the pieces, side to move, castling rights and
+        the en passant file, if a pawn could capture there.
+        """
+        return self.__hash
+
+    @property
+    def halfmoves(self) -> int:
+        """Plies since the last capture or pawn move, for the fifty-move rule."""
+        return self.__halfmoves
+
+    @property
+    def repetitions(self) -> int:
+        """How many times the position on the board has stood there, counting
+        this time, since the board was set up.
+        """
+        return self.__seen.get(self.__hash, 0)
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Board":
+        """Set up a board from a position in Forsyth-Edwards Notation."""
+        return cls.from_record(parse_fen(fen))
+
+    @classmethod
+    def from_record(cls, record: PositionRecord) -> "Board":
+        """Set up a board from a position as parse_fen reads it."""
+        board = cls(empty=True, turn=record.turn)
+        board.__hash ^= board.__state_key()
+        board.__ledger = Ledger(
+            record.castling_rights,
+            record.enpassant,
+            record.halfmoves,
+            record.fullmove,
+        )
+        for piece, bb in zip(_SLOT_PIECES, record.pieces):
+            for square in _bits(bb):
+                board.__put(square, piece)
+        board.__refresh_attacks(board.occupancy())
+        board.__hash ^= board.__state_key()
+        board.__halfmoves = record.halfmoves
+        board.__seen = {board.__hash: 1}
+        return board
+
+    def fen(self) -> str:
+        """The position in Forsyth-Edwards Notation."""
+        ranks = []
+        for rank in RANKS[::-1]:
+            out, empty = "", 0
+            for piece in self[rank]:
+                if piece is None:
+                    empty += 1
+                    continue
+                out += (str(empty) if empty else "") + _FEN_LETTERS[piece]
+                empty = 0
+            ranks.append(out + (str(empty) if empty else ""))
+
+        castling = ""
+        rights = self.__ledger.castling_rights
+        for right, letter, king, rook in (
+            (WHITE_KINGSIDE, "K", 4, 7),
+            (WHITE_QUEENSIDE, "Q", 4, 0),
+            (BLACK_KINGSIDE, "k", 60, 63),
+            (BLACK_QUEENSIDE, "q", 60, 56),
+        ):
+            #  A right only counts while king and rook stand on their squares
+            color = Color.LIGHT if king == 4 else Color.DARK
+            if (
+                rights & right
+                and self.__squares[king] == PIECES[(Piece.KING, color)]
+                and self.__squares[rook] == PIECES[(Piece.ROOK, color)]
+            ):
+                castling += letter
+
+        enpassant = _enpassant_square(self, self.__turn)
+        plies = len(self.__ledger)
+        if plies and self.__ledger.moved_piece(0).color == Color.DARK:
+            plies += 1
+        elif not plies and self.__turn == Color.DARK:
+            plies = 1
+
+        return " ".join(
+            (
+                "/".join(ranks),
+                "w" if self.__turn == Color.LIGHT else "b",
+                castling or "-",
+                from_indices(_indices(enpassant.bit_length() - 1))
+                if enpassant
+                else "-",
+                str(self.__halfmoves),
+                str(plies // 2 + self.__ledger.start_fullmove),
+            )
+        )
+
+    def __state_key(self) -> int:
+        key = _ZOBRIST_CASTLING[self.__ledger.castling_rights]
+        enpassant = _enpassant_square(self, self.__turn)
+        if enpassant:
+            square = enpassant.bit_length() - 1
+            if _PAWN_ATTACKS[self.__turn == Color.LIGHT][square] & self.pieces(
+                Piece.PAWN, self.__turn
+            ):
+                key ^= _ZOBRIST_ENPASSANT[square & 7]
+        return key
+
+    def __king_square(self, color: Color) -> Optional[Tuple[int, int]]:
+        king = self.pieces(Piece.KING, color)
+        return _indices(king.bit_length() - 1) if king else None
+
+    def pieces(self, piece: Piece, color: Color) -> int:
+        """Bitboard of the squares holding color's pieces of type piece."""
+        return self.__bitboards[0 if color == Color.LIGHT else 1][_PIECE_INDEX[piece]]
+
+    def occupancy(self, color: Optional[Color] = None) -> int:
+        """Bitboard of the squares holding color's pieces, or any piece."""
+        if color is None:
+            return self.__occupancy[0] | self.__occupancy[1]
+        return self.__occupancy[0 if color == Color.LIGHT else 1]
+
+    def piece_bitboards(self, color: Color) -> Tuple[int, ...]:
+        """Bitboards of color's pawns, knights, bishops, rooks, queens and king."""
+        return tuple(self.__bitboards[0 if color == Color.LIGHT else 1])
+
+    def attacks(self, color: Color) -> int:
+        """Bitboard of the squares attacked by color's pieces."""
+        return self.__attacks[0 if color == Color.LIGHT else 1]
+
+    def attacks_from(self, square: int) -> int:
+        """Bitboard of the squares attacked by the piece on square, if any."""
+        return self.__attacks_from[square]
+
+    def piece_at(self, square: int) -> Optional[ChessPiece]:
+        """Get the piece on a bitboard square, 0 (a1) to 63 (h8)."""
+        return self.__squares[square]
+
+    def __put(self, square: int, piece: ChessPiece) -> None:
+        self.__remove(square)
+        color = 0 if piece.color == Color.LIGHT else 1
+        index = _PIECE_INDEX[piece.piece]
+        bb = 1 << square
+        self.__bitboards[color][index] |= bb
+        self.__occupancy[color] |= bb
+        self.__squares[square] = piece
+        self.__hash ^= _ZOBRIST_PIECES[color][index][square]
+
+    def __remove(self, square: int) -> Optional[ChessPiece]:
+        piece = self.__squares[square]
+        if piece is not None:
+            color = 0 if piece.color == Color.LIGHT else 1
+            index = _PIECE_INDEX[piece.piece]
+            mask = ~(1 << square)
+            self.__bitboards[color][index] &= mask
+            self.__occupancy[color] &= mask
+            self.__squares[square] = None
+            self.__hash ^= _ZOBRIST_PIECES[color][index][square]
+        return piece
+
+    def __refresh_attacks(self, changed: int) -> None:
+        """Bring the attack maps up to date after the squares of changed were
+        emptied or filled. Only the pieces on changed squares and the sliders
+        whose attacks reach one of them see their attacks change.
+        """
+        self.__changes |= changed
+        light, dark = self.__bitboards
+        sliders = (
+            light[2] | light[3] | light[4] | dark[2] | dark[3] | dark[4]
+        ) & ~changed
+        stale = changed
+        for square in _bits(sliders):
+            if self.__attacks_from[square] & changed:
+                stale |= 1 << square
+
+        occupied = self.occupancy()
+        for square in _bits(stale):
+            piece = self.__squares[square]
+            self.__attacks_from[square] = (
+                0 if piece is None else _piece_attacks(piece, square, occupied)
+            )
+
+        for color in (0, 1):
+            attacks = 0
+            for square in _bits(self.__occupancy[color]):
+                attacks |= self.__attacks_from[square]
+            self.__attacks[color] = attacks
+
+    def take_changes(self) -> List[int]:
+        """Get the squares, 0 (a1) to 63 (h8), whose piece changed since the
+        last call (or since the board was set up), and start over.
+        """
+        changes, self.__changes = self.__changes, 0
+        return list(_bits(changes))
+
+    def attach(self, square: str, piece: Optional[ChessPiece]) -> "Board":
+        square = _square(to_indices(square))
+        self.__forget()
+        self.__hash ^= self.__state_key()
+        if piece is None:
+            self.__remove(square)
+        else:
+            self.__put(square, piece)
+        self.__hash ^= self.__state_key()
+        self.__refresh_attacks(1 << square)
+        self.__seen[self.__hash] = self.__seen.get(self.__hash, 0) + 1
         return self
 
-    def __getitem__(self, item: int):
-        return self.__board[item]
+    def __forget(self) -> None:
+        """Take the position on the board out of the count of those seen."""
+        count = self.__seen.get(self.__hash, 0)
+        if count > 1:
+            self.__seen[self.__hash] = count - 1
+        else:
+            self.__seen.pop(self.__hash, None)
+
+    def __getitem__(self, item: int) -> Tuple[Optional[ChessPiece], ...]:
+        rank = RANKS[item]
+        return tuple(self.__squares[rank * 8:rank * 8 + 8])
 
     def __iter__(self):
-        yield from self.__board
+        for rank in RANKS:
+            yield self[rank]
+
+    def parse_san(
+        self, san: str
+    ) -> Tuple[Tuple[int, int], Tuple[int, int], Optional[Piece]]:
+        """Find the legal (start, end, promotion) that a move in standard
+        algebraic notation names for the side to move, as push takes it. A pawn
+        reaching the last rank without a promotion piece becomes a queen; raises
+        ValueError if san names no legal move, or more than one.
+        """
+        token = san.rstrip("+#!?").replace("0", "O")
+        color = self.__turn
+        if token in ("O-O", "O-O-O"):
+            start = (0 if color == Color.LIGHT else 7) * 8 + 4
+            end = start + (2 if token == "O-O" else -2)
+            if self.__squares[start] != PIECES[(Piece.KING, color)]:
+                raise ValueError("illegal move " + san)
+            piece, candidates = Piece.KING, 1 << start
+        else:
+            match = _SAN.match(token)
+            if match is None:
+                raise ValueError("not a san move: " + san)
+            letter, file, rank, capture, end, promotion = match.groups()
+            piece = _SAN_PIECES[letter or ""]
+            end = _square(to_indices(end))
+            own = self.pieces(piece, color)
+
+            #  Look back from end for the pieces that could have come from there:
+            #  those a piece of the same kind standing on end would attack, or for
+            #  pawns, the squares behind end.
+            if piece != Piece.PAWN:
+                candidates = own & _piece_attacks(
+                    PIECES[(piece, color)], end, self.occupancy()
+                )
+            elif capture or file:
+                candidates = own & _PAWN_ATTACKS[color == Color.LIGHT][end]
+            else:
+                behind = end - 8 if color == Color.LIGHT else end + 8
+                candidates = own & 1 << behind if 0 <= behind < 64 else 0
+                #  A double push, from two squares behind over an empty square
+                double = end >> 3 == (3 if color == Color.LIGHT else 4)
+                if double and not candidates and self.__squares[behind] is None:
+                    candidates = own & 1 << 2 * behind - end
+            if file:
+                candidates &= BB_FILE_A << ord(file) - ord("a")
+            if rank:
+                candidates &= BB_RANK_1 << 8 * (int(rank) - 1)
+
+        starts = [
+            start
+            for start, targets in _move_cache.targets(self, color, candidates).items()
+            if targets >> end & 1
+        ]
+        if len(starts) != 1:
+            raise ValueError(
+                ("illegal" if not starts else "ambiguous") + " move " + san
+            )
+        if piece == Piece.PAWN and end >> 3 in (0, 7):
+            promotion = _SAN_PIECES[promotion or "Q"]
+        else:
+            promotion = None
+        return _indices(starts[0]), _indices(end), promotion
 
-    def move(self, start: str, end: str) -> bool:
+    def san(
+        self,
+        start: Tuple[int, int],
+        end: Tuple[int, int],
+        promotion: Optional[Piece] = None,
+    ) -> str:
+        """The standard algebraic notation of the legal move start-end for the
+        side to move, before it is played.
+        """
+        color = self.__turn
+        piece = self.__squares[_square(start)]
+        if _is_castle(start, end, self):
+            san = "O-O-O" if end[1] == 2 else "O-O"
+        else:
+            capture = self.__squares[_square(end)] is not None or _is_enpassant(
+                start, end, self
+            )
+            san = piece.piece.value
+            if piece.piece == Piece.PAWN:
+                if capture:
+                    san += from_indices(start)[0]
+            else:
+                #  Name the start file, rank or both when another piece of the
+                #  same kind could also move to end
+                others = self.pieces(piece.piece, color) & ~(1 << _square(start))
+                rivals = [
+                    _indices(other)
+                    for other, targets in _legal_targets(self, color, others)
+                    if targets >> _square(end) & 1
+                ]
+                if rivals:
+                    if all(rival[1] != start[1] for rival in rivals):
+                        san += from_indices(start)[0]
+                    elif all(rival[0] != start[0] for rival in rivals):
+                        san += from_indices(start)[1]
+                    else:
+                        san += from_indices(start)
+            san += ("x" if capture else "") + from_indices(end)
+            if _is_promotion(start, end, self):
+                if promotion not in PROMOTION_PIECES:
+                    promotion = Piece.QUEEN
+                san += "=" + promotion.value
+
+        self.push(start, end, promotion)
+        if self.attacks(color) & self.pieces(Piece.KING, self.__turn):
+            mated = not any(targets for _, targets in _legal_targets(self, self.__turn))
+            san += "#" if mated else "+"
+        self.pop()
+        return san
+
+    def move(self, start: str, end: str, promotion: Optional[Piece] = None) -> bool:
+        """Play start-end for the side to move; a pawn reaching the last rank is
+        promoted to promotion if given, otherwise the board holds until promote.
+        """
         if self.__hold_for_promotion:
             return False
         if to_indices(end) not in move_set(start, self):
             return False
 
         start, end = to_indices(start), to_indices(end)
-
-        if self.__board[start[0]][start[1]].color != self.turn:
+        if self.__squares[_square(start)].color != self.turn:
             return False
 
-        piece = self.__board[start[0]][start[1]]
-        enpassant = _is_enpassant(start, end, self)
-        self.__history.append(copy.deepcopy(self.__board))
-        self.__ledger.add_move(
-            _Move(
-                piece=piece,
-                start=start,
-                end=end,
-                castle=_is_castle(start, end, self),
-                promotion=_is_promotion(start, end, self),
-                capture=(
-                    True
-                    if self.__board[end[0]][end[1]] is not None or enpassant
-                    else False
-                ),
-                enpassant=enpassant,
-            )
-        )
-        self.__board[start[0]][start[1]] = None
-        self.__board[end[0]][end[1]] = piece
-        if enpassant:
-            if self.turn == Color.LIGHT:
-                self.__board[end[0] - 1][end[1]] = None
-            else:
-                self.__board[end[0] + 1][end[1]] = None
-        last_move = self.__ledger[len(self.__ledger) - 1]
+        self.push(start, end, promotion)
+        return True
 
-        if piece == WHITE_KING:
-            self.__white_king_square = end
-            if last_move.castle:
-                if end[1] == 2:
-                    self.__board[0][0] = None
-                    self.__board[0][3] = WHITE_ROOK
-                else:
-                    self.__board[0][7] = None
-                    self.__board[0][5] = WHITE_ROOK
-        elif piece == BLACK_KING:
-            self.__black_king_square = end
-            if last_move.castle:
-                if end[1] == 2:
-                    self.__board[7][0] = None
-                    self.__board[7][3] = BLACK_ROOK
+    def push(
+        self,
+        start: Tuple[int, int],
+        end: Tuple[int, int],
+        promotion: Optional[Piece] = None,
+    ) -> None:
+        """Play start-end without checking it, as for moves from legal_moves;
+        pop takes it back.
+        """
+        self.__hash ^= self.__state_key()
+        start, end = _square(start), _square(end)
+        piece = self.__squares[start]
+        flags = MOVE_QUIET
+        captured_square = end
+        if piece.piece == Piece.PAWN:
+            if abs(end - start) == 16:
+                flags = MOVE_DOUBLE_PAWN_PUSH
+            elif (start ^ end) & 7 and self.__squares[end] is None:
+                flags = MOVE_ENPASSANT
+                captured_square = start & ~7 | end & 7
+            elif end >> 3 in (0, 7):
+                flags = MOVE_PROMOTION
+                if promotion in PROMOTION_PIECES:
+                    flags |= _PROMOTION_CODES.index(promotion)
                 else:
-                    self.__board[7][7] = None
-                    self.__board[7][5] = BLACK_ROOK
-        elif last_move.promotion:
+                    flags = MOVE_PENDING_PROMOTION
+        elif piece.piece == Piece.KING and abs(end - start) == 2:
+            flags = MOVE_QUEEN_CASTLE if end & 7 == 2 else MOVE_KING_CASTLE
+        captured = self.__squares[captured_square]
+        if captured is not None:
+            flags |= MOVE_CAPTURE
+            if flags == MOVE_PENDING_PROMOTION:
+                flags = MOVE_PENDING_PROMOTION_CAPTURE
+        self.__captured.append(captured)
+        self.__ledger.push(start | end << 6 | flags << 12, piece)
+
+        self.__remove(start)
+        self.__remove(captured_square)
+        self.__put(end, piece)
+        changed = 1 << start | 1 << end | 1 << captured_square
+        if flags == MOVE_QUEEN_CASTLE:
+            self.__put(end + 1, self.__remove(end - 2))
+            changed |= 1 << end + 1 | 1 << end - 2
+        elif flags == MOVE_KING_CASTLE:
+            self.__put(end - 1, self.__remove(end + 1))
+            changed |= 1 << end - 1 | 1 << end + 1
+        elif flags & MOVE_PROMOTION:
+            self.__put(end, PIECES[(promotion, piece.color)])
+        elif flags in (MOVE_PENDING_PROMOTION, MOVE_PENDING_PROMOTION_CAPTURE):
             self.__hold_for_promotion = True
+        self.__refresh_attacks(changed)
 
         self.__turn = Color.LIGHT if self.__turn != Color.LIGHT else Color.DARK
+        self.__hash ^= self.__state_key() ^ _ZOBRIST_TURN
+
+        self.__halfmove_history.append(self.__halfmoves)
+        if piece.piece == Piece.PAWN or captured is not None:
+            self.__halfmoves = 0
+        else:
+            self.__halfmoves += 1
+        self.__seen[self.__hash] = self.__seen.get(self.__hash, 0) + 1
+
+    def pop(self) -> _Move:
+        """Take back the last move, restoring the exact position before it."""
+        self.__forget()
+        self.__halfmoves = self.__halfmove_history.pop()
+        self.__hash ^= self.__state_key() ^ _ZOBRIST_TURN
+        move = self.__ledger.move_code(-1)
+        piece = self.__ledger.moved_piece(-1)
+        last_move = self.__ledger.pop()
+        captured = self.__captured.pop()
+        start, end, flags = move & 63, move >> 6 & 63, move >> 12
+
+        self.__remove(end)
+        self.__put(start, piece)
+        changed = 1 << start | 1 << end
+        if captured is not None:
+            if flags == MOVE_ENPASSANT:
+                end = start & ~7 | end & 7
+            self.__put(end, captured)
+            changed |= 1 << end
+        elif flags == MOVE_QUEEN_CASTLE:
+            self.__put(end - 2, self.__remove(end + 1))
+            changed |= 1 << end + 1 | 1 << end - 2
+        elif flags == MOVE_KING_CASTLE:
+            self.__put(end + 1, self.__remove(end - 1))
+            changed |= 1 << end - 1 | 1 << end + 1
+        self.__refresh_attacks(changed)
+
+        self.__hold_for_promotion = False
+        self.__turn = piece.color
+        self.__hash ^= self.__state_key()
+        return last_move
+
+    def undo(self) -> bool:
+        """Take back the last move, if there is one."""
+        if len(self.__ledger) == 0:
+            return False
+        self.pop()
+        return True
+
+    def promote(self, piece: Piece) -> bool:
+        """Replace the pawn that just reached the last rank with piece."""
+        if not self.__hold_for_promotion or piece not in PROMOTION_PIECES:
+            return False
+        end = self.__ledger.move_code(-1) >> 6 & 63
+        self.__forget()
+        self.__put(end, PIECES[(piece, self.__ledger.moved_piece(-1).color)])
+        self.__refresh_attacks(1 << end)
+        self.__ledger.promote(piece)
+        self.__hold_for_promotion = False
+        self.__seen[self.__hash] = self.__seen.get(self.__hash, 0) + 1
         return True
 
-    def get_piece(self, square: str) -> Optional[Piece]:
-        file, rank = to_indices(square)
-        return self.__board[file][rank]
+    def is_check(self) -> bool:
+        """Whether the king of the side to move is attacked."""
+        color = 0 if self.__turn == Color.LIGHT else 1
+        return bool(self.__bitboards[color][5] & self.__attacks[1 - color])
+
+    def is_checkmate(self) -> bool:
+        return self.is_check() and not legal_moves(self)
+
+    def is_stalemate(self) -> bool:
+        return not self.is_check() and not legal_moves(self)
+
+    def is_insufficient_material(self) -> bool:
+        """Whether neither side has the material left to mate: no pawns, rooks
+        or queens, and at most one minor piece or only bishops on one color.
+        """
+        light, dark = self.__bitboards
+        if light[0] | light[3] | light[4] | dark[0] | dark[3] | dark[4]:
+            return False
+        knights, bishops = light[1] | dark[1], light[2] | dark[2]
+        minors = knights | bishops
+        if not minors & minors - 1:
+            return True
+        return not knights and (
+            not bishops & BB_LIGHT_SQUARES or not bishops & BB_DARK_SQUARES
+        )
+
+    def is_fifty_moves(self) -> bool:
+        return self.__halfmoves >= 100
+
+    def is_threefold_repetition(self) -> bool:
+        return self.__seen.get(self.__hash, 0) >= 3
+
+    def outcome(self) -> Optional[Outcome]:
+        """How the game has ended, or None if it goes on. Mate and stalemate come
+        first; a draw by the fifty-move rule or threefold repetition is taken as
+        soon as it could be claimed.
+        """
+        if not legal_moves(self):
+            if self.is_check():
+                winner = Color.LIGHT if self.__turn == Color.DARK else Color.DARK
+                return Outcome(Termination.CHECKMATE, winner)
+            return Outcome(Termination.STALEMATE, None)
+        if self.is_insufficient_material():
+            return Outcome(Termination.INSUFFICIENT_MATERIAL, None)
+        if self.is_fifty_moves():
+            return Outcome(Termination.FIFTY_MOVES, None)
+        if self.is_threefold_repetition():
+            return Outcome(Termination.THREEFOLD_REPETITION, None)
+        return None
+
+    def result(self) -> str:
+        """The game result as pgn writes it: 1-0, 0-1, 1/2-1/2, or * if the
+        game goes on.
+        """
+        outcome = self.outcome()
+        if outcome is None:
+            return "*"
+        if outcome.winner is None:
+            return "1/2-1/2"
+        return "1-0" if outcome.winner == Color.LIGHT else "0-1"
+
+    def get_piece(self, square: str) -> Optional[ChessPiece]:
+        return self.__squares[_square(to_indices(square))]
@@ -0,0 +1,156 @@
+"""Search positions in a separate process, so a caller with an event loop to
+keep running, like the gui, never waits on the engine.
+
+    with EngineWorker() as engine:
+        engine.start(board, time_limit=2.0)
+        ...
+        for update in engine.poll():
+            print(update.result.depth, update.result.score, update.final)
+
+The worker streams the result of every finished iteration and then the final
+one. Starting a new search, or cancelling, stops the one running; updates of a
+search that was stopped are never returned by poll.
+"""
+from collections import namedtuple
+from queue import Empty
+from typing import List, Optional, Tuple
+
+import multiprocessing
+
+from chessberry.chess import Board, decode_move
+from chessberry.search import Move, SearchResult, search
+from chessberry.tablebase import Tablebase
+
+#  The search a result belongs to, the result, and whether it is the last one
+EngineUpdate = namedtuple("EngineUpdate", ["job", "result", "final"])
+
+#  Spawned, not forked: the parent may hold a window and its graphics context
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _history(board: Board) -> Tuple[str, List[Move]]:
+    """The position board started from and the moves played since, which the
+    worker replays to get the same board, ledger and all. A last move still
+    waiting for its promotion piece is replayed as waiting again.
+    """
+    moves = []
+    for i in range(len(board.ledger)):
+        start, end, _, promotion = decode_move(board.ledger.move_code(i))
+        moves.append((divmod(start, 8), divmod(end, 8), promotion))
+    for _ in moves:
+        board.pop()
+    fen = board.fen()
+    for move in moves:
+        board.push(*move)
+    return fen, moves
+
+
+def _serve(requests, updates, current, tablebase_directory: Optional[str]) -> None:
+    """The worker: search each request until told to stop by a None."""
+    tablebase = Tablebase(tablebase_directory) if tablebase_directory else None
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        job, fen, moves, depth, time_limit = request
+        if current.value != job:
+            #  Cancelled or replaced before it began
+            continue
+        board = Board.from_fen(fen)
+        for move in moves:
+            board.push(*move)
+
+        def __progress(result: SearchResult) -> None:
+            updates.put(EngineUpdate(job, result, False))
+
+        result = search(
+            board,
+            depth,
+            time_limit=time_limit,
+            tablebase=tablebase,
+            progress=__progress,
+            stopped=lambda: current.value != job,
+        )
+        updates.put(EngineUpdate(job, result, True))
+    if tablebase is not None:
+        tablebase.close()
+
+
+class EngineWorker:
+    """A search process, running one search at a time. Use as a context
+    manager, or close it when done.
+    """
+
+    def __init__(self, tablebase_directory: Optional[str] = None):
+        self.__requests = _CONTEXT.Queue()
+        self.__updates = _CONTEXT.Queue()
+        #  The search the worker should be running; any other one stops
+        self.__current = _CONTEXT.RawValue("q", 0)
+        self.__job = 0
+        self.__thinking = False
+        self.__process = _CONTEXT.Process(
+            target=_serve,
+            args=(self.__requests, self.__updates, self.__current, tablebase_directory),
+            daemon=True,
+        )
+        self.__process.start()
+
+    def __enter__(self) -> "EngineWorker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def thinking(self) -> bool:
+        """Whether a search was started that has not finished or been cancelled."""
+        return self.__thinking
+
+    def start(
+        self, board: Board, time_limit: Optional[float] = None, depth: int = 64
+    ) -> int:
+        """Search board, stopping any search running, and return the job its
+        updates will carry. The board is left as it was given; raises
+        ValueError if it is waiting for a promotion piece.
+        """
+        if board.hold_for_promotion:
+            raise ValueError("the board is waiting for a promotion piece")
+        self.cancel()
+        fen, moves = _history(board)
+        self.__requests.put((self.__job, fen, moves, depth, time_limit))
+        self.__thinking = True
+        return self.__job
+
+    def cancel(self) -> None:
+        """Stop the search running, if any; its updates are dropped."""
+        self.__job += 1
+        self.__current.value = self.__job
+        self.__thinking = False
+
+    def poll(self) -> List[EngineUpdate]:
+        """The updates of the current search that came since the last poll,
+        without waiting for any.
+        """
+        found = []
+        while True:
+            try:
+                update = self.__updates.get_nowait()
+            except Empty:
+                break
+            if update.job != self.__job or not self.__thinking:
+                continue
+            found.append(update)
+            if update.final:
+                self.__thinking = False
+        return found
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Stop the search running and the worker."""
+        if not self.__process.is_alive():
+            return
+        self.cancel()
+        self.__requests.put(None)
+        self.__process.join(timeout)
+        if self.__process.is_alive():
+            self.__process.terminate()
+            self.__process.join()
@@ -0,0 +1,53 @@
+"""Load positions from files of fen or epd lines, one line at a time.
+
+Lines may carry the fen move counters, epd operations such as
+``bm Nf3; id "test 1";`` or both; blank lines and lines starting with # are
+skipped.
+"""
+from typing import Dict, Iterator, Tuple
+
+import re
+
+from chessberry.chess import Board, PositionRecord, parse_fen
+
+_OPERATION = re.compile(r'(\w+)((?:\s+(?:"[^"]*"|[^\s;"]+))*)\s*(?:;|$)')
+
+
+def parse_operations(text: str) -> Dict[str, str]:
+    """Read epd operations, opcode to operand, with quotes taken off."""
+    return {
+        opcode: operand.strip().strip('"')
+        for opcode, operand in _OPERATION.findall(text)
+    }
+
+
+def _operations(line: str) -> Dict[str, str]:
+    fields = line.split(None, 6)
+    rest = fields[4:]
+    if len(rest) >= 2 and rest[0].isdigit() and rest[1].isdigit():
+        rest = rest[2:]
+    return parse_operations(" ".join(rest))
+
+
+def iter_fen_records(
+    file_path: str,
+) -> Iterator[Tuple[PositionRecord, Dict[str, str]]]:
+    """Yield (record, operations) for every position of a file in order, as
+    compact records rather than boards; raises ValueError, naming the line, on a
+    malformed position.
+    """
+    with open(file_path, encoding="utf-8", buffering=1 << 20) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip() or line.startswith("#"):
+                continue
+            try:
+                record = parse_fen(line)
+            except ValueError as e:
+                raise ValueError("line " + str(number) + ": " + str(e))
+            yield record, _operations(line) if ";" in line else {}
+
+
+def iter_fen_boards(file_path: str) -> Iterator[Tuple[Board, Dict[str, str]]]:
+    """Yield (board, operations) for every position of a file in order."""
+    for record, operations in iter_fen_records(file_path):
+        yield Board.from_record(record), operations
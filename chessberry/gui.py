@@ -1,6 +1,9 @@
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from math import floor
 from chessberry import chess
+from chessberry.engine import EngineWorker
+from chessberry.search import MATE_SCORE, SearchResult
 
 import pyglet
 
@@ -13,6 +16,13 @@ LEDGER_WIDTH = 200
 LEDGER_BORDER_WIDTH = 10
 LEDGER_COLOR = LIGHT_SQUARE_COLOR[0:3]
 LEDGER_BORDER_COLOR = DARK_SQUARE_COLOR[0:3]
+SELECTION_COLOR = (90, 150, 90)
+SELECTION_OPACITY = 128
+ENGINE_COLOR = chess.Color.DARK
+ENGINE_TIME = 3.0
+#  Seconds between looks for engine updates, only while it thinks
+ENGINE_POLL = 1 / 20
+ENGINE_TEXT_COLOR = (0, 0, 0, 255)
 
 
 def _nearest_to_n_divides_by_m(n: int, m: int):
@@ -23,6 +33,12 @@ def _nearest_to_n_divides_by_m(n: int, m: int):
     return n1 if abs(n - n1) < abs(n - n2) else n2
 
 
+@lru_cache(maxsize=None)
+def _texture(image: str) -> pyglet.image.AbstractImage:
+    """Decode a piece image once; every sprite of that piece shares it."""
+    return pyglet.image.load(image)
+
+
 class _SpritePiece(pyglet.sprite.Sprite):
     def __init__(
         self,
@@ -34,7 +50,16 @@ class _SpritePiece(pyglet.sprite.Sprite):
         self.piece = piece
         self.file = file
         self.rank = rank
-        super().__init__(pyglet.image.load(piece.image), batch=batch)
+        super().__init__(_texture(piece.image), batch=batch)
+
+    def show(self, piece: chess.ChessPiece, file: int, rank: int) -> None:
+        """Show piece on a square, re-texturing only if the piece changed."""
+        if piece != self.piece:
+            self.piece = piece
+            self.image = _texture(piece.image)
+        self.file = file
+        self.rank = rank
+        self.visible = True
 
 
 class BoardWindow(pyglet.window.Window):
@@ -51,14 +76,15 @@ class BoardWindow(pyglet.window.Window):
         ledger_border_color: Tuple[int, int, int],
         board: chess.Board,
         last_click: Tuple[int, int] = None,
+        engine: Optional[EngineWorker] = None,
+        engine_color: Optional[chess.Color] = None,
+        engine_time: float = ENGINE_TIME,
     ):
         assert ledger_width < width, "Width of ledger must be less than total width."
         super().__init__(width, height)
 
         self.board_length = _nearest_to_n_divides_by_m(board_length, 8)
-        self.board_image = pyglet.image.CheckerImagePattern(
-            light_square_color, dark_square_color
-        ).create_image(self.board_length // 4, self.board_length // 4)
+        self.square_length = self.board_length // 8
         self.light_square_color = light_square_color
         self.dark_square_color = dark_square_color
 
@@ -66,6 +92,24 @@ class BoardWindow(pyglet.window.Window):
         self.y_sep = (height - self.board_length) // 2
         self.batch = pyglet.graphics.Batch()
 
+        #  The squares and ledger frame never change, so they are built once
+        #  into their own batch and drawn in a single call
+        self.board_batch = pyglet.graphics.Batch()
+        self.squares = [
+            pyglet.shapes.Rectangle(
+                self.x_sep + file * self.square_length,
+                self.y_sep + rank * self.square_length,
+                self.square_length,
+                self.square_length,
+                color=(
+                    dark_square_color if (rank + file) % 2 == 0 else light_square_color
+                )[0:3],
+                batch=self.board_batch,
+            )
+            for rank in range(8)
+            for file in range(8)
+        ]
+
         self.ledger_width = ledger_width
         self.ledger_image = pyglet.shapes.BorderedRectangle(
             2 * self.x_sep + self.board_length,
@@ -75,40 +119,142 @@ class BoardWindow(pyglet.window.Window):
             border=ledger_border_width,
             border_color=ledger_border_color,
             color=ledger_color,
-            batch=self.batch,
+            batch=self.board_batch,
             )
 
         self.board = board
         self.last_click = last_click
+        self.selection = pyglet.shapes.Rectangle(
+            0, 0, self.square_length, self.square_length, color=SELECTION_COLOR
+        )
+        self.selection.opacity = SELECTION_OPACITY
+        self._select(last_click)
+
+        #  The engine plays engine_color, thinking in its own process while the
+        #  window polls it for updates
+        self.engine = engine
+        self.engine_color = engine_color
+        self.engine_time = engine_time
+        self.engine_text = pyglet.text.Label(
+            "",
+            x=2 * self.x_sep + self.board_length + 2 * ledger_border_width,
+            y=self.y_sep + self.board_length - 2 * ledger_border_width,
+            width=self.ledger_width - 4 * ledger_border_width,
+            anchor_y="top",
+            multiline=True,
+            color=ENGINE_TEXT_COLOR,
+            batch=self.batch,
+        )
 
-        self._refresh_pieces()
-
-    def move(self, start: str, end: str):
-        self.board.move(start, end)
-        self._refresh_pieces()
-
-    def _refresh_pieces(self):
-        self.pieces: List[_SpritePiece] = []
-        for i, row in enumerate(self.board):
-            for j, p in enumerate(row):
-                if p is not None:
-                    self.pieces.append(_SpritePiece(p, j, i, self.batch))
-
-        sprite_size = self.board_image.width // 2
-        for p in self.pieces:
-            p.scale = sprite_size / p.height
-            p.position = (
-                self.x_sep + p.file * self.board_length // 8,
-                self.y_sep + p.rank * self.board_length // 8,
+        #  One sprite per occupied square, and hidden ones to reuse
+        self.pieces: Dict[int, _SpritePiece] = {}
+        self.spare_pieces: List[_SpritePiece] = []
+        self.board.take_changes()
+        self._refresh_pieces(range(64))
+        self._think()
+
+    def move(self, start: str, end: str, promotion: Optional[chess.Piece] = None):
+        if self.board.move(start, end, promotion):
+            self._refresh_pieces(self.board.take_changes())
+            self.invalid = True
+            self._think()
+
+    def _think(self):
+        """Start the engine on its turn, and stop it thinking on the other."""
+        if self.engine is None:
+            return
+        pyglet.clock.unschedule(self._poll_engine)
+        if self.board.turn != self.engine_color or self.board.hold_for_promotion:
+            self.engine.cancel()
+            return
+        self.engine.start(self.board, self.engine_time)
+        #  Sending the game replays it on the board, which leaves it as it was
+        self.board.take_changes()
+        pyglet.clock.schedule_interval(self._poll_engine, ENGINE_POLL)
+
+    def _poll_engine(self, dt: float):
+        """Show what the engine found so far, and play its move once done."""
+        for update in self.engine.poll():
+            self._show_engine(update.result)
+            if update.final:
+                pyglet.clock.unschedule(self._poll_engine)
+                if update.result.move is not None:
+                    start, end, promotion = update.result.move
+                    self.move(
+                        chess.from_indices(start), chess.from_indices(end), promotion
+                    )
+
+    def _show_engine(self, result: SearchResult):
+        if abs(result.score) >= MATE_SCORE - 1000:
+            plies = MATE_SCORE - abs(result.score)
+            score = "#" + ("-" if result.score < 0 else "") + str((plies + 1) // 2)
+        else:
+            score = "{:+.2f}".format(result.score / 100)
+        self.engine_text.text = "depth {}  {}\n{}".format(
+            result.depth,
+            score,
+            " ".join(
+                chess.from_indices(start) + chess.from_indices(end)
+                for start, end, _ in result.pv
+            ),
+        )
+        self.invalid = True
+
+    def _select(self, selected: Tuple[int, int]):
+        """Remember the square clicked last, and highlight it if on the board."""
+        self.last_click = selected
+        self.selection.visible = selected in chess.INDICES
+        if self.selection.visible:
+            rank, file = selected
+            self.selection.position = (
+                self.x_sep + file * self.square_length,
+                self.y_sep + rank * self.square_length,
             )
+        self.invalid = True
+
+    def _refresh_pieces(self, squares: Iterable[int]):
+        """Bring the sprites of squares in line with the board: move, hide or
+        re-texture only those, taking sprites from the spares when needed.
+        """
+        sprite_size = self.square_length
+        for square in squares:
+            piece = self.board.piece_at(square)
+            sprite = self.pieces.pop(square, None)
+            if piece is None:
+                if sprite is not None:
+                    sprite.visible = False
+                    self.spare_pieces.append(sprite)
+                continue
+            rank, file = divmod(square, 8)
+            if sprite is None and self.spare_pieces:
+                sprite = self.spare_pieces.pop()
+            if sprite is None:
+                sprite = _SpritePiece(piece, file, rank, self.batch)
+            sprite.show(piece, file, rank)
+            sprite.update(
+                x=self.x_sep + file * self.square_length,
+                y=self.y_sep + rank * self.square_length,
+                scale=sprite_size / sprite.image.height,
+            )
+            self.pieces[square] = sprite
 
     def on_draw(self):
-        window.clear()
-        for x in range(4):
-            for y in range(4):
-                self.board_image.blit(self.x_sep + self.board_length // 4 * x,
-                                      self.y_sep + self.board_length // 4 * y)
+        """Draw the static board, the selection and the pieces. The event loop
+        only calls this while the window is invalid, which a move, a new
+        selection or a resize makes it; otherwise the last frame stays up.
+        """
+        self.clear()
+        self.board_batch.draw()
+        self.selection.draw()
         self.batch.draw()
+        self.invalid = False
+
+    def on_resize(self, width, height):
+        super().on_resize(width, height)
+        self.invalid = True
+
+    def on_expose(self):
+        self.invalid = True
 
     def on_mouse_press(self, x, y, dx, dy):
         selected = floor(8 * (y - self.y_sep) / self.board_length), floor(
@@ -116,9 +262,10 @@ class BoardWindow(pyglet.window.Window):
         )
         if selected in chess.INDICES and self.last_click in chess.INDICES:
             self.move(
-                chess.from_indices(window.last_click), chess.from_indices(selected)
+                chess.from_indices(self.last_click), chess.from_indices(selected)
             )
-        window.last_click = selected
+        if selected != self.last_click:
+            self._select(selected)
 
 
 if __name__ == "__main__":
@@ -134,6 +281,10 @@ if __name__ == "__main__":
         LEDGER_COLOR[0:3],
         LEDGER_BORDER_COLOR[0:3],
         chess.Board(),
+        engine=EngineWorker(),
+        engine_color=ENGINE_COLOR,
     )
-
-pyglet.app.run()
+    try:
+        pyglet.app.run()
+    finally:
+        window.engine.close()
@@ -0,0 +1,138 @@
+"""Replay whole pgn archives across a pool of processes.
+
+    python -m chessberry.ingest games.pgn more.pgn --workers 8 --chunk-size 64
+"""
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Iterable, Iterator, List, Optional
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from chessberry.pgn import parse_pgn_game, split_pgn_games
+
+#  What replaying one game left behind: its place in the input, the final
+#  position (None if a move could not be read), the plies played, the error and
+#  how the final position ends the game (None if it does not, or on an error).
+GameRecord = namedtuple(
+    "GameRecord", ["index", "headers", "fen", "plies", "error", "outcome"]
+)
+
+
+def replay_game(index: int, text: str) -> GameRecord:
+    """Parse and replay the text of one game."""
+    game = parse_pgn_game(text)
+    plies = 0
+    try:
+        board = game.start()
+        for board in game.replay():
+            plies += 1
+    except ValueError as e:
+        return GameRecord(index, game.headers, None, plies, str(e), None)
+    return GameRecord(index, game.headers, board.fen(), plies, None, board.outcome())
+
+
+def _replay_chunk(first: int, texts: List[str]) -> List[GameRecord]:
+    return [replay_game(first + i, text) for i, text in enumerate(texts)]
+
+
+def ingest_games(
+    texts: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> Iterator[GameRecord]:
+    """Replay games in worker processes, yielding their records in input order.
+
+    Games are sent to the workers chunk_size at a time, and only a few chunks
+    per worker are ever in flight, so archives of any size stream through in
+    bounded memory. workers defaults to the number of cpus; with 1 worker the
+    games are replayed in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    texts = iter(texts)
+    chunks = (
+        (first, chunk)
+        for first, chunk in zip(
+            itertools.count(0, chunk_size),
+            iter(lambda: list(itertools.islice(texts, chunk_size)), []),
+        )
+    )
+    if workers == 1:
+        for first, chunk in chunks:
+            yield from _replay_chunk(first, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque = deque()
+        #  Keep every worker busy while the oldest chunk is being waited on
+        window = 2 * workers
+        for first, chunk in chunks:
+            in_flight.append(executor.submit(_replay_chunk, first, chunk))
+            if len(in_flight) >= window:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def ingest_pgn_files(
+    file_paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> Iterator[GameRecord]:
+    """Replay every game of the pgn files, in order, as ingest_games does."""
+    texts = itertools.chain.from_iterable(
+        split_pgn_games(file_path) for file_path in file_paths
+    )
+    return ingest_games(texts, workers, chunk_size)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m chessberry.ingest",
+        description="Replay every game of pgn files and print its final position.",
+    )
+    parser.add_argument("files", nargs="+")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: cpus)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=64, help="games sent to a worker at once"
+    )
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    games = errors = 0
+    for record in ingest_pgn_files(args.files, args.workers, args.chunk_size):
+        games += 1
+        if record.error is not None:
+            errors += 1
+        print(
+            str(record.index)
+            + "\t"
+            + str(record.plies)
+            + "\t"
+            + (record.fen if record.error is None else "error: " + record.error)
+            + (
+                "\t" + record.outcome.termination.value
+                if record.outcome is not None
+                else ""
+            )
+        )
+    elapsed = time.perf_counter() - began
+
+    print("games: " + str(games), file=sys.stderr)
+    print("errors: " + str(errors), file=sys.stderr)
+    print("time: {:.3f}s".format(elapsed), file=sys.stderr)
+    print(
+        "games/s: {:.0f}".format(games / elapsed if elapsed > 0 else 0),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Opening statistics: what was played from a position and how it scored,
+from an index built once over a pgn corpus.
+
+    python -m chessberry.openings build games.pgn more.pgn --out openings.bin
+    python -m chessberry.openings probe openings.bin --moves e2e4 e7e5
+
+The index is a header followed by fixed size records sorted by position key
+then move, so it is read in place through mmap with a binary search and never
+loaded whole.
+"""
+from collections import namedtuple
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from chessberry.chess import Board, Piece, decode_move
+from chessberry.pgn import iter_pgn_games
+
+#  A move played from a position: how many games played it, and of those with
+#  a result how many white won, were drawn and black won.
+OpeningMove = namedtuple("OpeningMove", ["move", "games", "white", "draws", "black"])
+
+_MAGIC = b"CBOPEN1\n"
+#  Zobrist key, encode_move code, games, white wins, draws, black wins
+_RECORD = struct.Struct("<QHIIII")
+_KEY = struct.Struct("<Q")
+_RESULTS = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+_READ_SIZE = 1 << 16
+_PROMOTIONS = {
+    "q": Piece.QUEEN,
+    "r": Piece.ROOK,
+    "b": Piece.BISHOP,
+    "n": Piece.KNIGHT,
+}
+
+
+def _write_records(
+    stream: BinaryIO, records: Iterable[Tuple[int, int, List[int]]]
+) -> int:
+    count = 0
+    for key, move, counts in records:
+        stream.write(_RECORD.pack(key, move, *counts))
+        count += 1
+    return count
+
+
+def _read_records(stream: BinaryIO) -> Iterator[Tuple[int, int, List[int]]]:
+    size = _RECORD.size
+    while True:
+        block = stream.read(size * _READ_SIZE)
+        if not block:
+            return
+        for key, move, *counts in _RECORD.iter_unpack(block):
+            yield key, move, counts
+
+
+def _merge(
+    runs: Iterable[Iterator[Tuple[int, int, List[int]]]]
+) -> Iterator[Tuple[int, int, List[int]]]:
+    """Merge sorted runs into one, summing the counts of equal entries."""
+    last = None
+    for key, move, counts in heapq.merge(*runs, key=lambda record: record[:2]):
+        if last is not None and last[:2] == (key, move):
+            last[2][:] = [a + b for a, b in zip(last[2], counts)]
+            continue
+        if last is not None:
+            yield last
+        last = (key, move, list(counts))
+    if last is not None:
+        yield last
+
+
+def _game_positions(
+    file_paths: Iterable[str], max_plies: int
+) -> Iterator[Tuple[int, int, Optional[int]]]:
+    """Yield (position key, move code, result index) for the first max_plies
+    moves of every game. Games from a set up position are skipped, and a game
+    stops at its first move that is not legal.
+    """
+    for file_path in file_paths:
+        for game in iter_pgn_games(file_path):
+            #  Kept out on purpose: a set up position is no opening, and its
+            #  moves would only crowd the statistics of real ones
+            if "FEN" in game.headers:
+                continue
+            result = _RESULTS.get(game.result)
+            board = Board()
+            for san in game.moves[:max_plies]:
+                key = board.hash
+                try:
+                    board.push(*board.parse_san(san))
+                except ValueError:
+                    break
+                yield key, board.ledger.move_code(len(board.ledger) - 1), result
+
+
+def build_opening_index(
+    file_paths: Iterable[str],
+    index_path: str,
+    max_plies: int = 30,
+    run_size: int = 1 << 20,
+) -> int:
+    """Replay the games of the pgn files and write the opening index of their
+    first max_plies moves to index_path, returning the number of records.
+
+    At most run_size (position, move) entries are counted in memory; each time
+    that fills up they are sorted into a temporary run file beside index_path,
+    and the runs are merged into the index at the end.
+    """
+    if run_size < 1:
+        raise ValueError("run_size must be at least 1")
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs: List[BinaryIO] = []
+    counts: Dict[Tuple[int, int], List[int]] = {}
+
+    def __flush() -> None:
+        run = tempfile.TemporaryFile(dir=directory)
+        _write_records(
+            run, ((key, move, counts[key, move]) for key, move in sorted(counts))
+        )
+        run.seek(0)
+        runs.append(run)
+        counts.clear()
+
+    try:
+        for key, move, result in _game_positions(file_paths, max_plies):
+            entry = counts.get((key, move))
+            if entry is None:
+                if len(counts) >= run_size:
+                    __flush()
+                entry = counts[key, move] = [0, 0, 0, 0]
+            entry[0] += 1
+            if result is not None:
+                entry[1 + result] += 1
+        memory = ((key, move, counts[key, move]) for key, move in sorted(counts))
+        with open(index_path, "wb", buffering=1 << 20) as f:
+            f.write(_MAGIC)
+            return _write_records(
+                f, _merge([memory] + [_read_records(run) for run in runs])
+            )
+    finally:
+        for run in runs:
+            run.close()
+
+
+class OpeningIndex:
+    """An opening index file, mapped into memory. Use as a context manager, or
+    close it when done.
+    """
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.__map[: len(_MAGIC)] != _MAGIC:
+            self.__map.close()
+            raise ValueError(index_path + " is not an opening index")
+        self.__count = (len(self.__map) - len(_MAGIC)) // _RECORD.size
+
+    def __len__(self):
+        return self.__count
+
+    def __enter__(self) -> "OpeningIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__map.close()
+
+    def __key_at(self, i: int) -> int:
+        return _KEY.unpack_from(self.__map, len(_MAGIC) + i * _RECORD.size)[0]
+
+    def lookup(self, position: Union[Board, int]) -> List[OpeningMove]:
+        """Get the moves played from a board, or from a position key as
+        Board.hash gives it, most played first.
+        """
+        key = position.hash if isinstance(position, Board) else position
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for i in range(low, self.__count):
+            found, code, games, white, draws, black = _RECORD.unpack_from(
+                self.__map, len(_MAGIC) + i * _RECORD.size
+            )
+            if found != key:
+                break
+            start, end, _, promotion = decode_move(code)
+            move = (divmod(start, 8), divmod(end, 8), promotion)
+            moves.append(OpeningMove(move, games, white, draws, black))
+        moves.sort(key=lambda entry: entry.games, reverse=True)
+        return moves
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m chessberry.openings",
+        description="Build an opening index from pgn files, or look a position up.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index the games of pgn files")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--out", required=True, help="the index file to write")
+    build.add_argument(
+        "--plies", type=int, default=30, help="moves indexed per game"
+    )
+    build.add_argument(
+        "--run-size", type=int, default=1 << 20, help="entries held in memory"
+    )
+    probe = commands.add_parser("probe", help="print the moves played in a position")
+    probe.add_argument("index")
+    probe.add_argument("--fen", help="the position (default: the initial one)")
+    probe.add_argument(
+        "--moves", nargs="*", default=[], help="uci moves played from the position"
+    )
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    if args.command == "build":
+        records = build_opening_index(args.files, args.out, args.plies, args.run_size)
+        print("records: " + str(records))
+    else:
+        try:
+            board = Board.from_fen(args.fen) if args.fen else Board()
+        except ValueError as e:
+            parser.error(str(e))
+        for uci in args.moves:
+            if not board.move(uci[0:2], uci[2:4], _PROMOTIONS.get(uci[4:])):
+                parser.error("illegal move " + uci)
+        with OpeningIndex(args.index) as index:
+            for entry in index.lookup(board):
+                print(
+                    "{}: {} games, +{} ={} -{}".format(
+                        board.san(*entry.move),
+                        entry.games,
+                        entry.white,
+                        entry.draws,
+                        entry.black,
+                    )
+                )
+    print("time: {:.3f}s".format(time.perf_counter() - began))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Perft: count the leaf nodes of the legal move tree to a fixed depth.
+
+    python -m chessberry.perft 4
+    python -m chessberry.perft 3 --moves e2e4 e7e5 --divide
+    python -m chessberry.perft 3 --fen "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import argparse
+import time
+
+from chessberry.chess import (
+    Board,
+    Piece,
+    PROMOTION_PIECES,
+    from_indices,
+    legal_moves,
+)
+
+_PROMOTION_SUFFIX = {
+    Piece.QUEEN: "q",
+    Piece.ROOK: "r",
+    Piece.BISHOP: "b",
+    Piece.KNIGHT: "n",
+}
+
+
+def _legal_moves(
+    board: Board,
+) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int], Optional[Piece]]]:
+    """Yield every legal (start, end, promotion) for the side to move."""
+    for start, end in legal_moves(board):
+        piece = board[start[0]][start[1]]
+        if piece.piece == Piece.PAWN and end[0] in (0, 7):
+            for promotion in PROMOTION_PIECES:
+                yield start, end, promotion
+        else:
+            yield start, end, None
+
+
+def perft(board: Board, depth: int) -> int:
+    """Count the leaf nodes depth plies below board."""
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in _legal_moves(board))
+    nodes = 0
+    for start, end, promotion in _legal_moves(board):
+        board.push(start, end, promotion)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def divide(board: Board, depth: int) -> Dict[str, int]:
+    """Count the leaf nodes below each legal move, keyed in uci notation."""
+    counts = {}
+    for start, end, promotion in _legal_moves(board):
+        uci = from_indices(start) + from_indices(end)
+        uci += _PROMOTION_SUFFIX[promotion] if promotion else ""
+        board.push(start, end, promotion)
+        counts[uci] = perft(board, depth - 1)
+        board.pop()
+    return counts
+
+
+def _parse_uci(uci: str) -> Tuple[str, str, Optional[Piece]]:
+    promotion = None
+    for piece, suffix in _PROMOTION_SUFFIX.items():
+        if uci[4:] == suffix:
+            promotion = piece
+    return uci[0:2], uci[2:4], promotion
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m chessberry.perft",
+        description="Count move generator leaf nodes and report nodes/second.",
+    )
+    parser.add_argument("depth", type=int)
+    parser.add_argument(
+        "--fen", help="the position to start from (default: the initial one)"
+    )
+    parser.add_argument(
+        "--moves",
+        nargs="*",
+        default=[],
+        help="uci moves played from the start position before counting",
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="print the count below each move"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        board = Board.from_fen(args.fen) if args.fen else Board()
+    except ValueError as e:
+        parser.error(str(e))
+    for uci in args.moves:
+        start, end, promotion = _parse_uci(uci)
+        if not board.move(start, end, promotion):
+            parser.error("illegal move " + uci)
+
+    began = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth)
+        for uci in sorted(counts):
+            print(uci + ": " + str(counts[uci]))
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board, args.depth)
+    elapsed = time.perf_counter() - began
+
+    print("nodes: " + str(nodes))
+    print("time: {:.3f}s".format(elapsed))
+    print("nps: {:.0f}".format(nodes / elapsed if elapsed > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Read and write games in pgn format, one at a time, to and from files of
+any size.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import re
+
+from chessberry.chess import Board
+
+_HEADER = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_TOKEN = re.compile(
+    r"""
+    (?P<comment>\{[^}]*\}?|;[^\n]*)
+    | (?P<open>\()
+    | (?P<close>\))
+    | (?P<nag>\$\d+)
+    | (?P<result>1-0|0-1|1/2-1/2|\*)
+    | (?P<number>\d+\.+)
+    | (?P<move>[^\s{}();$]+)
+    """,
+    re.VERBOSE,
+)
+
+
+class PgnGame:
+    """A game read from pgn: its headers, its main line as san moves and its
+    result. The moves are replayed on a Board only when asked for.
+    """
+
+    def __init__(self, headers: Dict[str, str], moves: List[str], result: str):
+        self.__headers = headers
+        self.__moves = moves
+        self.__result = result
+
+    def __repr__(self):
+        return (
+            self.__headers.get("White", "?")
+            + " - "
+            + self.__headers.get("Black", "?")
+            + " "
+            + self.__result
+        )
+
+    def __len__(self):
+        return len(self.__moves)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self.__headers
+
+    @property
+    def moves(self) -> List[str]:
+        return self.__moves
+
+    @property
+    def result(self) -> str:
+        return self.__result
+
+    def start(self) -> Board:
+        """Get the board the game starts from: the position of its FEN header
+        if it has one, as for a set up position, otherwise the initial one.
+        Raises ValueError on a malformed FEN header.
+        """
+        fen = self.__headers.get("FEN")
+        return Board.from_fen(fen) if fen else Board()
+
+    def replay(self) -> Iterator[Board]:
+        """Play the moves one by one from the start position, yielding the
+        board after each of them. The same board is yielded every time; raises
+        ValueError on a move that is not legal.
+        """
+        board = self.start()
+        for san in self.__moves:
+            start, end, promotion = board.parse_san(san)
+            board.push(start, end, promotion)
+            yield board
+
+    def board(self) -> Board:
+        """Get the board after the last move."""
+        board = self.start()
+        for board in self.replay():
+            pass
+        return board
+
+
+def _parse_movetext(movetext: str) -> Tuple[List[str], str]:
+    """Split movetext into its main line san moves and its result, skipping
+    comments, variations, move numbers and annotation glyphs.
+    """
+    moves = []
+    result = "*"
+    depth = 0
+    for token in _TOKEN.finditer(movetext):
+        kind = token.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif depth > 0:
+            continue
+        elif kind == "result":
+            result = token.group()
+        elif kind == "move":
+            moves.append(token.group())
+    return moves, result
+
+
+def iter_pgn_games(file_path: str) -> Iterator[PgnGame]:
+    """Yield every game of a pgn file in order. The file is read line by line,
+    so only the game being parsed is ever held in memory.
+    """
+    with open(
+        file_path, encoding="utf-8", errors="replace", buffering=1 << 20
+    ) as f:
+        yield from _iter_games(f)
+
+
+def split_pgn_games(file_path: str) -> Iterator[str]:
+    """Yield the text of every game of a pgn file in order, unparsed, reading
+    the file line by line.
+    """
+    with open(
+        file_path, encoding="utf-8", errors="replace", buffering=1 << 20
+    ) as f:
+        for lines in _split_games(f):
+            yield "".join(lines)
+
+
+def parse_pgn_game(text: str) -> PgnGame:
+    """Parse the text of a single game, as split_pgn_games yields it."""
+    return next(_iter_games(text.splitlines(keepends=True)), PgnGame({}, [], "*"))
+
+
+def _iter_games(lines: Iterator[str]) -> Iterator[PgnGame]:
+    for game in _split_games(lines):
+        headers = {}
+        movetext = []
+        for line in game:
+            stripped = line.strip()
+            if stripped.startswith("[") and not movetext:
+                header = _HEADER.match(stripped)
+                if header is not None:
+                    headers[header.group(1)] = header.group(2).replace('\\"', '"')
+            else:
+                movetext.append(line)
+        yield _game(headers, movetext)
+
+
+def _split_games(lines: Iterator[str]) -> Iterator[List[str]]:
+    """Group lines into games: a header line after movetext starts a new game.
+    Escaped and blank lines are dropped.
+    """
+    game: List[str] = []
+    in_movetext = False
+    #  Brace comments may span lines, and a line inside one is never a header
+    open_comments = 0
+    for line in lines:
+        if line.startswith("%"):
+            #  Escaped line, ignored by the standard
+            continue
+        stripped = line.strip()
+        if stripped.startswith("[") and not open_comments:
+            if in_movetext:
+                yield game
+                game, in_movetext = [], False
+            game.append(line)
+        elif stripped:
+            in_movetext = True
+            game.append(line)
+            open_comments += line.count("{") - line.count("}")
+            open_comments = max(open_comments, 0)
+    if game:
+        yield game
+
+
+def _game(headers: Dict[str, str], movetext: List[str]) -> PgnGame:
+    moves, result = _parse_movetext("".join(movetext))
+    if result == "*":
+        result = headers.get("Result", result)
+    return PgnGame(headers, moves, result)
+
+
+#  The seven tag roster, exported first and in this order, and its defaults
+_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+_ROSTER_DEFAULTS = {"Date": "????.??.??", "Result": "*"}
+_INITIAL_FEN = Board().fen()
+_LINE_LENGTH = 79
+
+
+def game_san(board: Board) -> Tuple[str, List[str]]:
+    """Get the fen of the position board's game started from, and the san of
+    every move played since. The moves are taken back and replayed on board
+    itself, which ends up as it started. Raises ValueError if board is still
+    waiting for the piece of a promotion, whose san is not known yet.
+    """
+    if board.hold_for_promotion:
+        raise ValueError("the last move is waiting for its promotion piece")
+    moves = []
+    while len(board.ledger):
+        moves.append(board.pop())
+    fen = board.fen()
+    sans = []
+    for move in reversed(moves):
+        sans.append(board.san(move.start, move.end, move.promotion))
+        board.push(move.start, move.end, move.promotion)
+    return fen, sans
+
+
+def write_pgn_game(
+    stream: TextIO, board: Board, headers: Optional[Dict[str, str]] = None
+) -> None:
+    """Write the game played on board to stream in pgn export format, with the
+    seven tag roster first, then the rest of headers. Without a Result header
+    the result is the board's own: a mate or draw on the board, * otherwise.
+    """
+    headers = dict(headers or {})
+    fen, sans = game_san(board)
+    if fen != _INITIAL_FEN:
+        headers.setdefault("SetUp", "1")
+        headers.setdefault("FEN", fen)
+    result = headers.setdefault("Result", board.result())
+
+    for tag in _ROSTER + tuple(sorted(set(headers) - set(_ROSTER))):
+        value = headers.get(tag, _ROSTER_DEFAULTS.get(tag, "?"))
+        value = value.replace("\\", "\\\\").replace('"', '\\"')
+        stream.write("[" + tag + ' "' + value + '"]\n')
+    stream.write("\n")
+
+    fields = fen.split()
+    number = int(fields[5])
+    black = fields[1] == "b"
+    line = ""
+    for i, san in enumerate(sans):
+        token = san
+        if not black:
+            token = str(number) + ". " + san
+        elif i == 0:
+            token = str(number) + "... " + san
+        if black:
+            number += 1
+        black = not black
+        #  Move numbers stay on the line of the move they belong to
+        if line and len(line) + 1 + len(token) > _LINE_LENGTH:
+            stream.write(line + "\n")
+            line = token
+        else:
+            line += (" " if line else "") + token
+    if line and len(line) + 1 + len(result) > _LINE_LENGTH:
+        stream.write(line + "\n")
+        line = ""
+    stream.write(line + (" " if line else "") + result + "\n\n")
+
+
+def write_pgn_games(
+    file_path: str, games: Iterable[Tuple[Board, Optional[Dict[str, str]]]]
+) -> int:
+    """Write every (board, headers) game to a pgn file in one pass, as
+    write_pgn_game does, and return how many were written.
+    """
+    count = 0
+    with open(file_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for board, headers in games:
+            write_pgn_game(f, board, headers)
+            count += 1
+    return count
@@ -0,0 +1,180 @@
+"""Count the calls to, and time spent in, the hot paths of move generation and
+pgn reading, without an external profiler.
+
+    with profile() as stats:
+        ingest(...)
+    print(stats.table())
+
+or run anything with CHESSBERRY_PROFILE=1 (a table) or CHESSBERRY_PROFILE=json
+set, to have every call counted and the result written to stderr at exit.
+
+Only while profiling are the functions below wrapped; otherwise they are the
+originals and cost nothing extra. Times are inclusive, so Board.move also
+holds the time of the move_set it calls. Calls through a reference taken
+before profiling began, as by "from chessberry.chess import move_set", are
+not seen.
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+from chessberry import chess, pgn
+
+#  What is instrumented: an owner, the name of the function on it and a label
+_TARGETS: Tuple[Tuple[object, str, str], ...] = (
+    (chess, "move_set", "move_set"),
+    (chess, "legal_moves", "legal_moves"),
+    (chess, "_pawn_move_set", "_pawn_move_set"),
+    (chess, "_rook_move_set", "_rook_move_set"),
+    (chess, "_knight_move_set", "_knight_move_set"),
+    (chess, "_bishop_move_set", "_bishop_move_set"),
+    (chess, "_queen_move_set", "_queen_move_set"),
+    (chess, "_king_move_set", "_king_move_set"),
+    (chess, "_is_attacking", "_is_attacking"),
+    (chess, "_is_enpassant", "_is_enpassant"),
+    (chess.Board, "move", "Board.move"),
+    (chess.Board, "push", "Board.push"),
+    (chess.Board, "pop", "Board.pop"),
+    (chess.Board, "parse_san", "Board.parse_san"),
+    (chess.Board, "san", "Board.san"),
+    (pgn, "parse_pgn_game", "parse_pgn_game"),
+    (pgn, "_parse_movetext", "pgn._parse_movetext"),
+)
+ENVIRONMENT_VARIABLE = "CHESSBERRY_PROFILE"
+
+
+class Profile:
+    """Calls and seconds per instrumented function."""
+
+    def __init__(self):
+        self.__counters: Dict[str, List[float]] = {}
+
+    def add(self, label: str, seconds: float) -> None:
+        counter = self.__counters.get(label)
+        if counter is None:
+            counter = self.__counters[label] = [0, 0.0]
+        counter[0] += 1
+        counter[1] += seconds
+
+    def calls(self, label: str) -> int:
+        return int(self.__counters.get(label, (0, 0.0))[0])
+
+    def seconds(self, label: str) -> float:
+        return self.__counters.get(label, (0, 0.0))[1]
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            label: {"calls": int(calls), "seconds": seconds}
+            for label, (calls, seconds) in self.__counters.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def table(self) -> str:
+        """One line per function, the most time first."""
+        lines = [
+            "{:<22} {:>10} {:>12} {:>12}".format(
+                "function", "calls", "seconds", "us/call"
+            )
+        ]
+        for label, (calls, seconds) in sorted(
+            self.__counters.items(), key=lambda entry: entry[1][1], reverse=True
+        ):
+            lines.append(
+                "{:<22} {:>10} {:>12.6f} {:>12.2f}".format(
+                    label, int(calls), seconds, 1e6 * seconds / calls
+                )
+            )
+        return "\n".join(lines)
+
+
+#  The profiles being recorded, and the originals of the wrapped functions
+_profiles: List[Profile] = []
+_originals: List[Tuple[object, str, Callable]] = []
+
+
+def _wrap(label: str, function: Callable) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        began = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - began
+            for profile in _profiles:
+                profile.add(label, elapsed)
+
+    return wrapper
+
+
+def _install() -> None:
+    for owner, name, label in _TARGETS:
+        original = getattr(owner, name)
+        wrapper = _wrap(label, original)
+        _originals.append((owner, name, original))
+        setattr(owner, name, wrapper)
+        #  Move generation looks the piece move sets up in a table
+        for piece, function in chess._piece_dispatch_table.items():
+            if function is original:
+                chess._piece_dispatch_table[piece] = wrapper
+
+
+def _uninstall() -> None:
+    while _originals:
+        owner, name, original = _originals.pop()
+        wrapper = getattr(owner, name)
+        setattr(owner, name, original)
+        for piece, function in chess._piece_dispatch_table.items():
+            if function is wrapper:
+                chess._piece_dispatch_table[piece] = original
+
+
+def start(profile: Profile) -> None:
+    """Record calls into profile until stop."""
+    if not _profiles:
+        _install()
+    _profiles.append(profile)
+
+
+def stop(profile: Profile) -> None:
+    _profiles.remove(profile)
+    if not _profiles:
+        _uninstall()
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    """Record the calls made inside the with block."""
+    stats = Profile()
+    start(stats)
+    try:
+        yield stats
+    finally:
+        stop(stats)
+
+
+def profile_from_environment() -> None:
+    """Profile the whole run if CHESSBERRY_PROFILE is set, writing the result
+    to stderr at exit: as json if it says so, as a table otherwise.
+    """
+    setting = os.environ.get(ENVIRONMENT_VARIABLE, "")
+    if not setting or setting == "0":
+        return
+    stats = Profile()
+    start(stats)
+
+    def __dump() -> None:
+        stop(stats)
+        print(
+            stats.to_json() if setting.lower() == "json" else stats.table(),
+            file=sys.stderr,
+        )
+
+    atexit.register(__dump)
@@ -0,0 +1,331 @@
+"""Find the best move: negamax alpha-beta search with iterative deepening.
+
+    python -m chessberry.search --depth 5
+    python -m chessberry.search --fen "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1" --time 2
+"""
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Tuple
+
+import argparse
+import time
+
+from chessberry.chess import (
+    BB_ALL,
+    BB_RANK_1,
+    BB_RANK_3,
+    BB_RANK_6,
+    BB_RANK_8,
+    Board,
+    Color,
+    Piece,
+    PIECES,
+    PROMOTION_PIECES,
+    from_indices,
+    legal_moves,
+)
+from chessberry.tablebase import Tablebase, TableResult
+
+Move = Tuple[Tuple[int, int], Tuple[int, int], Optional[Piece]]
+
+#  The best move found, its score in centipawns for the side to move, the depth
+#  of the last finished iteration, the principal variation and the nodes visited.
+SearchResult = namedtuple("SearchResult", ["move", "score", "depth", "pv", "nodes"])
+
+MATE_SCORE = 100_000
+#  Centipawn values, from ChessPiece.value; the king's only orders captures
+_VALUES = {
+    piece.piece: 100 * (piece.value if piece.value is not None else 20)
+    for piece in PIECES.values()
+}
+_MATERIAL = tuple(
+    _VALUES[piece]
+    for piece in (
+        Piece.PAWN,
+        Piece.KNIGHT,
+        Piece.BISHOP,
+        Piece.ROOK,
+        Piece.QUEEN,
+    )
+)
+#  Centipawns per square attacked beyond the opponent's count
+_MOBILITY = 2
+#  Move ordering bands: captures and promotions first, then killers, then the
+#  rest by history.
+_CAPTURE_ORDER = 1 << 30
+_KILLER_ORDER = 1 << 29
+_CHECK_EVERY = 1024
+_CAPTURE_RANKS = BB_RANK_1 | BB_RANK_3 | BB_RANK_6 | BB_RANK_8
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+def _enemy(color: Color) -> Color:
+    return Color.DARK if color == Color.LIGHT else Color.LIGHT
+
+
+def _popcount(bb: int) -> int:
+    return bin(bb).count("1")
+
+
+def evaluate(board: Board) -> int:
+    """Score board in centipawns for the side to move: material from the
+    piece values, and a little for every square attacked.
+    """
+    us, them = board.turn, _enemy(board.turn)
+    score = 0
+    for value, ours, theirs in zip(
+        _MATERIAL, board.piece_bitboards(us), board.piece_bitboards(them)
+    ):
+        score += value * (_popcount(ours) - _popcount(theirs))
+    score += _MOBILITY * (
+        _popcount(board.attacks(us)) - _popcount(board.attacks(them))
+    )
+    return score
+
+
+def _table_score(result: TableResult, ply: int) -> int:
+    """A tablebase result as a search score, mates counted from the root."""
+    if result.outcome == 0:
+        return 0
+    plies = ply + result.plies
+    return MATE_SCORE - plies if result.outcome > 0 else -MATE_SCORE + plies
+
+
+def _in_check(board: Board) -> bool:
+    return bool(
+        board.attacks(_enemy(board.turn)) & board.pieces(Piece.KING, board.turn)
+    )
+
+
+class _Search:
+    def __init__(
+        self,
+        board: Board,
+        nodes: Optional[int],
+        deadline: Optional[float],
+        tablebase: Optional[Tablebase] = None,
+        stopped: Optional[Callable[[], bool]] = None,
+    ):
+        self.board = board
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.node_limit = nodes
+        self.deadline = deadline
+        self.stopped = stopped
+        #  Two quiet moves per ply that caused a cutoff, and per (start, end) how
+        #  much cutoffs at depth have favoured a quiet move.
+        self.killers: List[List[Optional[Move]]] = []
+        self.history: Dict[Tuple[Tuple[int, int], Tuple[int, int]], int] = {}
+        self.pv_move: Dict[int, Move] = {}
+
+    def moves(self, captures_only: bool = False) -> List[Tuple[int, Move]]:
+        """Legal moves of the side to move with their ordering keys."""
+        board = self.board
+        enemy = _enemy(board.turn)
+        targets = BB_ALL
+        if captures_only:
+            #  Enemy pieces, the promotion ranks and the en passant ranks
+            targets = board.occupancy(enemy) | _CAPTURE_RANKS
+        scored = []
+        for start, end in legal_moves(board, targets):
+            piece = board.piece_at(start[0] * 8 + start[1])
+            victim = board.piece_at(end[0] * 8 + end[1])
+            if victim is None and piece.piece == Piece.PAWN and start[1] != end[1]:
+                victim = PIECES[(Piece.PAWN, enemy)]
+            promotions = (
+                PROMOTION_PIECES
+                if piece.piece == Piece.PAWN and end[0] in (0, 7)
+                else (None,)
+            )
+            for promotion in promotions:
+                if victim is not None or promotion is not None:
+                    #  Most valuable victim, then least valuable attacker
+                    order = _CAPTURE_ORDER + 16 * (
+                        _VALUES[victim.piece] if victim is not None else 0
+                    )
+                    order += _VALUES[promotion] if promotion is not None else 0
+                    order -= _VALUES[piece.piece] // 100
+                elif captures_only:
+                    continue
+                else:
+                    order = self.history.get((start, end), 0)
+                scored.append((order, (start, end, promotion)))
+        return scored
+
+    def check_budget(self) -> None:
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY == 0:
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                raise _OutOfBudget
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise _OutOfBudget
+            if self.stopped is not None and self.stopped():
+                raise _OutOfBudget
+
+    def quiescence(self, alpha: int, beta: int) -> int:
+        """Search captures and promotions only, until the position is quiet."""
+        self.check_budget()
+        stand_pat = evaluate(self.board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        scored = self.moves(captures_only=True)
+        scored.sort(key=lambda entry: entry[0], reverse=True)
+        for _, move in scored:
+            self.board.push(*move)
+            score = -self.quiescence(-beta, -alpha)
+            self.board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def negamax(
+        self, depth: int, ply: int, alpha: int, beta: int, pv: List[Move]
+    ) -> int:
+        """Score the side to move depth plies deep, filling pv with the line."""
+        if ply > 0 and self.tablebase is not None:
+            result = self.tablebase.probe(self.board)
+            if result is not None:
+                self.check_budget()
+                return _table_score(result, ply)
+        if depth <= 0:
+            if not _in_check(self.board):
+                return self.quiescence(alpha, beta)
+            #  Look one ply further out of check, so mate on the horizon is seen
+            depth = 1
+        self.check_budget()
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+
+        scored = self.moves()
+        if not scored:
+            return -MATE_SCORE + ply if _in_check(self.board) else 0
+        killers = self.killers[ply]
+        pv_move = self.pv_move.get(ply)
+        ordered = []
+        for order, move in scored:
+            quiet = order < _CAPTURE_ORDER
+            if move == pv_move:
+                order = 1 << 31
+            elif quiet and move in killers:
+                order = _KILLER_ORDER
+            ordered.append((order, quiet, move))
+        ordered.sort(key=lambda entry: entry[0], reverse=True)
+
+        best = -MATE_SCORE - 1
+        for _, quiet, move in ordered:
+            line: List[Move] = []
+            self.board.push(*move)
+            score = -self.negamax(depth - 1, ply + 1, -beta, -alpha, line)
+            self.board.pop()
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+                pv[:] = [move] + line
+            if alpha >= beta:
+                if quiet:
+                    if move != killers[0]:
+                        killers[1], killers[0] = killers[0], move
+                    key = (move[0], move[1])
+                    self.history[key] = self.history.get(key, 0) + depth * depth
+                break
+        return best
+
+
+def search(
+    board: Board,
+    depth: int = 64,
+    nodes: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    tablebase: Optional[Tablebase] = None,
+    progress: Optional[Callable[[SearchResult], None]] = None,
+    stopped: Optional[Callable[[], bool]] = None,
+) -> SearchResult:
+    """Search board to depth plies, deepening one ply at a time until depth is
+    reached or the node or time (seconds) budget runs out; the result is that of
+    the deepest finished iteration. The board is left as it was given.
+
+    Positions below the root found in tablebase are scored from it, exactly,
+    instead of being searched.
+
+    progress, if given, is called with the result of every finished iteration.
+    stopped, if given, is asked now and then whether to give up early, as if
+    the budget had run out.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    state = _Search(board, nodes, deadline, tablebase, stopped)
+    plies = len(board.ledger)
+    result = SearchResult(None, 0, 0, [], 0)
+    for iteration in range(1, depth + 1):
+        pv: List[Move] = []
+        try:
+            score = state.negamax(iteration, 0, -MATE_SCORE - 1, MATE_SCORE + 1, pv)
+        except _OutOfBudget:
+            while len(board.ledger) > plies:
+                board.pop()
+            break
+        result = SearchResult(pv[0] if pv else None, score, iteration, pv, state.nodes)
+        if progress is not None:
+            progress(result)
+        #  Search the last principal variation first next time
+        state.pv_move = dict(enumerate(pv))
+        if not pv or abs(score) >= MATE_SCORE - iteration:
+            break
+    if result.move is None:
+        #  Not even one ply finished: any legal move beats none
+        scored = state.moves()
+        if scored:
+            move = max(scored, key=lambda entry: entry[0])[1]
+            result = SearchResult(move, 0, 0, [move], state.nodes)
+    return result._replace(nodes=state.nodes)
+
+
+def _uci(move: Move) -> str:
+    start, end, promotion = move
+    suffix = promotion.value.lower() if promotion is not None else ""
+    return from_indices(start) + from_indices(end) + suffix
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m chessberry.search",
+        description="Search a position for its best move.",
+    )
+    parser.add_argument("--fen", help="the position to search (default: initial)")
+    parser.add_argument(
+        "--depth", type=int, default=None, help="plies (default: 4 without a budget)"
+    )
+    parser.add_argument("--nodes", type=int, default=None)
+    parser.add_argument("--time", type=float, default=None, help="seconds")
+    parser.add_argument("--tablebase", help="a directory of endgame tables")
+    args = parser.parse_args(argv)
+    depth = args.depth
+    if depth is None:
+        depth = 4 if args.nodes is None and args.time is None else 64
+
+    try:
+        board = Board.from_fen(args.fen) if args.fen else Board()
+    except ValueError as e:
+        parser.error(str(e))
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    began = time.perf_counter()
+    result = search(board, depth, args.nodes, args.time, tablebase)
+    elapsed = time.perf_counter() - began
+    if tablebase is not None:
+        tablebase.close()
+
+    print("bestmove: " + (_uci(result.move) if result.move else "(none)"))
+    print("score: " + str(result.score))
+    print("depth: " + str(result.depth))
+    print("pv: " + " ".join(_uci(move) for move in result.pv))
+    print("nodes: " + str(result.nodes))
+    print("time: {:.3f}s".format(elapsed))
+    print("nps: {:.0f}".format(result.nodes / elapsed if elapsed > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,718 @@
+"""Endgame tablebases for a few pieces, generated here by retrograde analysis.
+
+    python -m chessberry.tablebase generate KQK KRK KPK --dir tables
+    python -m chessberry.tablebase probe --dir tables --fen "8/8/8/3k4/8/8/8/KQ6 w - -"
+    python -m chessberry.tablebase verify KRK --dir tables --samples 500
+
+A table covers one material, named like KQvK (or KQK) with white's pieces
+first, and holds one byte per position: 0 for a draw, or one more than the
+plies to mate, which are odd for a win of the side to move and even for a
+loss. Positions are indexed by the side to move, then the white king, folded
+by symmetry into a1-d1-d4 (or files a to d with pawns), then the square of
+every other piece, so a probe is a single read from the mapped file.
+
+Castling and en passant are not part of a table, so materials with pawns on
+both sides are not supported.
+"""
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import argparse
+import itertools
+import mmap
+import os
+import random
+import time
+
+from chessberry.chess import (
+    Board,
+    ChessPiece,
+    Color,
+    Piece,
+    PIECES,
+    PROMOTION_PIECES,
+    legal_moves,
+    _bits,
+    _piece_attacks,
+    _KING_ATTACKS,
+    _KNIGHT_ATTACKS,
+    _PAWN_ATTACKS,
+    _RAYS,
+)
+
+#  What a table says of a position: 1, 0 or -1 as the side to move wins,
+#  draws or loses, and the plies to mate with best play (0 for a draw).
+TableResult = namedtuple("TableResult", ["outcome", "plies"])
+
+_MAGIC = b"CBTB1\n"
+_SUFFIX = ".cbt"
+_MAX_PLIES = 254
+_MAX_PIECES = 6
+_LETTERS = {
+    "K": Piece.KING,
+    "Q": Piece.QUEEN,
+    "R": Piece.ROOK,
+    "B": Piece.BISHOP,
+    "N": Piece.KNIGHT,
+    "P": Piece.PAWN,
+}
+_PIECE_LETTERS = {piece: letter for letter, piece in _LETTERS.items()}
+_ORDER = "KQRBNP"
+_STRENGTH = {"K": 0, "Q": 9, "R": 5, "B": 3, "N": 3, "P": 1}
+
+
+def _transform(square: int, symmetry: int) -> int:
+    file, rank = square & 7, square >> 3
+    if symmetry & 1:
+        file = 7 - file
+    if symmetry & 2:
+        rank = 7 - rank
+    if symmetry & 4:
+        file, rank = rank, file
+    return rank * 8 + file
+
+
+#  The eight symmetries of the board, identity first, as square maps
+_SYMMETRIES: List[List[int]] = [
+    [_transform(square, symmetry) for square in range(64)] for symmetry in range(8)
+]
+#  Where the white king is folded to, without and with pawns
+_TRIANGLE = [sq for sq in range(64) if (sq & 7) <= 3 and sq >> 3 <= (sq & 7)]
+_DIAGONAL = [0, 9, 18, 27]
+_HALF = [sq for sq in range(64) if (sq & 7) <= 3]
+_PAWNLESS_SYMMETRY = [
+    next(s for s in range(8) if _SYMMETRIES[s][sq] in _TRIANGLE) for sq in range(64)
+]
+_PAWN_SYMMETRY = [0 if (sq & 7) <= 3 else 1 for sq in range(64)]
+
+
+def _split(name: str) -> Tuple[str, str]:
+    """White's and black's piece letters of a material name."""
+    name = name.upper().replace("V", "")
+    second = name.find("K", 1)
+    white, black = name[:second], name[second:]
+    if (
+        not name.startswith("K")
+        or second < 0
+        or "K" in white[1:] + black[1:]
+        or any(letter not in _LETTERS for letter in name)
+    ):
+        raise ValueError("not a material: " + name)
+    return white, black
+
+
+def _canonical(white: str, black: str) -> Tuple[str, bool]:
+    """The table name of a material and whether its colors are swapped in it:
+    the stronger side is white.
+    """
+    white = "".join(sorted(white, key=_ORDER.index))
+    black = "".join(sorted(black, key=_ORDER.index))
+
+    def __strength(side: str):
+        return sum(_STRENGTH[letter] for letter in side), len(side), [
+            -_ORDER.index(letter) for letter in side
+        ]
+
+    if __strength(black) > __strength(white):
+        return black + "v" + white, True
+    return white + "v" + black, False
+
+
+def _insufficient(white: str, black: str) -> bool:
+    """Whether neither side can ever mate: bare kings and at most one minor."""
+    others = white[1:] + black[1:]
+    return len(others) <= 1 and all(letter in "BN" for letter in others)
+
+
+class _Material:
+    """The layout of a table: its pieces, white king and black king first, and
+    how a position is folded and indexed.
+    """
+
+    def __init__(self, name: str):
+        white, black = _split(name)
+        self.name, flipped = _canonical(white, black)
+        if flipped:
+            white, black = black, white
+        if "P" in white and "P" in black:
+            raise ValueError(self.name + ": pawns on both sides are not supported")
+        self.white, self.black = self.name.split("v")
+        self.pieces: List[ChessPiece] = (
+            [PIECES[(Piece.KING, Color.LIGHT)], PIECES[(Piece.KING, Color.DARK)]]
+            + [PIECES[(_LETTERS[letter], Color.LIGHT)] for letter in self.white[1:]]
+            + [PIECES[(_LETTERS[letter], Color.DARK)] for letter in self.black[1:]]
+        )
+        self.pawns = "P" in self.name
+        self.king_squares = _HALF if self.pawns else _TRIANGLE
+        self.__symmetry = _PAWN_SYMMETRY if self.pawns else _PAWNLESS_SYMMETRY
+        self.__slot = {square: i for i, square in enumerate(self.king_squares)}
+        self.others = len(self.pieces) - 1
+        self.size = 2 * len(self.king_squares) * 64 ** self.others
+
+    def index(self, squares: List[int], white: bool) -> int:
+        mapping = _SYMMETRIES[self.__symmetry[squares[0]]]
+        index = (0 if white else 1) * len(self.king_squares)
+        index += self.__slot[mapping[squares[0]]]
+        for square in squares[1:]:
+            index = index * 64 + mapping[square]
+        return index
+
+    def indices(self, squares: List[int], white: bool) -> Iterator[int]:
+        """Every index of a position: with the white king on the a1-h8 diagonal
+        its transpose is stored apart.
+        """
+        yield self.index(squares, white)
+        mapping = _SYMMETRIES[self.__symmetry[squares[0]]]
+        if not self.pawns and mapping[squares[0]] in _DIAGONAL:
+            transposed = [_SYMMETRIES[4][mapping[square]] for square in squares]
+            if transposed != [mapping[square] for square in squares]:
+                yield self.index(transposed, white)
+
+    def decode(self, index: int) -> Tuple[List[int], bool]:
+        squares = []
+        for _ in range(self.others):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        black, slot = divmod(index, len(self.king_squares))
+        squares.append(self.king_squares[slot])
+        squares.reverse()
+        return squares, not black
+
+    def subtables(self) -> List[str]:
+        """The materials one capture, promotion or both turn this one into."""
+        names = set()
+        for ours, theirs, swap in (
+            (self.white, self.black, False),
+            (self.black, self.white, True),
+        ):
+            #  Our side moves: it may promote a pawn and may take a piece
+            promoted = [ours] + [
+                ours.replace("P", letter, 1) for letter in "QRBN" if "P" in ours
+            ]
+            taken = [theirs] + [
+                theirs[:i] + theirs[i + 1:] for i in range(1, len(theirs))
+            ]
+            for mine, left in itertools.product(promoted, taken):
+                if (mine, left) != (ours, theirs):
+                    names.add((left, mine) if swap else (mine, left))
+        return sorted(
+            {
+                _canonical(white, black)[0]
+                for white, black in names
+                if not _insufficient(white, black)
+            }
+        )
+
+
+def _lines() -> Tuple[List[int], List[int]]:
+    """For every pair of squares, _ROOK or _BISHOP if they share a line of
+    that slider, else 0, and the squares between them.
+    """
+    kinds = [0] * 4096
+    between = [0] * 4096
+    for direction in range(8):
+        kind = _ROOK if direction < 4 else _BISHOP
+        for start in range(64):
+            for end in _bits(_RAYS[direction][start]):
+                kinds[start * 64 + end] = kind
+                between[start * 64 + end] = (
+                    _RAYS[direction][start] & ~_RAYS[direction][end] & ~(1 << end)
+                )
+    return kinds, between
+
+
+#  How pieces attack, as _attacked reads them
+_KING, _KNIGHT, _PAWN, _ROOK, _BISHOP, _QUEEN = range(6)
+_ATTACK_CODES = {
+    Piece.KING: _KING,
+    Piece.KNIGHT: _KNIGHT,
+    Piece.PAWN: _PAWN,
+    Piece.ROOK: _ROOK,
+    Piece.BISHOP: _BISHOP,
+    Piece.QUEEN: _QUEEN,
+}
+
+
+_LINE_KINDS, _BETWEEN = _lines()
+
+
+def _codes(pieces: List[ChessPiece]) -> List[Tuple[bool, int]]:
+    """Whether each piece is white, and how it attacks."""
+    return [
+        (piece.color == Color.LIGHT, _ATTACK_CODES[piece.piece]) for piece in pieces
+    ]
+
+
+def _attacked(
+    square: int,
+    codes: List[Tuple[bool, int]],
+    squares: List[int],
+    occupied: int,
+    white: bool,
+    skip: int = -1,
+) -> bool:
+    """Whether white's or black's pieces, but the one at index skip, attack
+    square; codes are those of _codes.
+    """
+    for i, (piece_white, code) in enumerate(codes):
+        if piece_white != white or i == skip:
+            continue
+        start = squares[i]
+        if code == _KING:
+            if _KING_ATTACKS[start] >> square & 1:
+                return True
+        elif code == _KNIGHT:
+            if _KNIGHT_ATTACKS[start] >> square & 1:
+                return True
+        elif code == _PAWN:
+            if _PAWN_ATTACKS[not white][start] >> square & 1:
+                return True
+        else:
+            line = _LINE_KINDS[start * 64 + square]
+            if (
+                line
+                and (code == line or code == _QUEEN)
+                and not _BETWEEN[start * 64 + square] & occupied
+            ):
+                return True
+    return False
+
+
+def _occupancy(squares: List[int]) -> int:
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    return occupied
+
+
+class Tablebase:
+    """The tables of a directory, each mapped into memory the first time a
+    position of its material is probed. Use as a context manager, or close it
+    when done.
+    """
+
+    def __init__(self, directory: str):
+        self.__directory = directory
+        self.__tables: Dict[str, Optional[Tuple[_Material, mmap.mmap]]] = {}
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for table in self.__tables.values():
+            if table is not None:
+                table[1].close()
+        self.__tables.clear()
+
+    def path(self, name: str) -> str:
+        """The file of the table of a material."""
+        return os.path.join(self.__directory, _Material(name).name + _SUFFIX)
+
+    def __table(self, name: str) -> Optional[Tuple[_Material, mmap.mmap]]:
+        if name not in self.__tables:
+            table = None
+            path = os.path.join(self.__directory, name + _SUFFIX)
+            if os.path.exists(path):
+                material = _Material(name)
+                with open(path, "rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if data[: len(_MAGIC)] != _MAGIC or (
+                    len(data) != len(_MAGIC) + material.size
+                ):
+                    data.close()
+                    raise ValueError(path + " is not a table of " + name)
+                table = material, data
+            self.__tables[name] = table
+        return self.__tables[name]
+
+    def value(
+        self, pieces: List[ChessPiece], squares: List[int], white: bool
+    ) -> Optional[int]:
+        """The stored byte of a position, 0 for a draw of insufficient
+        material, or None without its table.
+        """
+        letters = ["", ""]
+        for piece in sorted(pieces, key=lambda p: _ORDER.index(_letter(p))):
+            letters[piece.color == Color.DARK] += _letter(piece)
+        if _insufficient(*letters):
+            return 0
+        name, flipped = _canonical(*letters)
+        table = self.__table(name)
+        if table is None:
+            return None
+        material, data = table
+        order = {}
+        for piece, square in zip(pieces, squares):
+            if flipped:
+                piece = PIECES[(piece.piece, _other(piece.color))]
+                square ^= 56
+            order.setdefault(piece, []).append(square)
+        placed = [order[piece].pop() for piece in material.pieces]
+        return data[len(_MAGIC) + material.index(placed, white != flipped)]
+
+    def probe(self, board: Board) -> Optional[TableResult]:
+        """Look a board up, or get None when its material has no table or it
+        may still castle or take en passant.
+        """
+        if bin(board.occupancy()).count("1") > _MAX_PIECES:
+            return None
+        pieces, squares = [], []
+        for (piece, color), chess_piece in PIECES.items():
+            for square in _bits(board.pieces(piece, color)):
+                pieces.append(chess_piece)
+                squares.append(square)
+        rooks = board.pieces(Piece.ROOK, Color.LIGHT) | board.pieces(
+            Piece.ROOK, Color.DARK
+        )
+        if board.ledger.castling_rights and rooks:
+            return None
+        pawns = board.pieces(Piece.PAWN, Color.LIGHT), board.pieces(
+            Piece.PAWN, Color.DARK
+        )
+        if all(pawns):
+            return None
+        value = self.value(pieces, squares, board.turn == Color.LIGHT)
+        if value is None:
+            return None
+        return _result(value)
+
+
+def _letter(piece: ChessPiece) -> str:
+    return _PIECE_LETTERS[piece.piece]
+
+
+def _other(color: Color) -> Color:
+    return Color.DARK if color == Color.LIGHT else Color.LIGHT
+
+
+def _result(value: int) -> TableResult:
+    if value == 0:
+        return TableResult(0, 0)
+    plies = value - 1
+    return TableResult(1 if plies % 2 else -1, plies)
+
+
+class _Generator:
+    def __init__(self, material: _Material, tablebase: Tablebase):
+        self.material = material
+        self.pieces = material.pieces
+        self.codes = _codes(material.pieces)
+        self.tablebase = tablebase
+
+    def valid(self, squares: List[int], white: bool) -> bool:
+        """Whether squares are a position: no two pieces on a square, no pawn
+        on the first or last rank, and the side not to move not in check.
+        """
+        occupied = _occupancy(squares)
+        if bin(occupied).count("1") != len(squares):
+            return False
+        for piece, square in zip(self.pieces, squares):
+            if piece.piece == Piece.PAWN and square >> 3 in (0, 7):
+                return False
+        king = squares[1 if white else 0]
+        return not _attacked(king, self.codes, squares, occupied, white)
+
+    def in_check(self, squares: List[int], white: bool) -> bool:
+        king = squares[0 if white else 1]
+        return _attacked(king, self.codes, squares, _occupancy(squares), not white)
+
+    def successors(self, squares: List[int], white: bool) -> Iterator[Tuple[int, int]]:
+        """Yield (index, 0) for every legal move staying in this table, and
+        (-1, stored value) for every one capturing or promoting out of it.
+        """
+        pieces = self.pieces
+        color = Color.LIGHT if white else Color.DARK
+        occupied = own = 0
+        for piece, square in zip(pieces, squares):
+            occupied |= 1 << square
+            if piece.color == color:
+                own |= 1 << square
+        for i, piece in enumerate(pieces):
+            if piece.color != color:
+                continue
+            start = squares[i]
+            if piece.piece == Piece.PAWN:
+                step = 8 if white else -8
+                targets = 0
+                if not occupied >> (start + step) & 1:
+                    targets |= 1 << (start + step)
+                    double = start + 2 * step
+                    if start >> 3 == (1 if white else 6) and not occupied >> double & 1:
+                        targets |= 1 << double
+                targets |= _piece_attacks(piece, start, occupied) & (occupied & ~own)
+            else:
+                targets = _piece_attacks(piece, start, occupied) & ~own
+            for end in _bits(targets):
+                after = list(squares)
+                after[i] = end
+                captured = -1
+                if occupied >> end & 1:
+                    captured = squares.index(end)
+                king = end if piece.piece == Piece.KING else squares[0 if white else 1]
+                if _attacked(
+                    king,
+                    self.codes,
+                    after,
+                    occupied & ~(1 << start) | 1 << end,
+                    not white,
+                    captured,
+                ):
+                    continue
+                promotes = piece.piece == Piece.PAWN and end >> 3 in (0, 7)
+                if captured < 0 and not promotes:
+                    yield self.material.index(after, not white), 0
+                    continue
+                left = [p for j, p in enumerate(pieces) if j != captured]
+                left_squares = [s for j, s in enumerate(after) if j != captured]
+                moved = i if captured < 0 or captured > i else i - 1
+                for promotion in PROMOTION_PIECES if promotes else (None,):
+                    if promotion is not None:
+                        left[moved] = PIECES[(promotion, color)]
+                    value = self.tablebase.value(left, left_squares, not white)
+                    if value is None:
+                        raise ValueError(
+                            self.material.name + " needs the tables it converts into"
+                        )
+                    yield -1, value
+
+    def predecessors(self, squares: List[int], white: bool) -> Iterator[int]:
+        """Yield the index of every position whose side to move can reach this
+        one without a capture or promotion.
+        """
+        pieces = self.pieces
+        mover = Color.DARK if white else Color.LIGHT
+        occupied = _occupancy(squares)
+        king = squares[0 if white else 1]
+        for i, piece in enumerate(pieces):
+            if piece.color != mover:
+                continue
+            end = squares[i]
+            if piece.piece == Piece.PAWN:
+                step = -8 if mover == Color.LIGHT else 8
+                start = end + step
+                sources = 0
+                if 1 <= start >> 3 <= 6 and not occupied >> start & 1:
+                    sources |= 1 << start
+                    double = start + step
+                    if end >> 3 == (3 if mover == Color.LIGHT else 4) and not (
+                        occupied >> double & 1
+                    ):
+                        sources |= 1 << double
+            else:
+                sources = _piece_attacks(piece, end, occupied) & ~occupied
+            for start in _bits(sources):
+                before = list(squares)
+                before[i] = start
+                before_occupied = occupied ^ (1 << end | 1 << start)
+                if _attacked(
+                    king, self.codes, before, before_occupied, mover == Color.LIGHT
+                ):
+                    continue
+                yield from self.material.indices(before, mover == Color.LIGHT)
+
+    def assess(
+        self,
+        squares: List[int],
+        white: bool,
+        values: bytearray,
+        loss_only: bool = False,
+    ) -> Tuple[bool, Optional[int], Optional[int]]:
+        """Whether the side to move has a move, the plies of its quickest known
+        win and, if every move is known to lose, of its slowest loss. With
+        loss_only, give up on the first move not known to lose.
+        """
+        moves = False
+        win = None
+        loss = 0
+        for index, value in self.successors(squares, white):
+            moves = True
+            if index >= 0:
+                value = values[index]
+            #  A move to a position lost in value - 1 plies wins in value
+            if value == 0:
+                loss = None
+                if loss_only:
+                    break
+            elif value % 2:
+                win = value if win is None else min(win, value)
+            elif loss is not None:
+                loss = max(loss, value)
+        return moves, win, loss if moves else None
+
+    def solve(self) -> bytearray:
+        """Score every position: first those decided by their captures and
+        promotions or by having no move, then, a ply at a time, those whose
+        moves lead to positions already scored.
+        """
+        material = self.material
+        values = bytearray(material.size)
+        buckets: List[List[int]] = [[] for _ in range(_MAX_PLIES + 2)]
+        index = 0
+        for white in (True, False):
+            for king in material.king_squares:
+                for others in itertools.product(range(64), repeat=material.others):
+                    squares = [king, *others]
+                    if self.valid(squares, white):
+                        moves, win, loss = self.assess(squares, white, values)
+                        if not moves and self.in_check(squares, white):
+                            buckets[0].append(index)
+                        elif win is not None:
+                            buckets[min(win, _MAX_PLIES + 1)].append(index)
+                        elif loss is not None:
+                            buckets[min(loss, _MAX_PLIES + 1)].append(index)
+                    index += 1
+
+        for plies in range(_MAX_PLIES + 1):
+            for index in buckets[plies]:
+                if values[index]:
+                    continue
+                values[index] = plies + 1
+                squares, white = material.decode(index)
+                for before in self.predecessors(squares, white):
+                    if values[before]:
+                        continue
+                    if plies % 2 == 0:
+                        buckets[plies + 1].append(before)
+                        continue
+                    _, win, loss = self.assess(
+                        *material.decode(before), values, loss_only=True
+                    )
+                    if win is None and loss is not None:
+                        buckets[min(loss, _MAX_PLIES + 1)].append(before)
+            buckets[plies] = []
+        if buckets[_MAX_PLIES + 1]:
+            raise ValueError(material.name + ": a mate is longer than a table holds")
+        return values
+
+
+def generate(name: str, directory: str) -> List[str]:
+    """Generate the table of a material into directory, with every table it
+    turns into by captures and promotions, unless they are there already.
+    Returns the names of the tables written.
+    """
+    material = _Material(name)
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for sub in material.subtables():
+        if sub != material.name:
+            written += generate(sub, directory)
+    path = os.path.join(directory, material.name + _SUFFIX)
+    if os.path.exists(path):
+        return written
+    with Tablebase(directory) as tablebase:
+        values = _Generator(material, tablebase).solve()
+    with open(path + ".tmp", "wb") as f:
+        f.write(_MAGIC)
+        f.write(values)
+    os.replace(path + ".tmp", path)
+    return written + [material.name]
+
+
+def _fen(pieces: List[ChessPiece], squares: List[int], white: bool) -> str:
+    grid = [["1"] * 8 for _ in range(8)]
+    for piece, square in zip(pieces, squares):
+        letter = _letter(piece)
+        grid[square >> 3][square & 7] = (
+            letter if piece.color == Color.LIGHT else letter.lower()
+        )
+    placement = "/".join("".join(rank) for rank in reversed(grid))
+    for run in range(8, 1, -1):
+        placement = placement.replace("1" * run, str(run))
+    return placement + (" w" if white else " b") + " - - 0 1"
+
+
+def verify(
+    tablebase: Tablebase, name: str, samples: int = 200, seed: int = 0
+) -> int:
+    """Check random positions of a table against Board: each must score as its
+    legal moves, played on a Board and probed, say it should. Raises ValueError
+    on the first that does not; returns the positions checked.
+    """
+    material = _Material(name)
+    generator = _Generator(material, tablebase)
+    rng = random.Random(seed)
+    checked = 0
+    while checked < samples:
+        squares, white = material.decode(rng.randrange(material.size))
+        if not generator.valid(squares, white):
+            continue
+        board = Board.from_fen(_fen(material.pieces, squares, white))
+        result = tablebase.probe(board)
+        children = []
+        for start, end in legal_moves(board):
+            piece = board.piece_at(start[0] * 8 + start[1])
+            promotions = (
+                PROMOTION_PIECES
+                if piece.piece == Piece.PAWN and end[0] in (0, 7)
+                else (None,)
+            )
+            for promotion in promotions:
+                board.push(start, end, promotion)
+                children.append(tablebase.probe(board))
+                board.pop()
+        if not children:
+            expected = TableResult(
+                -1 if generator.in_check(squares, white) else 0, 0
+            )
+        elif any(child.outcome < 0 for child in children):
+            expected = TableResult(
+                1, 1 + min(c.plies for c in children if c.outcome < 0)
+            )
+        elif all(child.outcome > 0 for child in children):
+            expected = TableResult(-1, 1 + max(c.plies for c in children))
+        else:
+            expected = TableResult(0, 0)
+        if result != expected:
+            raise ValueError(
+                board.fen() + ": table says " + str(result) + ", moves say "
+                + str(expected)
+            )
+        checked += 1
+    return checked
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m chessberry.tablebase",
+        description="Generate, probe and check endgame tables.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("generate", help="generate tables of materials")
+    build.add_argument("materials", nargs="+", help="such as KQK, KRK, KPK, KBNK")
+    check = commands.add_parser("verify", help="check a table against Board")
+    check.add_argument("material")
+    check.add_argument("--samples", type=int, default=200)
+    probe = commands.add_parser("probe", help="look a position up")
+    probe.add_argument("--fen", required=True)
+    for command in (build, check, probe):
+        command.add_argument("--dir", default="tables", help="the table directory")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    try:
+        if args.command == "generate":
+            for name in args.materials:
+                for written in generate(name, args.dir):
+                    print("written: " + written)
+        elif args.command == "verify":
+            with Tablebase(args.dir) as tablebase:
+                checked = verify(tablebase, args.material, args.samples)
+            print("verified: " + str(checked))
+        else:
+            with Tablebase(args.dir) as tablebase:
+                result = tablebase.probe(Board.from_fen(args.fen))
+            if result is None:
+                print("result: (no table)")
+            else:
+                print("result: " + {1: "win", 0: "draw", -1: "loss"}[result.outcome])
+                print("plies: " + str(result.plies))
+    except ValueError as e:
+        parser.error(str(e))
+    print("time: {:.3f}s".format(time.perf_counter() - began))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from chessberry.chess import *
+from chessberry.chess import _attacked
+
+
+def _scanned_attacks(board, color):
+    attacks = 0
+    for square in range(64):
+        if _attacked(square, board, color, board.occupancy()):
+            attacks |= 1 << square
+    return attacks
+
+
+class TestAttackMaps(unittest.TestCase):
+
+    @staticmethod
+    def test_initial_position():
+        board = Board()
+        #  Every square of the first three ranks but a1 and h1
+        assert(board.attacks(Color.LIGHT) == 0xFFFF7E)
+        assert(board.attacks(Color.DARK) == 0x7EFFFF << 40)
+        assert(board.attacks_from(to_indices('b1')[1]) == 1 << 16 | 1 << 18 | 1 << 11)
+
+    @staticmethod
+    def test_attach():
+        board = Board(True)
+        board.attach('a1', WHITE_ROOK)
+        board.attach('a4', BLACK_PAWN)
+        assert(board.attacks(Color.LIGHT) == 0x010101FE)
+        assert(board.attacks(Color.DARK) == 1 << 17)
+        board.attach('a4', None)
+        assert(board.attacks(Color.LIGHT) == BB_FILE_A ^ 1 | 0xFE)
+
+    @staticmethod
+    def test_random_games_match_full_scan():
+        rng = random.Random(7)
+        for _ in range(4):
+            board = Board()
+            for _ in range(80):
+                moves = [
+                    (from_indices((rank, file)), from_indices(end))
+                    for rank, row in enumerate(board)
+                    for file, piece in enumerate(row)
+                    if piece is not None and piece.color == board.turn
+                    for end in move_set(from_indices((rank, file)), board)
+                ]
+                if not moves:
+                    break
+                start, end = rng.choice(sorted(moves))
+                assert(board.move(start, end, Piece.QUEEN))
+                for color in Color:
+                    assert(board.attacks(color) == _scanned_attacks(board, color))
+
+
+if __name__ == '__main__':
+    unittest.main()
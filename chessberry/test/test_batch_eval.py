@@ -0,0 +1,75 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.batch import (
+    evaluate_batch,
+    mailbox_to_planes,
+    np,
+    planes_to_mailbox,
+    to_bitboards,
+    to_planes,
+)
+
+FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "4k3/8/8/8/8/8/8/3QK3 w - - 0 1",
+    "4k3/8/8/8/8/8/P7/4K3 w - - 0 1",
+]
+
+
+def _mirror(fen):
+    """The same position with the colors swapped and the board flipped."""
+    placement = fen.split()[0]
+    return "/".join(placement.split("/")[::-1]).swapcase() + " w - - 0 1"
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchEval(unittest.TestCase):
+
+    @staticmethod
+    def test_encodings():
+        boards = [Board.from_fen(fen) for fen in FENS]
+        planes = to_planes(boards)
+        assert(planes.shape == (4, 12, 64))
+        assert(planes[0, 0].sum() == 8 and planes[0, 0, 8:16].all())
+        assert(planes[0, 11, 60] == 1)
+        assert((to_bitboards(parse_fen(fen) for fen in FENS) == to_bitboards(boards)).all())
+        mailbox = planes_to_mailbox(planes)
+        assert(mailbox.shape == (4, 64))
+        assert(mailbox[0, 4] == 6 and mailbox[0, 60] == -6 and mailbox[0, 32] == 0)
+        assert((mailbox_to_planes(mailbox) == planes).all())
+
+    @staticmethod
+    def test_symmetry():
+        scores = evaluate_batch(to_planes(parse_fen(fen) for fen in FENS))
+        mirrored = evaluate_batch(to_planes(parse_fen(_mirror(fen)) for fen in FENS))
+        assert(scores[0] == 0)
+        assert((scores == -mirrored).all())
+        assert(scores[2] > 900)
+
+    @staticmethod
+    def test_mailbox_input():
+        planes = to_planes(parse_fen(fen) for fen in FENS)
+        assert((evaluate_batch(planes) == evaluate_batch(planes_to_mailbox(planes))).all())
+
+    @staticmethod
+    def test_pawn_structure():
+        healthy, doubled, isolated, passed, blocked = evaluate_batch(to_planes(
+            parse_fen(fen + " w - - 0 1")
+            for fen in (
+                "4k3/pp6/8/8/8/8/PP6/4K3",
+                "4k3/pp6/8/8/8/P7/P7/4K3",
+                "4k3/pp6/8/8/8/8/P1P5/4K3",
+                "4k3/8/P7/8/8/8/8/4K3",
+                "4k3/1p6/P7/8/8/8/8/4K3",
+            )
+        ))
+        assert(doubled < healthy)
+        assert(isolated < healthy)
+        #  Pawn, square, isolated and the bonus of a pawn passed four ranks
+        assert(passed == 100 + 10 - 10 + 60)
+        assert(blocked == 0)
+
+if __name__ == '__main__':
+    unittest.main()
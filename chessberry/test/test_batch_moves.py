@@ -0,0 +1,92 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.batch import generate_moves, np, stack_positions
+
+FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "8/8/8/2k5/2pP4/8/B7/4K3 b - d3 0 3",
+]
+
+
+def _positions():
+    """Every position one ply from each fen, and a few two plies from it."""
+    boards = []
+    for fen in FENS:
+        board = Board.from_fen(fen)
+        boards.append(board.fen())
+        for start, end in legal_moves(board):
+            board.push(start, end)
+            boards.append(board.fen())
+            for next_start, next_end in legal_moves(board)[:4]:
+                board.push(next_start, next_end)
+                boards.append(board.fen())
+                board.pop()
+            board.pop()
+    return [Board.from_fen(fen) for fen in boards]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchMoves(unittest.TestCase):
+
+    @staticmethod
+    def test_matches_legal_moves():
+        boards = _positions()
+        batch = generate_moves(stack_positions(boards))
+        assert(len(batch.offsets) == len(boards) + 1)
+        assert(batch.offsets[-1] == len(batch.moves))
+        for i, board in enumerate(boards):
+            codes = batch.moves[batch.offsets[i]:batch.offsets[i + 1]]
+            moves = [decode_move(int(code))[:2] for code in codes]
+            assert(moves == sorted(moves))
+            expected = sorted(
+                (start[0] * 8 + start[1], end[0] * 8 + end[1])
+                for start, end in legal_moves(board)
+            )
+            assert(moves == expected)
+
+    @staticmethod
+    def test_move_set():
+        board = Board.from_fen(FENS[1])
+        batch = generate_moves(stack_positions([board]))
+        for square in range(64):
+            piece = board.piece_at(square)
+            if piece is None or piece.color != board.turn:
+                continue
+            targets = {
+                divmod(decode_move(int(code))[1], 8)
+                for code in batch.moves
+                if decode_move(int(code))[0] == square
+            }
+            assert(targets == move_set(from_indices(divmod(square, 8)), board))
+
+    @staticmethod
+    def test_flags():
+        boards = [Board.from_fen(fen) for fen in FENS[1:2] + FENS[4:6]]
+        batch = generate_moves(stack_positions(boards))
+        decoded = [
+            {decode_move(int(code))[:2]: decode_move(int(code)) for code in
+             batch.moves[batch.offsets[i]:batch.offsets[i + 1]]}
+            for i in range(len(boards))
+        ]
+        assert(decoded[0][(4, 6)][2] == MOVE_KING_CASTLE)
+        assert(decoded[0][(4, 2)][2] == MOVE_QUEEN_CASTLE)
+        assert(decoded[0][(8, 24)][2] == MOVE_DOUBLE_PAWN_PUSH)
+        assert(decoded[0][(36, 53)][2] == MOVE_CAPTURE)
+        promotion = decoded[1][(51, 58)]
+        assert(promotion[2] & MOVE_PROMOTION and promotion[2] & MOVE_CAPTURE)
+        assert(promotion[3] == Piece.QUEEN)
+        assert(decoded[2][(26, 19)][2] == MOVE_ENPASSANT)
+
+    @staticmethod
+    def test_empty_batch():
+        batch = generate_moves(stack_positions([]))
+        assert(len(batch.moves) == 0 and list(batch.offsets) == [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.chess import (
+    _BISHOP_RAYS,
+    _KING_ATTACKS,
+    _KNIGHT_ATTACKS,
+    _PAWN_ATTACKS,
+    _ROOK_RAYS,
+)
+
+
+def _agrees(board):
+    for rank, row in enumerate(board):
+        for file, piece in enumerate(row):
+            bit = 1 << (rank * 8 + file)
+            for p in PIECES.values():
+                if bool(board.pieces(p.piece, p.color) & bit) != (piece == p):
+                    return False
+            if bool(board.occupancy() & bit) != (piece is not None):
+                return False
+    return True
+
+
+class TestBitboard(unittest.TestCase):
+
+    @staticmethod
+    def test_initial_position():
+        board = Board()
+        assert(board.occupancy(Color.LIGHT) == 0xFFFF)
+        assert(board.occupancy(Color.DARK) == 0xFFFF << 48)
+        assert(board.pieces(Piece.KING, Color.DARK) == 1 << 60)
+        assert(board.white_king_square == (0, 4))
+        assert(_agrees(board))
+
+    @staticmethod
+    def test_attach_replaces():
+        board = Board(True)
+        board.attach('d4', WHITE_QUEEN)
+        board.attach('d4', BLACK_KNIGHT)
+        assert(board.pieces(Piece.QUEEN, Color.LIGHT) == 0)
+        assert(board.get_piece('d4') == BLACK_KNIGHT)
+        board.attach('d4', None)
+        assert(board.occupancy() == 0)
+
+    @staticmethod
+    def test_moves_keep_bitboards():
+        board = Board()
+        for start, end in [('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('g8', 'f6'),
+                           ('g1', 'f3'), ('c7', 'c5'), ('d5', 'c6'), ('b8', 'c6'),
+                           ('f1', 'c4'), ('e7', 'e6'), ('e1', 'g1')]:
+            assert(board.move(start, end))
+            assert(_agrees(board))
+        assert(board.get_piece('f1') == WHITE_ROOK)
+        assert(board.get_piece('c5') is None)
+
+    @staticmethod
+    def test_attack_tables():
+        assert(_KNIGHT_ATTACKS[0] == 1 << 10 | 1 << 17)
+        assert(_KING_ATTACKS[63] == 1 << 62 | 1 << 55 | 1 << 54)
+        assert(_PAWN_ATTACKS[0][8] == 1 << 17)
+        assert(_PAWN_ATTACKS[1][55] == 1 << 46)
+        for square in range(64):
+            assert(bin(_ROOK_RAYS[square]).count('1') == 14)
+        assert(bin(_BISHOP_RAYS[27]).count('1') == 13)
+
+    @staticmethod
+    def test_rows_are_read_only():
+        board = Board()
+        assert(board[0][4] == WHITE_KING)
+        with unittest.TestCase().assertRaises(TypeError):
+            board[0][4] = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import time
+import unittest
+
+from chessberry.chess import *
+from chessberry.engine import EngineWorker, _history
+from chessberry.search import MATE_SCORE, search
+
+
+def _wait(engine, seconds=30.0):
+    updates = []
+    deadline = time.perf_counter() + seconds
+    while engine.thinking and time.perf_counter() < deadline:
+        updates += engine.poll()
+        time.sleep(0.01)
+    return updates
+
+
+class TestEngine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = EngineWorker()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+
+    def test_streams_iterations_then_the_result(self):
+        board = Board.from_fen("7k/8/8/8/8/8/R7/1R4K1 w - - 0 1")
+        fen = board.fen()
+        job = self.engine.start(board, depth=3)
+        assert(board.fen() == fen)
+        updates = _wait(self.engine)
+        assert([update.result.depth for update in updates] == [1, 2, 3, 3])
+        assert(all(update.job == job for update in updates))
+        assert([update.final for update in updates] == [False, False, False, True])
+        assert(updates[-1].result.score == MATE_SCORE - 3)
+
+    def test_replays_the_moves_played(self):
+        board = Board()
+        for start, end in (("e2", "e4"), ("f7", "f6"), ("d2", "d4"), ("g7", "g5")):
+            board.move(start, end)
+        fen, moves = _history(board)
+        assert(fen == Board().fen() and len(moves) == 4)
+        self.engine.start(board, depth=2)
+        updates = _wait(self.engine)
+        assert(updates[-1].final)
+        assert(updates[-1].result.move == (to_indices("d1"), to_indices("h5"), None))
+
+    def test_waiting_for_a_promotion(self):
+        board = Board.from_fen("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        assert(board.move("a7", "a8"))
+        fen, moves = _history(board)
+        assert(moves == [(to_indices("a7"), to_indices("a8"), None)])
+        assert(board.hold_for_promotion and board.ledger[-1].promotion is None)
+        assert(board.get_piece("a8") == WHITE_PAWN)
+        try:
+            self.engine.start(board, depth=1)
+            assert(False)
+        except ValueError:
+            pass
+        assert(not self.engine.thinking)
+        assert(board.hold_for_promotion and board.get_piece("a8") == WHITE_PAWN)
+        assert(board.promote(Piece.QUEEN))
+        self.engine.start(board, depth=1)
+        updates = _wait(self.engine)
+        assert(updates[-1].final and updates[-1].result.move is not None)
+
+    def test_cancel_drops_the_search(self):
+        board = Board()
+        self.engine.start(board, time_limit=30.0)
+        time.sleep(0.2)
+        self.engine.cancel()
+        assert(not self.engine.thinking)
+        #  The next search runs at once, and nothing of the first comes back
+        job = self.engine.start(board, depth=1)
+        updates = _wait(self.engine, 5.0)
+        assert(updates and all(update.job == job for update in updates))
+        assert(updates[-1].final and updates[-1].result.depth == 1)
+
+
+class TestSearchHooks(unittest.TestCase):
+
+    @staticmethod
+    def test_progress_and_stopped():
+        board = Board()
+        seen = []
+        result = search(board, 3, progress=seen.append)
+        assert([entry.depth for entry in seen] == [1, 2, 3])
+        assert(seen[-1] == result._replace(nodes=seen[-1].nodes))
+        seen = []
+        result = search(board, 20, progress=seen.append, stopped=lambda: len(seen) >= 2)
+        #  Stopping is only looked at every so many nodes
+        assert(2 <= result.depth == len(seen) < 20)
+        assert(result == seen[-1]._replace(nodes=result.nodes))
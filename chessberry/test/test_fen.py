@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.fen import iter_fen_boards, iter_fen_records, parse_operations
+from chessberry.perft import perft
+
+INITIAL = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+SUITE = """# perft suite
+rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1 ;D1 20 ;D2 400
+
+r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - ;D1 48 ;D2 2039
+8/8/8/2k5/2pP4/8/B7/4K3 b - d3 0 3 ;D1 8
+rnbqkb1r/pppppppp/5n2/8/8/5N2/PPPPPPPP/RNBQKB1R w KQkq - bm e4; id "two \\"knights\\"";
+"""
+
+
+class TestFen(unittest.TestCase):
+
+    @staticmethod
+    def test_round_trip():
+        for fen in (
+            INITIAL,
+            "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+            "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 12 40",
+            "8/8/8/8/8/8/8/4K2k w - - 0 1",
+        ):
+            assert(Board.from_fen(fen).fen() == fen)
+        assert(Board.from_fen(INITIAL).hash == Board().hash)
+
+    @staticmethod
+    def test_state():
+        board = Board.from_fen("r3k2r/8/8/8/8/8/8/R3K2R b Kq - 12 40")
+        assert(board.turn == Color.DARK)
+        assert(board.ledger.castling_rights == WHITE_KINGSIDE | BLACK_QUEENSIDE)
+        assert(move_set('e8', board) == {(7, 3), (7, 5), (6, 3), (6, 4), (6, 5), (7, 2)})
+        board.move('e8', 'd8')
+        assert(board.fen() == "r2k3r/8/8/8/8/8/8/R3K2R w K - 13 41")
+        board.undo()
+        assert(board.fen() == "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 12 40")
+
+    @staticmethod
+    def test_enpassant():
+        fen = "8/8/8/2k5/2pP4/8/B7/4K3 b - d3 0 3"
+        board = Board.from_fen(fen)
+        #  Taking en passant removes the pawn giving check
+        assert(move_set('c4', board) == {(2, 3)})
+        assert(perft(board, 1) == 8)
+        board.move('c4', 'd3')
+        assert(board.get_piece('d4') is None)
+        board.undo()
+        assert(board.fen() == fen)
+
+    @staticmethod
+    def test_enpassant_rank():
+        for fen in (
+            "4k3/8/8/8/8/8/3P4/4K3 w - e3 0 1",
+            "4k3/3p4/8/8/8/8/8/4K3 b - e6 0 1",
+        ):
+            try:
+                Board.from_fen(fen)
+                assert(False)
+            except ValueError:
+                pass
+        board = Board.from_fen("4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1")
+        assert(board.fen() == "4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1")
+
+    @staticmethod
+    def test_malformed():
+        for fen in (
+            "",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1",
+        ):
+            try:
+                Board.from_fen(fen)
+                assert(False)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def test_rank_lengths():
+        for fen in (
+            "rnbqkbnrp/ppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR/8 w KQkq - 0 1",
+            "rnbqkbnr/pppppppp//8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        ):
+            try:
+                parse_fen(fen)
+                assert(False)
+            except ValueError:
+                pass
+        assert(Board.from_fen("8/8/8/8/8/8/8/4K2k w - - 0 1").fen() == "8/8/8/8/8/8/8/4K2k w - - 0 1")
+
+    @staticmethod
+    def test_operations():
+        assert(parse_operations('bm Nf3 e4; id "a; b"; c0 x;') == {
+            'bm': 'Nf3 e4',
+            'id': 'a; b',
+            'c0': 'x',
+        })
+
+
+class TestFenLoader(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".epd")
+        with os.fdopen(fd, "w") as f:
+            f.write(SUITE)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_records(self):
+        records = list(iter_fen_records(self.path))
+        assert(len(records) == 4)
+        record, operations = records[0]
+        assert(record.pieces[0] == 0xFF00 and record.pieces[11] == 1 << 60)
+        assert(record.turn == Color.LIGHT and record.castling_rights == 15)
+        assert(operations == {'D1': '20', 'D2': '400'})
+        record, operations = records[2]
+        assert(record.enpassant == 1 << 19 and (record.halfmoves, record.fullmove) == (0, 3))
+        assert(records[1][0].fullmove == 1)
+        assert(records[3][1]['bm'] == 'e4')
+
+    def test_boards(self):
+        for board, operations in iter_fen_boards(self.path):
+            for depth in (1, 2):
+                if 'D' + str(depth) in operations:
+                    assert(perft(board, depth) == int(operations['D' + str(depth)]))
+
+    def test_malformed_line(self):
+        with open(self.path, "a") as f:
+            f.write("8/8/8 w - -\n")
+        try:
+            list(iter_fen_records(self.path))
+            assert(False)
+        except ValueError as e:
+            assert(str(e).startswith("line 7: "))
+
+
+if __name__ == '__main__':
+    unittest.main()
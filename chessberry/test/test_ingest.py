@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.ingest import ingest_games, ingest_pgn_files, replay_game
+from chessberry.pgn import split_pgn_games
+
+GAMES = """[Event "Mate"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+
+[Event "Illegal"]
+[Result "*"]
+
+1. e4 e5 2. Ke3 *
+
+[Event "Open"]
+[Result "*"]
+
+1. e4 {a comment
+[that looks like a header]} c5 2. Nf3 *
+"""
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(fd, "w") as f:
+            f.write(GAMES * 4)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_split(self):
+        texts = list(split_pgn_games(self.path))
+        assert(len(texts) == 12)
+        assert(texts[2].startswith('[Event "Open"]'))
+        assert("[that looks like a header]" in texts[2])
+
+    def test_records_in_order(self):
+        records = list(ingest_pgn_files([self.path], workers=2, chunk_size=1))
+        assert([record.index for record in records] == list(range(12)))
+        mate, illegal, opening = records[0:3]
+        assert(mate.fen == "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+        assert(mate.plies == 4 and mate.error is None)
+        assert(mate.outcome == Outcome(Termination.CHECKMATE, Color.DARK))
+        assert(illegal.fen is None and illegal.plies == 2)
+        assert(illegal.error == "illegal move Ke3")
+        assert(opening.headers["Event"] == "Open")
+        assert(opening.fen == "rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2")
+        assert(opening.outcome is None and illegal.outcome is None)
+
+    @staticmethod
+    def test_malformed_fen_header():
+        record = replay_game(0, '[FEN "rnbqkbnrp/ppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"]\n\n1. e4 *\n')
+        assert(record.fen is None and record.plies == 0)
+        assert(record.error.startswith("not a fen position"))
+
+    def test_workers_agree(self):
+        texts = list(split_pgn_games(self.path))
+        assert(
+            list(ingest_games(texts, workers=1, chunk_size=5))
+            == list(ingest_games(texts, workers=3, chunk_size=2))
+        )
+
+    @staticmethod
+    def test_fen():
+        board = Board()
+        assert(board.fen() == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        board.move('e2', 'e4')
+        assert(board.fen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+        board.move('e7', 'e5')
+        board.move('e1', 'e2')
+        assert(board.fen() == "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPPKPPP/RNBQ1BNR b kq - 1 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
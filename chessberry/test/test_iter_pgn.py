@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.pgn import iter_pgn_games
+
+GAMES = os.path.join(os.path.dirname(__file__), "games")
+
+MULTI_GAME = """[Event "First"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 {King's pawn; a comment
+spanning lines} e5 (1... c5 2. Nf3 (2. c3) d6) 2. Qh5?! Nc6 $6 3. Bc4 Nf6??
+4. Qxf7# 1-0
+
+% an escaped line
+[Event "Second"]
+[White "C \\"the quote\\""]
+[Black "D"]
+[Result "0-1"]
+
+1.f3 e5 2.g4 Qh4# 0-1
+[Event "Third"]
+[Result "*"]
+
+1. e4 d5 2. exd5 Nf6 3. d4 Nxd5 4. c4 Nb6 5. c5 Nd5 6. Bc4 c6 7. Bxd5 cxd5
+8. Qb3 e6 9. Nc3 Be7 10. Nxd5 exd5 11. Qxd5 O-O 12. Qxd8 Rxd8 13. Nf3 a5 14. c6 a4
+15. cxb7 a3 16. bxc8=N axb2 17. Ne7+ Kf8 18. Nc6 bxa1=Q *
+"""
+
+
+class TestIterPgn(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(fd, "w") as f:
+            f.write(MULTI_GAME)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_multiple_games(self):
+        games = list(iter_pgn_games(self.path))
+        assert(len(games) == 3)
+        assert(games[0].headers["Event"] == "First")
+        assert(games[0].moves == ['e4', 'e5', 'Qh5?!', 'Nc6', 'Bc4', 'Nf6??', 'Qxf7#'])
+        assert(games[0].result == "1-0")
+        assert(games[1].headers["White"] == 'C "the quote"')
+        assert(games[1].result == "0-1")
+        assert(len(games[1]) == 4)
+
+    def test_replay(self):
+        games = iter_pgn_games(self.path)
+        board = next(games).board()
+        assert(board.get_piece('f7') == WHITE_QUEEN)
+        board = next(games).board()
+        assert(board.get_piece('h4') == BLACK_QUEEN)
+        board = next(games).board()
+        assert(board.get_piece('a1') == BLACK_QUEEN)
+        assert(board.get_piece('c6') == WHITE_KNIGHT)
+        assert(board.turn == Color.LIGHT)
+
+    def test_replay_is_lazy(self):
+        game = next(iter_pgn_games(self.path))
+        boards = game.replay()
+        assert(next(boards).get_piece('e4') == WHITE_PAWN)
+        assert(next(boards).get_piece('e5') == BLACK_PAWN)
+
+    @staticmethod
+    def test_illegal_move():
+        fd, path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(fd, "w") as f:
+            f.write('[Event "Bad"]\n\n1. e4 e5 2. Ke3 *\n')
+        game = next(iter_pgn_games(path))
+        os.remove(path)
+        with unittest.TestCase().assertRaises(ValueError):
+            game.board()
+
+    @staticmethod
+    def test_recorded_game():
+        path = os.path.join(GAMES, "ct-2863-2675-2020.4.7.pgn")
+        games = list(iter_pgn_games(path))
+        assert(len(games) == 1)
+        assert(games[0].headers["White"] == "Carlsen, Magnus")
+        board = games[0].board()
+        assert(board.get_piece('d7') == WHITE_KNIGHT)
+        assert(board.get_piece('f8') == BLACK_ROOK)
+        assert(len(board.ledger) == 87)
+
+
+if __name__ == '__main__':
+    unittest.main()
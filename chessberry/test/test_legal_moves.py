@@ -0,0 +1,99 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.test import tools
+
+
+def _alg_moves(board):
+    return {from_indices(start) + from_indices(end) for start, end in legal_moves(board)}
+
+
+class TestLegalMoves(unittest.TestCase):
+
+    @staticmethod
+    def test_initial_position():
+        board = Board()
+        assert(len(legal_moves(board)) == 20)
+        assert('g1f3' in _alg_moves(board))
+
+    @staticmethod
+    def test_agrees_with_move_set():
+        board = tools.from_placement(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R"
+        )
+        per_square = set()
+        for rank, row in enumerate(board):
+            for file, piece in enumerate(row):
+                if piece is not None and piece.color == board.turn:
+                    start = from_indices((rank, file))
+                    for end in move_set(start, board):
+                        per_square.add(start + from_indices(end))
+        assert(per_square == _alg_moves(board))
+
+    @staticmethod
+    def test_double_check_only_king_moves():
+        board = Board(True)
+        board.attach('e1', WHITE_KING)
+        board.attach('d1', WHITE_QUEEN)
+        board.attach('e8', BLACK_ROOK)
+        board.attach('d3', BLACK_KNIGHT)
+        assert(_alg_moves(board) == {'e1d2', 'e1f1'})
+
+    @staticmethod
+    def test_check_blocked_or_captured():
+        board = Board(True)
+        board.attach('e1', WHITE_KING)
+        board.attach('a4', WHITE_ROOK)
+        board.attach('h8', WHITE_BISHOP)
+        board.attach('e8', BLACK_ROOK)
+        moves = _alg_moves(board)
+        assert('a4e4' in moves)
+        assert('a4a5' not in moves)
+        assert('h8e8' not in moves)
+        assert('e1e2' not in moves)
+
+    @staticmethod
+    def test_pinned_piece_moves_along_pin():
+        board = Board(True)
+        board.attach('e1', WHITE_KING)
+        board.attach('e3', WHITE_ROOK)
+        board.attach('e7', BLACK_QUEEN)
+        assert(tools.to_alg_set(move_set('e3', board)) == {'e2', 'e4', 'e5', 'e6', 'e7'})
+
+    @staticmethod
+    def test_enpassant_exposes_king_on_rank():
+        board = Board(True, Color.DARK)
+        board.attach('a5', WHITE_KING)
+        board.attach('b5', WHITE_PAWN)
+        board.attach('h5', BLACK_ROOK)
+        board.attach('c7', BLACK_PAWN)
+        board.attach('h8', BLACK_KING)
+        board.move('c7', 'c5')
+        assert('b5c6' not in _alg_moves(board))
+
+    @staticmethod
+    def test_enpassant_captures_checker():
+        board = Board(True, Color.DARK)
+        board.attach('e4', WHITE_KING)
+        board.attach('e5', WHITE_PAWN)
+        board.attach('d7', BLACK_PAWN)
+        board.attach('h8', BLACK_KING)
+        board.move('d7', 'd5')
+        assert('e5d6' in _alg_moves(board))
+
+    @staticmethod
+    def test_no_castle_through_attack():
+        board = Board(True)
+        board.attach('e1', WHITE_KING)
+        board.attach('h1', WHITE_ROOK)
+        board.attach('a1', WHITE_ROOK)
+        board.attach('e8', BLACK_KING)
+        board.attach('h3', BLACK_BISHOP)
+        board.attach('b8', BLACK_ROOK)
+        moves = _alg_moves(board)
+        assert('e1g1' not in moves)
+        assert('e1c1' in moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
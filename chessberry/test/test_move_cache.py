@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from chessberry.chess import *
+
+
+class TestMoveCache(unittest.TestCase):
+
+    def setUp(self):
+        move_cache_clear()
+
+    def tearDown(self):
+        set_move_cache_size(4096)
+        move_cache_clear()
+
+    @staticmethod
+    def test_hits_on_the_same_position():
+        board = Board()
+        start, end, _ = board.parse_san("Nf3")
+        info = move_cache_info()
+        assert(info.hits == 0 and info.misses == 1 and info.currsize == 1)
+        #  Board.move checks the move parse_san just found
+        assert(board.move(from_indices(start), from_indices(end)))
+        info = move_cache_info()
+        assert(info.hits == 1 and info.misses == 1)
+        #  The position changed, so its moves are looked up anew
+        assert(move_set("g8", board) == {to_indices("f6"), to_indices("h6")})
+        assert(move_cache_info().misses == 2)
+
+    @staticmethod
+    def test_follows_the_board():
+        board = Board.from_fen("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1")
+        assert(to_indices("g1") in move_set("e1", board))
+        board.attach("h1", None)
+        assert(to_indices("g1") not in move_set("e1", board))
+        board.attach("h1", WHITE_ROOK)
+        assert(to_indices("g1") in move_set("e1", board))
+        board.move("a1", "a2")
+        board.move("e8", "d8")
+        board.move("a2", "a1")
+        board.move("d8", "e8")
+        #  The same squares, but the queenside right is gone
+        assert(to_indices("c1") not in move_set("e1", board))
+        assert(move_cache_info().hits >= 1)
+
+    @staticmethod
+    def test_bounded_and_agrees_with_no_cache():
+        rng = random.Random(5)
+        set_move_cache_size(64)
+        for _ in range(20):
+            board = Board()
+            for _ in range(40):
+                moves = legal_moves(board)
+                if not moves:
+                    break
+                names = [from_indices(divmod(square, 8)) for square in range(64)]
+                set_move_cache_size(0)
+                expected = [move_set(name, board) for name in names]
+                set_move_cache_size(64)
+                for _ in range(2):
+                    assert([move_set(name, board) for name in names] == expected)
+                board.push(*rng.choice(moves))
+        info = move_cache_info()
+        assert(info.currsize <= 64 and info.maxsize == 64)
+        assert(info.hits > 0 and info.misses > 0)
+        set_move_cache_size(0)
+        assert(move_cache_info().currsize == 0)
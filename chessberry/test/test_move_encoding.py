@@ -0,0 +1,77 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.test import tools
+
+
+class TestMoveEncoding(unittest.TestCase):
+
+    @staticmethod
+    def test_round_trip():
+        for start in range(64):
+            for end in (0, 27, 63):
+                for flags in (MOVE_QUIET, MOVE_DOUBLE_PAWN_PUSH, MOVE_CAPTURE, MOVE_ENPASSANT):
+                    move = encode_move(start, end, flags)
+                    assert(move < 1 << 16)
+                    assert(decode_move(move) == (start, end, flags, None))
+        for promotion in PROMOTION_PIECES:
+            move = encode_move(52, 61, MOVE_CAPTURE, promotion)
+            start, end, flags, piece = decode_move(move)
+            assert((start, end, piece) == (52, 61, promotion))
+            assert(flags & MOVE_CAPTURE and flags & MOVE_PROMOTION)
+
+    @staticmethod
+    def test_ledger_codes():
+        board = Board()
+        for start, end in [('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('e7', 'e5'),
+                           ('d5', 'e6'), ('g8', 'f6'), ('g1', 'f3'), ('f8', 'c5'),
+                           ('f1', 'e2'), ('e8', 'g8')]:
+            assert(board.move(start, end))
+        flags = [decode_move(board.ledger.move_code(i))[2] for i in range(len(board.ledger))]
+        assert(flags == [MOVE_DOUBLE_PAWN_PUSH, MOVE_DOUBLE_PAWN_PUSH, MOVE_CAPTURE,
+                         MOVE_DOUBLE_PAWN_PUSH, MOVE_ENPASSANT, MOVE_QUIET, MOVE_QUIET,
+                         MOVE_QUIET, MOVE_QUIET, MOVE_KING_CASTLE])
+        assert(board.ledger[4].enpassant and board.ledger[4].capture)
+        assert(board.ledger[9].castle and board.ledger[9].piece == BLACK_KING)
+        assert(board.ledger[9].start == (7, 4) and board.ledger[9].end == (7, 6))
+        assert(board.ledger.moved_piece(-1) == BLACK_KING)
+
+    @staticmethod
+    def test_promotion_recorded():
+        board = tools.from_placement("1r2k3/P7/8/8/8/8/8/4K3")
+        board.move('a7', 'b8')
+        assert(board.hold_for_promotion)
+        assert(board.promote(Piece.ROOK))
+        assert(decode_move(board.ledger.move_code(-1))[3] == Piece.ROOK)
+        move = board.pop()
+        assert(move.promotion and move.capture and move.piece == WHITE_PAWN)
+        board.push((6, 0), (7, 0), Piece.BISHOP)
+        assert(decode_move(board.ledger.move_code(-1)) == (48, 56, MOVE_PROMOTION | 1, Piece.BISHOP))
+
+
+    @staticmethod
+    def test_pending_promotion_has_no_piece():
+        board = tools.from_placement("4k3/P7/8/8/8/8/8/4K3")
+        assert(board.move('a7', 'a8'))
+        assert(board.hold_for_promotion)
+        assert(board.ledger[-1].promotion is None)
+        assert(not board.ledger[-1].capture)
+        assert(decode_move(board.ledger.move_code(-1)) == (48, 56, MOVE_PENDING_PROMOTION, None))
+        assert(board.promote(Piece.KNIGHT))
+        assert(board.ledger[-1].promotion == Piece.KNIGHT)
+        assert(decode_move(board.ledger.move_code(-1)) == (48, 56, MOVE_PROMOTION, Piece.KNIGHT))
+        move = board.pop()
+        assert(move.promotion == Piece.KNIGHT and not move.capture)
+
+        board = tools.from_placement("1r2k3/P7/8/8/8/8/8/4K3")
+        assert(board.move('a7', 'b8'))
+        assert(board.ledger[-1].promotion is None and board.ledger[-1].capture)
+        assert(decode_move(board.ledger.move_code(-1)) == (48, 57, MOVE_PENDING_PROMOTION_CAPTURE, None))
+        assert(board.promote(Piece.QUEEN))
+        assert(decode_move(board.ledger.move_code(-1)) == (48, 57, MOVE_PROMOTION | MOVE_CAPTURE | 3, Piece.QUEEN))
+        board.undo()
+        assert(board.get_piece('b8') == BLACK_ROOK and board.get_piece('a7') == WHITE_PAWN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.openings import OpeningIndex, build_opening_index
+
+GAMES = """[Event "One"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 1-0
+
+[Event "Two"]
+[Result "1/2-1/2"]
+
+1. e4 c5 2. Nf3 d6 1/2-1/2
+
+[Event "Three"]
+[Result "0-1"]
+
+1. d4 d5 2. c4 e6 0-1
+
+[Event "Four"]
+[Result "*"]
+
+1. e4 e5 2. Ke3 Nc6 *
+
+[Event "Set up"]
+[SetUp "1"]
+[FEN "4k3/8/8/8/8/8/8/4K2R w K - 0 1"]
+[Result "1-0"]
+
+1. O-O Kd7 1-0
+"""
+
+
+class TestOpenings(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.pgn = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(fd, "w") as f:
+            f.write(GAMES)
+        fd, self.index = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.pgn)
+        os.remove(self.index)
+
+    def test_lookup(self):
+        records = build_opening_index([self.pgn], self.index)
+        with OpeningIndex(self.index) as index:
+            assert(len(index) == records)
+            board = Board()
+            first = index.lookup(board)
+            assert([entry.move for entry in first] == [((1, 4), (3, 4), None), ((1, 3), (3, 3), None)])
+            assert(first[0][1:] == (3, 1, 1, 0))
+            assert(first[1][1:] == (1, 0, 0, 1))
+
+            board.move('e2', 'e4')
+            replies = {entry.move: entry[1:] for entry in index.lookup(board)}
+            assert(replies == {((6, 4), (4, 4), None): (2, 1, 0, 0), ((6, 2), (4, 2), None): (1, 0, 1, 0)})
+            board.move('e7', 'e5')
+            #  The illegal Ke3 ends game four
+            assert([entry.move for entry in index.lookup(board.hash)] == [((0, 6), (2, 5), None)])
+            board.move('g1', 'f3')
+            board.move('b8', 'c6')
+            assert(index.lookup(board)[0][1:] == (1, 1, 0, 0))
+            board.move('f1', 'b5')
+            assert(index.lookup(board) == [])
+            assert(index.lookup(Board.from_fen("4k3/8/8/8/8/8/8/4K2R w K - 0 1")) == [])
+
+    def test_runs_and_plies(self):
+        records = build_opening_index([self.pgn], self.index)
+        with open(self.index, "rb") as f:
+            whole = f.read()
+        assert(build_opening_index([self.pgn], self.index, run_size=1) == records)
+        with open(self.index, "rb") as f:
+            assert(f.read() == whole)
+        assert(build_opening_index([self.pgn, self.pgn], self.index, max_plies=1) == 2)
+        with OpeningIndex(self.index) as index:
+            assert(index.lookup(Board())[0][1:] == (6, 2, 2, 0))
+
+    def test_not_an_index(self):
+        with self.assertRaises(ValueError):
+            OpeningIndex(self.pgn)
+
+
+if __name__ == '__main__':
+    unittest.main()
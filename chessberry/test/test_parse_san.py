@@ -0,0 +1,75 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.test import tools
+
+
+def _san(board, san):
+    start, end, promotion = board.parse_san(san)
+    return from_indices(start) + from_indices(end), promotion
+
+
+class TestParseSan(unittest.TestCase):
+
+    @staticmethod
+    def test_pawns():
+        board = Board()
+        assert(_san(board, 'e4') == ('e2e4', None))
+        assert(_san(board, 'e3') == ('e2e3', None))
+        board.move('e2', 'e4')
+        board.move('d7', 'd5')
+        assert(_san(board, 'exd5') == ('e4d5', None))
+        board.move('e4', 'e5')
+        board.move('f7', 'f5')
+        assert(_san(board, 'exf6') == ('e5f6', None))
+        assert(_san(board, 'e6') == ('e5e6', None))
+
+    @staticmethod
+    def test_promotion():
+        board = tools.from_placement("1r2k3/P7/8/8/8/8/8/4K3")
+        assert(_san(board, 'a8=Q') == ('a7a8', Piece.QUEEN))
+        assert(_san(board, 'axb8=N+') == ('a7b8', Piece.KNIGHT))
+        assert(_san(board, 'a8') == ('a7a8', Piece.QUEEN))
+
+    @staticmethod
+    def test_disambiguation():
+        board = tools.from_placement("4k3/8/8/8/R6R/8/8/R3K3")
+        assert(_san(board, 'Rhd4') == ('h4d4', None))
+        assert(_san(board, 'R4a2') == ('a4a2', None))
+        assert(_san(board, 'R1a2') == ('a1a2', None))
+        assert(_san(board, 'Rb1') == ('a1b1', None))
+        for san in ('Rd4', 'Ra2', 'Ra3'):
+            try:
+                board.parse_san(san)
+                assert(False)
+            except ValueError as e:
+                assert(str(e) == 'ambiguous move ' + san)
+
+    @staticmethod
+    def test_pinned_piece_is_not_a_candidate():
+        board = tools.from_placement("4k3/8/8/8/8/8/8/1N2K1Nr")
+        #  The g1 knight is pinned, so Nd2 and Ne2 name the b1 knight alone
+        assert(_san(board, 'Nd2') == ('b1d2', None))
+        try:
+            board.parse_san('Nf3')
+            assert(False)
+        except ValueError as e:
+            assert(str(e) == 'illegal move Nf3')
+
+    @staticmethod
+    def test_castle_and_annotations():
+        board = tools.from_placement("r3k2r/8/8/8/8/8/8/R3K2R")
+        assert(_san(board, 'O-O') == ('e1g1', None))
+        assert(_san(board, '0-0-0+') == ('e1c1', None))
+        assert(_san(board, 'Rxa8+!?') == ('a1a8', None))
+        board.push(*board.parse_san('Kd1'))
+        assert(_san(board, 'O-O-O') == ('e8c8', None))
+        try:
+            board.parse_san('Qd4')
+            assert(False)
+        except ValueError as e:
+            assert(str(e) == 'illegal move Qd4')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.perft import perft, divide
+from chessberry.test import tools
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R"
+ENDGAME = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8"
+PROMOTIONS = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1"
+CASTLE_INTO_CHECK = "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R"
+
+
+class TestPerft(unittest.TestCase):
+
+    @staticmethod
+    def test_initial_position():
+        board = Board()
+        assert(perft(board, 0) == 1)
+        assert(perft(board, 1) == 20)
+        assert(perft(board, 2) == 400)
+        assert(perft(board, 3) == 8902)
+
+    @staticmethod
+    def test_divide():
+        counts = divide(Board(), 2)
+        assert(len(counts) == 20)
+        assert(counts['e2e4'] == 20)
+        assert(sum(counts.values()) == 400)
+
+    @staticmethod
+    def test_kiwipete():
+        board = tools.from_placement(KIWIPETE)
+        assert(perft(board, 1) == 48)
+        assert(perft(board, 2) == 2039)
+        assert(perft(board, 3) == 97862)
+
+    @staticmethod
+    def test_enpassant_discovered_check():
+        board = tools.from_placement(ENDGAME)
+        assert(perft(board, 1) == 14)
+        assert(perft(board, 2) == 191)
+        assert(perft(board, 3) == 2812)
+
+    @staticmethod
+    def test_promotions():
+        board = tools.from_placement(PROMOTIONS)
+        assert(perft(board, 1) == 6)
+        assert(perft(board, 2) == 264)
+
+    @staticmethod
+    def test_castle_into_check():
+        board = tools.from_placement(CASTLE_INTO_CHECK)
+        assert(perft(board, 1) == 44)
+        assert(perft(board, 2) == 1486)
+
+
+if __name__ == '__main__':
+    unittest.main()
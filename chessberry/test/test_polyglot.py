@@ -0,0 +1,105 @@
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.polyglot import BookMove, PolyglotBook, polyglot_key
+
+#  The test positions of the Polyglot specification and their keys
+KEYS = [
+    ([], 0x463B96181691FC9C),
+    (['e2e4'], 0x823C9B50FD114196),
+    (['e2e4', 'd7d5'], 0x0756B94461C50FB0),
+    (['e2e4', 'd7d5', 'e4e5'], 0x662FAFB965DB29D4),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5'], 0x22A48B5A8E47FF78),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2'], 0x652A607CA3F242C1),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2', 'e8f7'], 0x00FDD303C946BDD9),
+    (['a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4'], 0x3C8123EA7B067637),
+    (['a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4', 'b4c3', 'a1a3'], 0x5C3F9B829B279560),
+]
+
+
+def _play(moves):
+    board = Board()
+    for move in moves:
+        assert(board.move(move[:2], move[2:]))
+    return board
+
+
+def _entry(key, start, end, weight, promotion=0):
+    start, end = to_indices(start), to_indices(end)
+    move = end[1] | end[0] << 3 | start[1] << 6 | start[0] << 9 | promotion << 12
+    return struct.pack(">QHHI", key, move, weight, 0)
+
+
+class TestPolyglot(unittest.TestCase):
+
+    def setUp(self):
+        castle = Board.from_fen("4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+        promote = Board.from_fen("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        entries = [
+            _entry(KEYS[0][1], 'e2', 'e4', 10),
+            _entry(KEYS[0][1], 'd2', 'd4', 30),
+            _entry(KEYS[0][1], 'e2', 'e5', 99),
+            _entry(KEYS[0][1], 'g1', 'f3', 0),
+            _entry(KEYS[1][1], 'c7', 'c5', 5),
+            _entry(polyglot_key(castle), 'e1', 'h1', 1),
+            _entry(polyglot_key(promote), 'a7', 'a8', 1, 4),
+        ]
+        entries.sort()
+        fd, self.path = tempfile.mkstemp(suffix=".bin")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"".join(entries))
+        self.castle, self.promote = castle, promote
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @staticmethod
+    def test_keys():
+        for moves, key in KEYS:
+            assert(polyglot_key(_play(moves)) == key)
+        assert(polyglot_key(Board.from_fen(Board().fen())) == KEYS[0][1])
+
+    def test_moves(self):
+        with PolyglotBook(self.path) as book:
+            assert(len(book) == 7)
+            #  e2e5 is not legal, as from a key collision
+            assert(book.moves(Board()) == [
+                BookMove('d2', 'd4', None, 30, 0),
+                BookMove('e2', 'e4', None, 10, 0),
+                BookMove('g1', 'f3', None, 0, 0),
+            ])
+            assert(book.moves(_play(['e2e4']))[0][:2] == ('c7', 'c5'))
+            assert(book.moves(_play(['d2d4'])) == [])
+            castle = book.moves(self.castle)[0]
+            assert(castle[:2] == ('e1', 'g1'))
+            assert(self.castle.move(castle.start, castle.end, castle.promotion))
+            assert(self.castle.piece_at(5) == WHITE_ROOK)
+            promotion = book.moves(self.promote)[0]
+            assert(promotion.promotion == Piece.QUEEN)
+            assert(self.promote.move(promotion.start, promotion.end, promotion.promotion))
+
+    def test_choose(self):
+        rng = random.Random(0)
+        with PolyglotBook(self.path) as book:
+            chosen = [book.choose(Board(), rng).start for _ in range(200)]
+            assert(set(chosen) == {'d2', 'e2'})
+            assert(chosen.count('d2') > chosen.count('e2'))
+            assert(book.choose(_play(['d2d4']), rng) is None)
+
+    @staticmethod
+    def test_empty_book():
+        fd, path = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        try:
+            with PolyglotBook(path) as book:
+                assert(len(book) == 0 and book.moves(Board()) == [])
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from chessberry import chess, pgn, profiling
+from chessberry.chess import *
+
+
+class TestProfiling(unittest.TestCase):
+
+    @staticmethod
+    def test_counts():
+        original = chess.move_set
+        with profiling.profile() as stats:
+            board = Board()
+            board.move('e2', 'e4')
+            board.move('e7', 'e5')
+            board.move('g1', 'f3')
+            chess.legal_moves(board)
+            game = pgn.parse_pgn_game("1. e4 e5 2. Nf3 *")
+            for _ in game.replay():
+                pass
+        assert(stats.calls('Board.move') == 3)
+        assert(stats.calls('move_set') == 3)
+        assert(stats.calls('legal_moves') == 1)
+        assert(stats.calls('_knight_move_set') > 0)
+        assert(stats.calls('Board.parse_san') == 3)
+        assert(stats.calls('parse_pgn_game') == 1)
+        assert(stats.seconds('Board.move') >= stats.seconds('move_set') > 0)
+        assert(stats.table().splitlines()[0].split()[:2] == ['function', 'calls'])
+        assert(json.loads(stats.to_json())['Board.move']['calls'] == 3)
+
+        #  Nothing stays wrapped afterwards
+        assert(chess.move_set is original)
+        assert(chess._piece_dispatch_table[Piece.PAWN] is chess._pawn_move_set)
+        Board().move('e2', 'e4')
+        assert(stats.calls('Board.move') == 3)
+
+    @staticmethod
+    def test_nested():
+        with profiling.profile() as outer:
+            Board().move('e2', 'e4')
+            with profiling.profile() as inner:
+                Board().move('d2', 'd4')
+            Board().move('c2', 'c4')
+        assert(outer.calls('Board.move') == 3)
+        assert(inner.calls('Board.move') == 1)
+
+    @staticmethod
+    def test_environment():
+        environment = dict(os.environ, CHESSBERRY_PROFILE="json")
+        done = subprocess.run(
+            [sys.executable, "-c", "from chessberry.chess import *; Board().move('e2', 'e4')"],
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert(json.loads(done.stderr)['Board.move']['calls'] == 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from chessberry.chess import *
+from chessberry.search import MATE_SCORE, evaluate, search
+
+
+class TestSearch(unittest.TestCase):
+
+    @staticmethod
+    def test_mate_in_one():
+        board = Board.from_fen("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4")
+        result = search(board, 3)
+        assert(result.move == (to_indices('h5'), to_indices('f7'), None))
+        assert(result.score == MATE_SCORE - 1)
+
+    @staticmethod
+    def test_mate_in_two():
+        board = Board.from_fen("7k/8/8/8/8/8/R7/1R4K1 w - - 0 1")
+        result = search(board, 3)
+        assert(result.score == MATE_SCORE - 3)
+        assert(len(result.pv) == 3)
+        for move in result.pv:
+            assert(board.san(*move))
+            board.push(*move)
+        assert(len(legal_moves(board)) == 0)
+
+    @staticmethod
+    def test_wins_material():
+        board = Board.from_fen("4k3/8/8/3q4/8/8/3R4/3K4 w - - 0 1")
+        result = search(board, 2)
+        assert(result.move == (to_indices('d2'), to_indices('d5'), None))
+        assert(result.score > 0)
+
+    @staticmethod
+    def test_stalemate():
+        board = Board.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        result = search(board, 3)
+        assert(result.move is None and result.score == 0)
+
+    @staticmethod
+    def test_budget_leaves_board_unchanged():
+        board = Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        fen, key = board.fen(), board.hash
+        result = search(board, 20, nodes=2000)
+        assert(result.nodes < 2000 + 1024)
+        assert(result.move in {(start, end, None) for start, end in legal_moves(board)})
+        assert((board.fen(), board.hash) == (fen, key))
+        result = search(board, 20, time_limit=0.0)
+        assert(result.move is not None)
+        assert((board.fen(), board.hash) == (fen, key))
+
+    @staticmethod
+    def test_evaluate_is_symmetric():
+        board = Board()
+        assert(evaluate(board) == 0)
+        board = Board.from_fen("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+        assert(evaluate(board) > 900)
+        board = Board.from_fen("4k3/8/8/8/8/8/8/3QK3 b - - 0 1")
+        assert(evaluate(board) < -900)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.search import MATE_SCORE, search
+from chessberry.tablebase import Tablebase, TableResult, generate, verify
+
+
+class TestTablebase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.written = generate("KQK", cls.directory)
+        cls.tablebase = Tablebase(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        shutil.rmtree(cls.directory)
+
+    def test_generate(self):
+        assert(self.written == ["KQvK"])
+        assert(os.path.exists(self.tablebase.path("KQK")))
+        assert(generate("KQvK", self.directory) == [])
+
+    def test_probe(self):
+        def probe(fen):
+            return self.tablebase.probe(Board.from_fen(fen))
+
+        assert(probe("k7/8/1K6/8/8/8/7Q/8 w - - 0 1") == TableResult(1, 1))
+        assert(probe("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1") == TableResult(-1, 0))
+        assert(probe("k7/8/1Q6/8/8/8/8/K7 b - - 0 1") == TableResult(0, 0))
+        #  The king takes the queen
+        assert(probe("k7/1Q6/8/8/8/8/8/K7 b - - 0 1") == TableResult(0, 0))
+        #  The same with the colors swapped
+        assert(probe("K7/8/1k6/8/8/8/7q/8 b - - 0 1") == TableResult(1, 1))
+        assert(probe("K7/1q6/1k6/8/8/8/8/8 w - - 0 1") == TableResult(-1, 0))
+        assert(probe("8/8/8/3k4/8/8/8/KQ6 w - - 0 1").outcome == 1)
+        assert(probe("8/8/8/3k4/8/8/8/KB6 w - - 0 1") == TableResult(0, 0))
+        assert(probe("8/8/8/3k4/8/8/8/KR6 w - - 0 1") is None)
+        assert(self.tablebase.probe(Board()) is None)
+
+    def test_longest_mate(self):
+        with open(self.tablebase.path("KQK"), "rb") as f:
+            #  Mate in ten from white's move, so twenty plies from black's
+            assert(max(f.read()[6:]) - 1 == 20)
+
+    def test_matches_board(self):
+        assert(verify(self.tablebase, "KQK", samples=300) == 300)
+
+    def test_search(self):
+        board = Board.from_fen("8/8/8/3k4/8/8/8/KQ6 w - - 0 1")
+        plies = self.tablebase.probe(board).plies
+        result = search(board, 1, tablebase=self.tablebase)
+        assert(result.score == MATE_SCORE - plies)
+        board.push(*result.move)
+        assert(self.tablebase.probe(board) == TableResult(-1, plies - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
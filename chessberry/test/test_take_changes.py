@@ -0,0 +1,44 @@
+import unittest
+
+from chessberry.chess import *
+
+
+def _squares(*names):
+    return sorted(to_indices(name)[0] * 8 + to_indices(name)[1] for name in names)
+
+
+class TestTakeChanges(unittest.TestCase):
+
+    @staticmethod
+    def test_moves():
+        board = Board()
+        assert(len(board.take_changes()) == 32)
+        assert(board.take_changes() == [])
+        board.move('e2', 'e4')
+        assert(board.take_changes() == _squares('e2', 'e4'))
+        board.move('d7', 'd5')
+        board.move('e4', 'd5')
+        assert(board.take_changes() == _squares('d7', 'd5', 'e4'))
+        board.pop()
+        assert(board.take_changes() == _squares('d5', 'e4'))
+
+    @staticmethod
+    def test_castle_enpassant_and_promotion():
+        board = Board.from_fen("4k3/1P6/8/8/3Pp3/8/8/4K2R b K d3 0 1")
+        board.take_changes()
+        board.move('e4', 'd3')
+        assert(board.take_changes() == _squares('e4', 'd3', 'd4'))
+        board.move('e1', 'g1')
+        assert(board.take_changes() == _squares('e1', 'f1', 'g1', 'h1'))
+        board.move('e8', 'd7')
+        board.take_changes()
+        board.move('b7', 'b8')
+        assert(board.take_changes() == _squares('b7', 'b8'))
+        board.promote(Piece.QUEEN)
+        assert(board.take_changes() == _squares('b8'))
+        board.attach('a1', WHITE_ROOK)
+        assert(board.take_changes() == _squares('a1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
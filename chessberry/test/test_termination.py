@@ -0,0 +1,101 @@
+import unittest
+
+from chessberry.chess import *
+
+
+def _play(board, moves):
+    for start, end in moves:
+        assert(board.move(start, end))
+
+
+KNIGHTS_OUT_AND_BACK = (("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8"))
+
+
+class TestTermination(unittest.TestCase):
+
+    @staticmethod
+    def test_checkmate():
+        board = Board()
+        _play(board, (("f2", "f3"), ("e7", "e5"), ("g2", "g4"), ("d8", "h4")))
+        assert(board.is_check() and board.is_checkmate())
+        assert(board.outcome() == Outcome(Termination.CHECKMATE, Color.DARK))
+        assert(board.result() == "0-1")
+        board.undo()
+        assert(not board.is_check() and board.outcome() is None)
+        assert(board.result() == "*")
+
+    @staticmethod
+    def test_stalemate():
+        board = Board.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        assert(board.is_stalemate() and not board.is_checkmate())
+        assert(board.outcome() == Outcome(Termination.STALEMATE, None))
+        assert(board.result() == "1/2-1/2")
+
+    @staticmethod
+    def test_threefold_repetition():
+        board = Board()
+        assert(board.repetitions == 1)
+        _play(board, KNIGHTS_OUT_AND_BACK)
+        assert(board.repetitions == 2 and not board.is_threefold_repetition())
+        _play(board, KNIGHTS_OUT_AND_BACK)
+        assert(board.repetitions == 3)
+        assert(board.outcome() == Outcome(Termination.THREEFOLD_REPETITION, None))
+        board.undo()
+        assert(board.repetitions == 2 and board.outcome() is None)
+        board.undo()
+        board.undo()
+        board.undo()
+        assert(board.repetitions == 2)
+
+    @staticmethod
+    def test_repetition_needs_the_same_rights():
+        #  The king going out and back loses the castling rights, so the
+        #  position it comes back to is a new one
+        board = Board.from_fen("4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+        for _ in range(2):
+            _play(board, (("e1", "f1"), ("e8", "f8"), ("f1", "e1"), ("f8", "e8")))
+        assert(board.repetitions == 2)
+
+    @staticmethod
+    def test_promotion_is_counted_once_promoted():
+        board = Board.from_fen("8/P6k/8/8/8/8/8/K7 w - - 0 1")
+        key = board.hash
+        assert(board.move("a7", "a8"))
+        assert(board.repetitions == 1)
+        assert(board.promote(Piece.QUEEN))
+        assert(board.repetitions == 1 and board.halfmoves == 0)
+        board.undo()
+        assert(board.hash == key and board.repetitions == 1)
+
+    @staticmethod
+    def test_fifty_moves():
+        board = Board.from_fen("8/8/4k3/8/8/8/4KR2/8 w - - 98 80")
+        _play(board, (("f2", "f3"),))
+        assert(board.halfmoves == 99 and board.outcome() is None)
+        _play(board, (("e6", "e7"),))
+        assert(board.halfmoves == 100 and board.is_fifty_moves())
+        assert(board.outcome() == Outcome(Termination.FIFTY_MOVES, None))
+        assert(board.fen().endswith(" 100 81"))
+        board.undo()
+        assert(board.halfmoves == 99)
+        #  A pawn move starts the count over
+        board = Board.from_fen("8/8/4k3/8/8/8/4KP2/8 w - - 99 80")
+        _play(board, (("f2", "f3"),))
+        assert(board.halfmoves == 0 and board.outcome() is None)
+
+    @staticmethod
+    def test_insufficient_material():
+        for fen, insufficient in (
+            ("8/8/4k3/8/8/8/4K3/8 w - - 0 1", True),
+            ("8/8/4k3/8/8/2B5/4K3/8 w - - 0 1", True),
+            ("8/8/4k3/8/8/2N5/4K3/8 w - - 0 1", True),
+            ("8/8/4kb2/8/8/2B5/4K3/8 w - - 0 1", True),
+            ("8/8/4k1b1/8/8/2B5/4K3/8 w - - 0 1", False),
+            ("8/8/4kn2/8/8/2B5/4K3/8 w - - 0 1", False),
+            ("8/8/4k3/8/8/2NN4/4K3/8 w - - 0 1", False),
+            ("8/8/4k3/8/8/8/4KP2/8 w - - 0 1", False),
+            ("8/8/4k3/8/8/8/4KR2/8 w - - 0 1", False),
+        ):
+            board = Board.from_fen(fen)
+            assert(board.is_insufficient_material() == insufficient)
+            assert((board.outcome() is not None) == insufficient)
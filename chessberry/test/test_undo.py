@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from chessberry.chess import *
+from chessberry.test import tools
+
+
+def _state(board):
+    return (
+        [row for row in board],
+        [board.piece_bitboards(color) for color in Color],
+        [board.attacks(color) for color in Color],
+        board.turn,
+        board.hold_for_promotion,
+        repr(board.ledger),
+        (
+            board.ledger.has_white_king_moved,
+            board.ledger.has_black_king_moved,
+            board.ledger.has_white_a_rook_moved,
+            board.ledger.has_black_a_rook_moved,
+            board.ledger.has_white_h_rook_moved,
+            board.ledger.has_black_h_rook_moved,
+        ),
+    )
+
+
+class TestUndo(unittest.TestCase):
+
+    @staticmethod
+    def test_undo_nothing():
+        board = Board()
+        assert(not board.undo())
+
+    @staticmethod
+    def test_undo_capture():
+        board = Board()
+        board.move('e2', 'e4')
+        board.move('d7', 'd5')
+        before = _state(board)
+        board.move('e4', 'd5')
+        assert(board.undo())
+        assert(_state(board) == before)
+        assert(board.move('e4', 'd5'))
+
+    @staticmethod
+    def test_pop_enpassant():
+        board = Board()
+        for start, end in [('e2', 'e4'), ('a7', 'a6'), ('e4', 'e5'), ('d7', 'd5')]:
+            board.move(start, end)
+        before = _state(board)
+        board.move('e5', 'd6')
+        assert(board.get_piece('d5') is None)
+        last_move = board.pop()
+        assert(last_move.enpassant)
+        assert(board.get_piece('d5') == BLACK_PAWN)
+        assert(_state(board) == before)
+
+    @staticmethod
+    def test_pop_castle_restores_rights():
+        board = tools.from_placement("r3k2r/8/8/8/8/8/8/R3K2R")
+        before = _state(board)
+        board.move('e1', 'c1')
+        assert(board.ledger.has_white_king_moved)
+        board.pop()
+        assert(not board.ledger.has_white_king_moved)
+        assert(_state(board) == before)
+
+    @staticmethod
+    def test_pop_held_promotion():
+        board = Board(True)
+        board.attach('a1', WHITE_KING)
+        board.attach('h8', BLACK_KING)
+        board.attach('b7', WHITE_PAWN)
+        board.attach('c8', BLACK_ROOK)
+        before = _state(board)
+        board.move('b7', 'c8')
+        assert(board.hold_for_promotion)
+        board.pop()
+        assert(_state(board) == before)
+        board.move('b7', 'c8', Piece.KNIGHT)
+        assert(board.get_piece('c8') == WHITE_KNIGHT)
+        board.pop()
+        assert(_state(board) == before)
+
+    @staticmethod
+    def test_random_games_unwind():
+        rng = random.Random(11)
+        for _ in range(4):
+            board = Board()
+            states = []
+            for _ in range(100):
+                moves = sorted(legal_moves(board))
+                if not moves:
+                    break
+                states.append(_state(board))
+                start, end = rng.choice(moves)
+                board.push(start, end, rng.choice(PROMOTION_PIECES))
+            while states:
+                board.pop()
+                assert(_state(board) == states.pop())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import io
+import os
+import tempfile
+import unittest
+
+from chessberry.chess import *
+from chessberry.ingest import replay_game
+from chessberry.pgn import (
+    game_san,
+    iter_pgn_games,
+    parse_pgn_game,
+    write_pgn_game,
+    write_pgn_games,
+)
+from chessberry.test import tools
+
+GAMES = os.path.join(os.path.dirname(__file__), "games")
+
+
+def _play(board, *sans):
+    for san in sans:
+        board.push(*board.parse_san(san))
+    return board
+
+
+class TestWritePgn(unittest.TestCase):
+
+    @staticmethod
+    def test_san():
+        board = _play(Board(), 'e4', 'e5', 'Qh5', 'Nc6', 'Bc4', 'Nf6')
+        assert(board.san((4, 7), (6, 5)) == 'Qxf7#')
+        assert(board.san((4, 7), (4, 4)) == 'Qxe5+')
+        board = tools.from_placement("4k3/8/8/8/R6R/8/8/R3K3")
+        assert(board.san((3, 7), (3, 3)) == 'Rhd4')
+        assert(board.san((3, 0), (1, 0)) == 'R4a2')
+        assert(board.san((0, 0), (1, 0)) == 'R1a2')
+        board = tools.from_placement("1r2k3/P7/8/8/8/8/8/4K3")
+        assert(board.san((6, 0), (7, 1), Piece.KNIGHT) == 'axb8=N')
+        assert(board.san((6, 0), (7, 0)) == 'a8=Q')
+
+    @staticmethod
+    def test_ledger_repr():
+        board = _play(Board(), 'e4', 'd5', 'exd5', 'Qxd5', 'Nc3', 'Qa5')
+        assert(repr(board.ledger) == '1.e4 d5 2.exd5 Qxd5 3.Nc3 Qa5')
+        board = tools.from_placement("r3k2r/8/8/8/8/8/8/R3K2R")
+        _play(board, 'O-O-O', 'O-O')
+        assert(repr(board.ledger) == '1.O-O-O O-O')
+
+    @staticmethod
+    def test_game_san_restores_board():
+        board = _play(Board(), 'e4', 'd5', 'exd5', 'c6', 'dxc6', 'Nf6', 'cxb7', 'e5',
+                      'bxa8=N')
+        before = board.fen(), board.hash
+        fen, sans = game_san(board)
+        assert(fen == 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+        assert(sans[-1] == 'bxa8=N')
+        assert((board.fen(), board.hash) == before)
+
+    @staticmethod
+    def test_waiting_for_promotion():
+        board = tools.from_placement("4k3/P7/8/8/8/8/8/4K3")
+        assert(board.move('a7', 'a8'))
+        try:
+            write_pgn_game(io.StringIO(), board)
+            assert(False)
+        except ValueError:
+            pass
+        assert(board.hold_for_promotion and len(board.ledger) == 1)
+        assert(board.promote(Piece.ROOK))
+        assert(game_san(board)[1] == ['a8=R+'])
+
+    @staticmethod
+    def test_write_from_position():
+        board = tools.from_placement("4k3/8/8/8/8/8/8/R3K3", Color.DARK)
+        _play(board, 'Kd7', 'Ra7+')
+        out = io.StringIO()
+        write_pgn_game(out, board, {'White': 'A', 'Result': '1/2-1/2'})
+        assert(out.getvalue() == (
+            '[Event "?"]\n'
+            '[Site "?"]\n'
+            '[Date "????.??.??"]\n'
+            '[Round "?"]\n'
+            '[White "A"]\n'
+            '[Black "?"]\n'
+            '[Result "1/2-1/2"]\n'
+            '[FEN "4k3/8/8/8/8/8/8/R3K3 b Q - 0 1"]\n'
+            '[SetUp "1"]\n'
+            '\n'
+            '1... Kd7 2. Ra7+ 1/2-1/2\n'
+            '\n'
+        ))
+
+    @staticmethod
+    def test_result_from_board():
+        board = _play(Board(), 'f3', 'e5', 'g4', 'Qh4#')
+        out = io.StringIO()
+        write_pgn_game(out, board)
+        assert('[Result "0-1"]\n' in out.getvalue())
+        assert(out.getvalue().endswith('1. f3 e5 2. g4 Qh4# 0-1\n\n'))
+        out = io.StringIO()
+        write_pgn_game(out, board, {'Result': '*'})
+        assert(out.getvalue().endswith('Qh4# *\n\n'))
+        board.undo()
+        out = io.StringIO()
+        write_pgn_game(out, board)
+        assert('[Result "*"]\n' in out.getvalue())
+
+    @staticmethod
+    def test_round_trip_from_position():
+        board = Board.from_fen("4k3/8/8/8/8/8/8/4K2R w K - 3 20")
+        _play(board, 'O-O', 'Kd7', 'Rd1+')
+        out = io.StringIO()
+        write_pgn_game(out, board, {'Result': '*'})
+        game = parse_pgn_game(out.getvalue())
+        assert(game.start().fen() == "4k3/8/8/8/8/8/8/4K2R w K - 3 20")
+        assert(game.board().fen() == board.fen())
+        record = replay_game(0, out.getvalue())
+        assert(record.error is None and record.plies == 3)
+        assert(record.fen == board.fen())
+        #  A game without moves is its start position
+        game = parse_pgn_game('[FEN "4k3/8/8/8/8/8/8/4K2R w K - 0 1"]\n\n*\n')
+        assert(game.board().fen() == "4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+
+    @staticmethod
+    def test_round_trip():
+        games = list(iter_pgn_games(os.path.join(GAMES, "ct-2863-2675-2020.4.7.pgn")))
+        fd, path = tempfile.mkstemp(suffix=".pgn")
+        os.close(fd)
+        try:
+            boards = [(game.board(), game.headers) for game in games * 3]
+            assert(write_pgn_games(path, iter(boards)) == 3)
+            with open(path) as f:
+                assert(max(len(line) for line in f) <= 80)
+            written = list(iter_pgn_games(path))
+            assert(len(written) == 3)
+            for game, (board, headers) in zip(written, boards):
+                assert(game.headers == headers)
+                assert(game.board().fen() == board.fen())
+                assert(len(game) == len(board.ledger))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
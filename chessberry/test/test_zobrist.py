@@ -0,0 +1,108 @@
+import random
+import unittest
+
+from chessberry.chess import *
+from chessberry.chess import (
+    _PIECE_INDEX,
+    _ZOBRIST_CASTLING,
+    _ZOBRIST_ENPASSANT,
+    _ZOBRIST_PIECES,
+    _ZOBRIST_TURN,
+)
+
+
+def _scratch_hash(board):
+    key = _ZOBRIST_CASTLING[board.ledger.castling_rights]
+    for square in range(64):
+        piece = board.piece_at(square)
+        if piece is not None:
+            key ^= _ZOBRIST_PIECES[piece.color == Color.DARK][_PIECE_INDEX[piece.piece]][square]
+    if board.turn == Color.DARK:
+        key ^= _ZOBRIST_TURN
+    if len(board.ledger) > 0:
+        last = board.ledger[len(board.ledger) - 1]
+        if last.piece.piece == Piece.PAWN and abs(last.start[0] - last.end[0]) == 2:
+            for file in (last.end[1] - 1, last.end[1] + 1):
+                if file in FILES and board[last.end[0]][file] == PIECES[(Piece.PAWN, board.turn)]:
+                    key ^= _ZOBRIST_ENPASSANT[last.end[1]]
+                    break
+    return key
+
+
+class TestZobrist(unittest.TestCase):
+
+    @staticmethod
+    def test_transposition():
+        board = Board()
+        initial = board.hash
+        for start, end in [('g1', 'f3'), ('g8', 'f6'), ('f3', 'g1'), ('f6', 'g8')]:
+            board.move(start, end)
+        assert(board.hash == initial)
+
+        board.move('e2', 'e4')
+        board.move('e7', 'e5')
+        board.move('d2', 'd4')
+        other = Board()
+        other.move('d2', 'd4')
+        other.move('e7', 'e5')
+        other.move('e2', 'e4')
+        assert(board.hash == other.hash)
+
+    @staticmethod
+    def test_side_to_move_and_castling():
+        assert(Board().hash != Board(False, Color.DARK).hash)
+        board = Board()
+        for start, end in [('g1', 'f3'), ('g8', 'f6'), ('h1', 'g1'), ('f6', 'g8'),
+                           ('g1', 'h1'), ('g8', 'f6'), ('f3', 'g1'), ('f6', 'g8')]:
+            board.move(start, end)
+        assert(board[0] == Board()[0] and board.turn == Color.LIGHT)
+        assert(board.hash != Board().hash)
+
+    @staticmethod
+    def test_enpassant_file_only_when_capturable():
+        board = Board()
+        board.move('e2', 'e4')
+        assert(board.hash == _scratch_hash(board))
+        board.move('a7', 'a6')
+        board.move('e4', 'e5')
+        board.move('d7', 'd5')
+        capturable = board.hash
+        assert(capturable == _scratch_hash(board))
+        board.move('g1', 'f3')
+        board.move('g8', 'f6')
+        board.move('f3', 'g1')
+        board.move('f6', 'g8')
+        assert(board.hash != capturable)
+        assert(board.hash == capturable ^ _ZOBRIST_ENPASSANT[3])
+
+    @staticmethod
+    def test_attach():
+        board = Board(True)
+        board.attach('e1', WHITE_KING)
+        board.attach('e8', BLACK_KING)
+        assert(board.hash == _scratch_hash(board))
+        board.attach('e1', None)
+        board.attach('e1', WHITE_KING)
+        assert(board.hash == _scratch_hash(board))
+
+    @staticmethod
+    def test_random_games_match_scratch_hash():
+        rng = random.Random(3)
+        for _ in range(4):
+            board = Board()
+            hashes = []
+            for _ in range(100):
+                moves = sorted(legal_moves(board))
+                if not moves:
+                    break
+                hashes.append(board.hash)
+                start, end = rng.choice(moves)
+                board.push(start, end, rng.choice(PROMOTION_PIECES))
+                assert(board.hash == _scratch_hash(board))
+            while hashes:
+                board.pop()
+                assert(board.hash == hashes.pop())
+
+
+if __name__ == '__main__':
+    unittest.main()
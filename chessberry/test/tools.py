@@ -1,5 +1,21 @@
 from typing import Set, Tuple
-from chessberry.chess import from_indices
+from chessberry.chess import (
+    Board,
+    Color,
+    from_indices,
+    WHITE_PAWN,
+    BLACK_PAWN,
+    WHITE_ROOK,
+    BLACK_ROOK,
+    WHITE_KNIGHT,
+    BLACK_KNIGHT,
+    WHITE_BISHOP,
+    BLACK_BISHOP,
+    WHITE_QUEEN,
+    BLACK_QUEEN,
+    WHITE_KING,
+    BLACK_KING,
+)
 
 
 def to_alg_set(indices_set: Set[Tuple[int, int]]) -> Set[str]:
@@ -9,3 +25,33 @@ def to_alg_set(indices_set: Set[Tuple[int, int]]) -> Set[str]:
 
     return alg_set
 
+
+
+_PLACEMENT_PIECES = {
+    "P": WHITE_PAWN,
+    "p": BLACK_PAWN,
+    "R": WHITE_ROOK,
+    "r": BLACK_ROOK,
+    "N": WHITE_KNIGHT,
+    "n": BLACK_KNIGHT,
+    "B": WHITE_BISHOP,
+    "b": BLACK_BISHOP,
+    "Q": WHITE_QUEEN,
+    "q": BLACK_QUEEN,
+    "K": WHITE_KING,
+    "k": BLACK_KING,
+}
+
+
+def from_placement(placement: str, turn: Color = Color.LIGHT) -> Board:
+    """Build a board from the piece placement field of a fen string."""
+    board = Board(True, turn)
+    for i, row in enumerate(placement.split("/")):
+        file = 0
+        for c in row:
+            if c.isdigit():
+                file += int(c)
+            else:
+                board.attach(chr(ord("a") + file) + str(8 - i), _PLACEMENT_PIECES[c])
+                file += 1
+    return board